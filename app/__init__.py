@@ -2,19 +2,16 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 import logging
-import sys
 from config import Config
+from app.services import structured_logging
+from app.services.db_routing import RoutingSession
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+# Structured logs, written from a background thread
+structured_logging.configure()
 logger = logging.getLogger(__name__)
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 def create_app(config_class=Config):
@@ -27,17 +24,26 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
     logger.info("Config loaded")
     
+    # orjson-backed jsonify, with MessagePack for clients that ask for it
+    from app.services import json_provider
+    json_provider.install(app)
+    
+    # Timed pool classes and driver settings for the configured pool profile
+    from app.services import db_pool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_pool.engine_options(
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'], app.config['SQLALCHEMY_DATABASE_URI']
+    )
+    
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
+    db_pool.install(app)
+    from app.services import partitions, async_mode, compression
+    partitions.install(app)
+    async_mode.install(app)
+    compression.install(app)
     logger.info("Database extensions initialized")
     
-    # Initialize OpenAI if API key is available
-    if config_class.OPENAI_API_KEY:
-        import openai
-        openai.api_key = config_class.OPENAI_API_KEY
-        logger.info("OpenAI initialized")
-    
     # Register blueprints
     with app.app_context():
         logger.info("Importing route blueprints")
@@ -48,11 +54,9 @@ def create_app(config_class=Config):
         app.register_blueprint(api_bp, url_prefix='/api')
         logger.info("Blueprints registered")
     
-    # Serve static files
-    @app.route('/static/<path:path>')
-    def send_static(path):
-        from flask import send_from_directory
-        return send_from_directory('../static', path)
+    # Serve static files, with fingerprinted bundles precompressed and cached for good
+    from app.services import assets
+    assets.install(app)
     
     # Log successful app creation
     logger.info("App created successfully")
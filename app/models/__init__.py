@@ -1,4 +1,7 @@
 from app.models.user import User
 from app.models.food import FoodEntry, FoodReference
+from app.models.job import LookupJob
+from app.models.food_type import FoodTypeCache
+from app.models.recipe import Recipe, RecipeIngredient
 
-__all__ = ['User', 'FoodEntry', 'FoodReference'] 
\ No newline at end of file
+__all__ = ['User', 'FoodEntry', 'FoodReference', 'LookupJob', 'FoodTypeCache', 'Recipe', 'RecipeIngredient']
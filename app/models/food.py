@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.ext.compiler import compiles
 import sqlalchemy as sa
 
 class FoodReference(db.Model):
@@ -27,6 +28,86 @@ class FoodReference(db.Model):
     last_used_meal_type = db.Column(db.String(20), nullable=True, default='snack')  # Last meal type selected
     weight_per_unit = db.Column(db.Float, nullable=True, default=100)  # Weight of one unit in grams
 
+    __table_args__ = (
+        # Visibility filters ("is_shared OR creator_id = ?") combine these two index scans
+        db.Index('ix_food_reference_creator_id', 'creator_id'),
+        db.Index('ix_food_reference_shared_name', 'name', postgresql_where=db.text('is_shared')),
+    )
+
+    @staticmethod
+    def from_nutrition(name, brand, nutrition, creator_id, is_shared=False, quantity=100, meal_type='snack'):
+        """Build a new (unsaved) reference from per-100g nutrition values"""
+        from app.services.food_category import FoodCategory
+        nutri_score = FoodCategory.calculate_nutri_score(nutrition)
+        return FoodReference(
+            name=name,
+            brand=brand,
+            calories=nutrition.get('calories', 0),
+            energy_kj=nutrition.get('energy_kj', 0),
+            protein=nutrition.get('protein', 0),
+            carbs=nutrition.get('carbs', 0),
+            sugars=nutrition.get('sugars', 0),
+            fat=nutrition.get('fat', 0),
+            saturated_fat=nutrition.get('saturated_fat', 0),
+            sodium=nutrition.get('sodium', 0),
+            fiber=nutrition.get('fiber', 0),
+            fruits_veg_nuts=nutrition.get('fruits_veg_nuts', 0),
+            nutri_score=nutri_score['grade'],
+            numeric_score=nutri_score['score'],
+            simple_score=nutri_score['simple_score'],
+            is_shared=is_shared,
+            creator_id=creator_id,
+            last_used_quantity=quantity,
+            last_used_meal_type=meal_type,
+            last_used_unit=nutrition.get('unit'),
+            weight_per_unit=nutrition.get('weight', 100)  # Store the serving weight
+        )
+
+    def nutrition_dict(self):
+        """Per-100g nutrition values of this reference"""
+        return {
+            'calories': self.calories,
+            'energy_kj': self.energy_kj,
+            'protein': self.protein,
+            'carbs': self.carbs,
+            'sugars': self.sugars,
+            'fat': self.fat,
+            'saturated_fat': self.saturated_fat,
+            'sodium': self.sodium,
+            'fiber': self.fiber,
+            'fruits_veg_nuts': self.fruits_veg_nuts
+        }
+
+    def nutri_score_dict(self):
+        """Stored Nutri-Score of this reference"""
+        return {
+            'grade': self.nutri_score,
+            'score': self.numeric_score,
+            'simple_score': self.simple_score
+        }
+
+    @staticmethod
+    def find_for_user(food_name, brand, user_id):
+        """Find a visible reference matching name and brand, falling back to name only"""
+        visible = sa.or_(
+            FoodReference.is_shared == True,
+            FoodReference.creator_id == user_id
+        )
+        search_brand = brand if brand else "Generic"
+        reference = FoodReference.query.filter(
+            FoodReference.name.ilike(f"%{food_name}%"),
+            FoodReference.brand.ilike(f"%{search_brand}%"),
+            visible
+        ).first()
+        
+        if not reference:
+            # If not found with the specific brand, try with just the name
+            reference = FoodReference.query.filter(
+                FoodReference.name.ilike(f"%{food_name}%"),
+                visible
+            ).first()
+        return reference
+
     @staticmethod
     def find_similar(food_name, user_id):
         """Find food with similar name that is either shared or owned by the user"""
@@ -90,6 +171,38 @@ class FoodEntry(db.Model):
     numeric_score = db.Column(db.Integer, nullable=True)  # Raw Nutri-Score (-15 to +40)
     simple_score = db.Column(db.Integer, nullable=True)  # Normalized 0-100 score
 
+    __table_args__ = (
+        # Score endpoints query by user and date or date range
+        db.Index('ix_food_entry_user_id_date', 'user_id', 'date'),
+        # Monthly range partitions on PostgreSQL (see app/services/partitions.py)
+        {'postgresql_partition_by': 'RANGE (date)'}
+    )
+
+    @staticmethod
+    def from_nutrition(name, brand, description, quantity, meal_type, user_id, nutrition, nutri_score):
+        """Build a new (unsaved) entry from per-100g nutrition values and their Nutri-Score"""
+        return FoodEntry(
+            name=name,
+            brand=brand,
+            description=description,
+            quantity=quantity,
+            meal_type=meal_type,
+            user_id=user_id,
+            calories=nutrition.get('calories', 0),
+            energy_kj=nutrition.get('energy_kj', 0),
+            protein=nutrition.get('protein', 0),
+            carbs=nutrition.get('carbs', 0),
+            sugars=nutrition.get('sugars', 0),
+            fat=nutrition.get('fat', 0),
+            saturated_fat=nutrition.get('saturated_fat', 0),
+            sodium=nutrition.get('sodium', 0),
+            fiber=nutrition.get('fiber', 0),
+            fruits_veg_nuts=nutrition.get('fruits_veg_nuts', 0),
+            nutri_score=nutri_score['grade'],
+            numeric_score=nutri_score['score'],
+            simple_score=nutri_score['simple_score']
+        )
+
     def get_adjusted_nutrition(self):
         """Get nutrition values adjusted for the actual quantity"""
         # Get base values, defaulting to 0 if None
@@ -119,4 +232,20 @@ class FoodEntry(db.Model):
             'grade': self.nutri_score or 'C',  # Letter grade
             'numeric_score': self.numeric_score or 0,  # Raw score
             'simple_score': self.simple_score or 50  # Normalized score
-        } 
\ No newline at end of file
+        }
+
+# Catches dates without a monthly partition until partitions.ensure_partitions() moves them
+sa.event.listen(FoodEntry.__table__, 'after_create', sa.DDL(
+    "CREATE TABLE food_entry_default PARTITION OF food_entry DEFAULT"
+).execute_if(dialect='postgresql'))
+
+@compiles(sa.PrimaryKeyConstraint, 'postgresql')
+def _primary_key_with_partition_key(constraint, compiler, **kw):
+    """Add the partition key to food_entry's primary key, as PostgreSQL requires.
+
+    The mapper keeps `id` alone as the identity, so lookups by id are unchanged.
+    """
+    if constraint.table is not FoodEntry.__table__:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = list(constraint.columns) + [FoodEntry.__table__.c.date]
+    return f"PRIMARY KEY ({', '.join(compiler.preparer.quote(column.name) for column in columns)})"
@@ -0,0 +1,12 @@
+from app import db
+from datetime import datetime
+
+class FoodTypeCache(db.Model):
+    """Resolved food type, unit and unit weight for a food name, so the model is asked only once"""
+    name = db.Column(db.String(500), primary_key=True)  # normalized food name or full description
+    food_type = db.Column(db.String(50), nullable=False)
+    unit = db.Column(db.String(20), nullable=False, default='g')
+    weight_per_unit = db.Column(db.Float, nullable=True)  # grams, None if the model didn't give one
+    suggested_quantity = db.Column(db.Integer, nullable=True)  # units per serving, from the serving-size prompt
+    source = db.Column(db.String(20), nullable=False, default='model')  # model or reference
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
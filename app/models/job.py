@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+
+class LookupJob(db.Model):
+    """An AI lookup queued for the worker pool (see lookup_worker.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # nutrition, serving_size, food_type or add_food
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # food-type lookups can be anonymous
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='queued', server_default='queued')  # queued, running, done, failed
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Keeps the worker's claim query cheap no matter how many finished jobs pile up
+        db.Index('ix_lookup_job_pending', 'id', postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    def to_dict(self):
+        """Convert job to dictionary for the poll endpoint"""
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.result if self.status == 'done' else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat()
+        }
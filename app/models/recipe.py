@@ -0,0 +1,83 @@
+from app import db
+from datetime import datetime
+
+class Recipe(db.Model):
+    """A dish made of food references, with its per-100g nutrition precomputed (see app/services/recipes.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    is_shared = db.Column(db.Boolean, nullable=False, default=False, server_default='false')
+    total_weight = db.Column(db.Float, nullable=False, default=0)  # grams of all ingredients
+
+    # Nutritional information (per 100g of the finished recipe)
+    calories = db.Column(db.Float, nullable=False, default=0)
+    energy_kj = db.Column(db.Float, nullable=False, default=0)
+    protein = db.Column(db.Float, nullable=False, default=0)
+    carbs = db.Column(db.Float, nullable=False, default=0)
+    sugars = db.Column(db.Float, nullable=False, default=0)
+    fat = db.Column(db.Float, nullable=False, default=0)
+    saturated_fat = db.Column(db.Float, nullable=False, default=0)
+    sodium = db.Column(db.Float, nullable=False, default=0)  # in mg
+    fiber = db.Column(db.Float, nullable=False, default=0)
+    fruits_veg_nuts = db.Column(db.Float, nullable=False, default=0)  # percentage
+    nutri_score = db.Column(db.String(1), nullable=False, default='C')
+    numeric_score = db.Column(db.Integer, nullable=False, default=0)
+    simple_score = db.Column(db.Integer, nullable=False, default=50)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    ingredients = db.relationship('RecipeIngredient', backref='recipe', cascade='all, delete-orphan', order_by='RecipeIngredient.id')
+
+    def nutrition_dict(self):
+        """Per-100g nutrition values of this recipe"""
+        return {
+            'calories': self.calories,
+            'energy_kj': self.energy_kj,
+            'protein': self.protein,
+            'carbs': self.carbs,
+            'sugars': self.sugars,
+            'fat': self.fat,
+            'saturated_fat': self.saturated_fat,
+            'sodium': self.sodium,
+            'fiber': self.fiber,
+            'fruits_veg_nuts': self.fruits_veg_nuts
+        }
+
+    def nutri_score_dict(self):
+        """Stored Nutri-Score of this recipe"""
+        return {
+            'grade': self.nutri_score,
+            'score': self.numeric_score,
+            'simple_score': self.simple_score
+        }
+
+    def to_dict(self):
+        """Convert recipe to dictionary"""
+        return dict(
+            self.nutrition_dict(),
+            id=self.id,
+            name=self.name,
+            is_shared=self.is_shared,
+            total_weight=self.total_weight,
+            nutri_score=self.nutri_score,
+            numeric_score=self.numeric_score,
+            simple_score=self.simple_score,
+            ingredients=[ingredient.to_dict() for ingredient in self.ingredients]
+        )
+
+class RecipeIngredient(db.Model):
+    """Amount of a food reference in a recipe"""
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id'), nullable=False, index=True)
+    # Indexed as the reverse dependency: which recipes use a reference
+    reference_id = db.Column(db.Integer, db.ForeignKey('food_reference.id'), nullable=False, index=True)
+    grams = db.Column(db.Float, nullable=False)
+
+    reference = db.relationship('FoodReference')
+
+    def to_dict(self):
+        return {
+            'reference_id': self.reference_id,
+            'name': self.reference.name,
+            'brand': self.reference.brand,
+            'grams': self.grams
+        }
@@ -11,6 +11,7 @@ class User(db.Model):
     salt = db.Column(db.String(64), nullable=False)  # Add salt column
     email = db.Column(db.String(120), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    preferred_model = db.Column(db.String(20), nullable=True)  # ModelType value, None means Config.DEFAULT_MODEL
     food_entries = db.relationship('FoodEntry', backref='user', lazy=True)
 
     def set_password(self, password):
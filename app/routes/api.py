@@ -1,30 +1,77 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, current_app, request, jsonify, session, stream_with_context, url_for
 from app.routes.auth import login_required
 from app.models.food import FoodEntry, FoodReference
+from app.models.job import LookupJob
+from app.models.recipe import Recipe
 from app.services.food_category import FoodCategory
-from app.services.food_scoring import calculate_period_score
+from app.services.food_scoring import calculate_period_score, period_score
+from app.services.nutrition_prefetch import nutrition_prefetcher
+from app.services import provider_health, lookup_jobs, llm_metrics, model_preference, food_type_cache, food_import, food_export, meals, recipes, db_pool
+from app.services.serving_size import cached_serving_size
+from app.services.serving_resolver import serving_resolver
+from app.utils.text import build_full_description
 from app import db
 from config import Config, ModelType
 from datetime import datetime, timedelta
+import hmac
+import json
 import logging
-import requests
+import os
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 # Create a blueprint for API routes
 api_bp = Blueprint('api', __name__)
 
+def run_ai_lookup(kind, payload):
+    """Run a lookup that needs a model.
+
+    With the job queue enabled this returns 202 and a job id straight away;
+    poll /api/jobs/<id> for the result. Otherwise the lookup runs inline.
+    """
+    payload = dict(payload, model=model_preference.request_model().value)
+    user_id = session.get('user_id')
+    
+    if Config.AI_JOBS_ENABLED:
+        job = lookup_jobs.enqueue_job(kind, payload, user_id)
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('api.get_job', id=job.id)
+        }), 202
+    
+    # End the request's transaction so its pooled connection isn't held while waiting on the model
+    db.session.commit()
+    return jsonify(lookup_jobs.run_handler(kind, payload, user_id))
+
+@api_bp.route('/jobs/<int:id>')
+def get_job(id):
+    """Get the status (and result, once done) of a queued AI lookup"""
+    job = LookupJob.query.get_or_404(id)
+    
+    # Only the user who queued a job can see it
+    if job.user_id is not None and job.user_id != session.get('user_id'):
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(job.to_dict())
+
 @api_bp.route('/models', methods=['GET'])
 def get_models():
     """Get available models and current model"""
     return jsonify({
         'available_models': {model.value: name for model, name in Config.AVAILABLE_MODELS.items()},
-        'current_model': Config.CURRENT_MODEL.value
+        'current_model': model_preference.request_model().value,
+        'default_model': Config.DEFAULT_MODEL.value,
+        'provider_health': {model.value: provider_health.get_breaker(model).to_dict() for model in Config.AVAILABLE_MODELS}
     })
 
 @api_bp.route('/models', methods=['POST'])
+@login_required
 def set_model():
-    """Set the current model"""
+    """Set the current user's model"""
     data = request.json
     model = data.get('model')
     
@@ -33,14 +80,33 @@ def set_model():
         if new_model not in Config.AVAILABLE_MODELS:
             return jsonify({'error': 'Invalid model'}), 400
             
-        if new_model != ModelType.FREE and not Config.OPENAI_API_KEY:
+        if new_model in (ModelType.GPT35, ModelType.GPT4) and not Config.OPENAI_API_KEY:
             return jsonify({'error': 'OpenAI API key not configured'}), 400
             
-        Config.CURRENT_MODEL = new_model
+        model_preference.set_user_model(session['user_id'], new_model)
         return jsonify({'success': True, 'current_model': model})
     except ValueError:
         return jsonify({'error': 'Invalid model'}), 400
 
+@api_bp.route('/metrics')
+def get_metrics():
+    """Model call and database pool metrics for this process, as JSON or (with ?format=prometheus) Prometheus text.
+
+    Needs the METRICS_TOKEN bearer token or a logged-in session, unless METRICS_PUBLIC is set.
+    """
+    token_ok = bool(Config.METRICS_TOKEN) and hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f"Bearer {Config.METRICS_TOKEN}".encode())
+    if not (Config.METRICS_PUBLIC or token_ok or 'user_id' in session):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if request.args.get('format') == 'prometheus':
+        return Response(llm_metrics.prometheus_text() + db_pool.prometheus_text(), mimetype='text/plain; version=0.0.4')
+    return jsonify({
+        'pid': os.getpid(),
+        'llm': llm_metrics.snapshot(),
+        'db': db_pool.snapshot()
+    })
+
 @api_bp.route('/food-references', methods=['GET'])
 @login_required
 def get_food_references():
@@ -108,8 +174,22 @@ def add_food():
     except (TypeError, ValueError):
         quantity = 100  # Default to 100g if conversion fails
     
-    logger.info("\n=== Adding new food entry ===")
-    logger.info(f"Food name: {food_name}, Brand: {brand}, Quantity: {quantity}g, Meal Type: {meal_type}")
+    logger.debug("Adding food entry: %s, brand %s, %sg, %s", food_name, brand, quantity, meal_type)
+    
+    # A recipe's nutrition is precomputed, so it's logged like a single food
+    recipe_id = data.get('recipe_id')
+    if recipe_id:
+        recipe = db.session.get(Recipe, recipe_id)
+        if recipe is None or not (recipe.is_shared or recipe.creator_id == session['user_id']):
+            return jsonify({'error': 'Recipe not found'}), 404
+        entry = FoodEntry.from_nutrition(
+            food_name or recipe.name, brand, description, quantity, meal_type,
+            session['user_id'], recipe.nutrition_dict(), recipe.nutri_score_dict()
+        )
+        db.session.add(entry)
+        db.session.commit()
+        logger.info("Added food entry", extra={'food': recipe.name, 'source': 'recipe'})
+        return jsonify({'success': True})
     
     nutrition = None
     
@@ -124,7 +204,7 @@ def add_food():
         # Check if nutrition info was manually provided
         manual_nutrition = data.get('nutrition')
         if manual_nutrition:
-            logger.info("Using manually provided nutrition info")
+            logger.debug("Using manually provided nutrition info")
             nutrition = manual_nutrition
             
             # First check if we already have a similar reference in the database to avoid duplicates
@@ -140,7 +220,7 @@ def add_food():
             
             if existing_reference:
                 # Update the existing reference with new values
-                logger.info("Updating existing food reference")
+                logger.debug("Updating existing food reference")
                 reference = existing_reference
                 reference.last_used_quantity = quantity
                 reference.last_used_meal_type = meal_type
@@ -149,57 +229,22 @@ def add_food():
                 # Don't update nutrition values as they might be just approximations
             else:
                 # Store manual nutrition in new reference table entry
-                nutri_score = FoodCategory.calculate_nutri_score(nutrition)
-                food_ref = FoodReference(
-                    name=food_name,
-                    brand=brand,
-                    calories=nutrition.get('calories', 0),
-                    energy_kj=nutrition.get('energy_kj', 0),
-                    protein=nutrition.get('protein', 0),
-                    carbs=nutrition.get('carbs', 0),
-                    sugars=nutrition.get('sugars', 0),
-                    fat=nutrition.get('fat', 0),
-                    saturated_fat=nutrition.get('saturated_fat', 0),
-                    sodium=nutrition.get('sodium', 0),
-                    fiber=nutrition.get('fiber', 0),
-                    fruits_veg_nuts=nutrition.get('fruits_veg_nuts', 0),
-                    nutri_score=nutri_score['grade'],
-                    numeric_score=nutri_score['score'],
-                    simple_score=nutri_score['simple_score'],
+                food_ref = FoodReference.from_nutrition(
+                    food_name, brand, nutrition, session['user_id'],
                     is_shared=data.get('is_shared', False),
-                    creator_id=session['user_id'],
-                    last_used_quantity=quantity,
-                    last_used_meal_type=meal_type,
-                    last_used_unit=nutrition.get('unit'),
-                    weight_per_unit=nutrition.get('weight', 100)  # Store the serving weight
+                    quantity=quantity,
+                    meal_type=meal_type
                 )
                 db.session.add(food_ref)
                 db.session.commit()
                 reference = food_ref
-                logger.info(f"Stored manual nutrition in reference table for: {food_name}")
+                logger.debug("Stored manual nutrition in reference table for: %s", food_name)
         else:
             # Search for an existing reference in the database
-            search_brand = brand if brand else "Generic"
-            reference = FoodReference.query.filter(
-                FoodReference.name.ilike(f"%{food_name}%"),
-                FoodReference.brand.ilike(f"%{search_brand}%"),
-                db.or_(
-                    FoodReference.is_shared == True,
-                    FoodReference.creator_id == session['user_id']
-                )
-            ).first()
-            
-            if not reference:
-                reference = FoodReference.query.filter(
-                    FoodReference.name.ilike(f"%{food_name}%"),
-                    db.or_(
-                        FoodReference.is_shared == True,
-                        FoodReference.creator_id == session['user_id']
-                    )
-                ).first()
+            reference = FoodReference.find_for_user(food_name, brand, session['user_id'])
 
             if reference:
-                logger.info("Found food in reference database")
+                logger.debug("Found food in reference database")
                 # Use the reference brand if none specified
                 if brand == 'Generic' or not brand:
                     brand = reference.brand
@@ -208,96 +253,158 @@ def add_food():
                 reference.last_used_quantity = quantity
                 reference.last_used_meal_type = meal_type
                 db.session.commit()
-                logger.info(f"Updated last used quantity for {food_name}: {quantity}g, meal type: {meal_type}")
+                logger.debug("Updated last used quantity for %s: %sg, meal type: %s", food_name, quantity, meal_type)
             else:
-                # Get nutrition info from AI
-                nutrition = FoodCategory.get_nutrition_info(food_name)
-                if nutrition:
-                    # Store AI nutrition in reference table
-                    nutri_score = FoodCategory.calculate_nutri_score(nutrition)
-                    food_ref = FoodReference(
-                        name=food_name,
-                        brand=brand,
-                        calories=nutrition.get('calories', 0),
-                        energy_kj=nutrition.get('energy_kj', 0),
-                        protein=nutrition.get('protein', 0),
-                        carbs=nutrition.get('carbs', 0),
-                        sugars=nutrition.get('sugars', 0),
-                        fat=nutrition.get('fat', 0),
-                        saturated_fat=nutrition.get('saturated_fat', 0),
-                        sodium=nutrition.get('sodium', 0),
-                        fiber=nutrition.get('fiber', 0),
-                        fruits_veg_nuts=nutrition.get('fruits_veg_nuts', 0),
-                        nutri_score=nutri_score['grade'],
-                        numeric_score=nutri_score['score'],
-                        simple_score=nutri_score['simple_score'],
-                        is_shared=data.get('is_shared', False),
-                        creator_id=session['user_id'],
-                        last_used_quantity=quantity,
-                        last_used_meal_type=meal_type,
-                        last_used_unit=nutrition.get('unit'),
-                        weight_per_unit=nutrition.get('weight', 100)  # Store the serving weight
-                    )
-                    db.session.add(food_ref)
-                    db.session.commit()
-                    reference = food_ref
-                    logger.info(f"Stored AI nutrition in reference table for: {food_name}")
+                # Get nutrition info from AI, store it as a reference and log the entry
+                return run_ai_lookup('add_food', {
+                    'name': food_name,
+                    'brand': brand,
+                    'description': description,
+                    'quantity': quantity,
+                    'meal_type': meal_type,
+                    'is_shared': data.get('is_shared', False)
+                })
     
     # If we have a reference, extract nutrition from it
     if reference:
-        nutrition = {
-            'calories': reference.calories,
-            'energy_kj': reference.energy_kj,
-            'protein': reference.protein,
-            'carbs': reference.carbs,
-            'sugars': reference.sugars,
-            'fat': reference.fat,
-            'saturated_fat': reference.saturated_fat,
-            'sodium': reference.sodium,
-            'fiber': reference.fiber,
-            'fruits_veg_nuts': reference.fruits_veg_nuts
-        }
-        nutri_score = {
-            'grade': reference.nutri_score,
-            'score': reference.numeric_score,
-            'simple_score': reference.simple_score
-        }
+        nutrition = reference.nutrition_dict()
+        nutri_score = reference.nutri_score_dict()
     
     if nutrition:
         if 'nutri_score' not in locals():
             nutri_score = FoodCategory.calculate_nutri_score(nutrition)
         
         # Create new food entry
-        entry = FoodEntry(
-            name=food_name,
-            brand=brand,
-            description=description,
-            quantity=quantity,
-            meal_type=meal_type,
-            user_id=session['user_id'],
-            calories=nutrition.get('calories', 0),
-            energy_kj=nutrition.get('energy_kj', 0),
-            protein=nutrition.get('protein', 0),
-            carbs=nutrition.get('carbs', 0),
-            sugars=nutrition.get('sugars', 0),
-            fat=nutrition.get('fat', 0),
-            saturated_fat=nutrition.get('saturated_fat', 0),
-            sodium=nutrition.get('sodium', 0),
-            fiber=nutrition.get('fiber', 0),
-            fruits_veg_nuts=nutrition.get('fruits_veg_nuts', 0),
-            nutri_score=nutri_score['grade'],
-            numeric_score=nutri_score['score'],
-            simple_score=nutri_score['simple_score']
+        entry = FoodEntry.from_nutrition(
+            food_name, brand, description, quantity, meal_type,
+            session['user_id'], nutrition, nutri_score
         )
         
         db.session.add(entry)
         db.session.commit()
-        logger.info(f"Added new food entry for: {food_name}")
+        logger.info("Added food entry", extra={'food': food_name, 'source': 'manual' if data.get('nutrition') else 'reference'})
         
         return jsonify({'success': True})
     else:
         return jsonify({'error': 'Failed to get nutrition information'}), 400
 
+@api_bp.route('/meals', methods=['POST'])
+@login_required
+def add_meal():
+    """Log several food items with a shared meal type and date in one transaction.
+
+    Items take the same fields as POST /food (name, brand, description,
+    quantity, reference_id, nutrition, is_shared). Items that would need an
+    AI lookup are rejected; log those through the wizard first. Returns the
+    new entry ids and the refreshed score for the meal's day.
+    """
+    data = request.json or {}
+    items = [meals.parse_item(item) for item in data.get('items') or [] if isinstance(item, dict)]
+    meal_type = (data.get('meal_type') or 'snack').strip().lower()
+    if meal_type not in meals.MEAL_TYPES:
+        meal_type = 'snack'  # Default to snack if invalid value
+
+    if not items:
+        return jsonify({'error': 'At least one item is required'}), 400
+    if any(not item['name'] and not item['reference_id'] for item in items):
+        return jsonify({'error': 'Food name is required for every item'}), 400
+
+    try:
+        meal_date = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else datetime.now().date()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Date must be YYYY-MM-DD'}), 400
+
+    try:
+        entries = meals.log_meal(session['user_id'], items, meal_type, meal_date)
+    except meals.UnresolvedItems as e:
+        return jsonify({'error': str(e), 'unresolved': e.names}), 422
+
+    day_entries = FoodEntry.query.filter(
+        FoodEntry.date == meal_date,
+        FoodEntry.user_id == session['user_id']
+    ).all()
+    return jsonify({
+        'success': True,
+        'entry_ids': [entry.id for entry in entries],
+        'date': meal_date.strftime('%Y-%m-%d'),
+        'day': period_score(day_entries)
+    })
+
+@api_bp.route('/import', methods=['POST'])
+@login_required
+def import_food_log():
+    """Import food log history from a CSV, JSON Lines or JSON array upload.
+
+    Send the file as the multipart field "file". The format comes from the
+    file extension unless ?format=csv|ndjson|json is given. Clients that
+    accept text/event-stream get a progress event per batch, then done or failed.
+    """
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file_format = food_import.detect_format(upload.filename, request.args.get('format'))
+    if file_format not in ('csv', 'ndjson', 'json'):
+        return jsonify({'error': f"Unsupported format: {file_format}"}), 400
+
+    user_id = session['user_id']
+    logger.info("Importing %s food log %s for user %s", file_format, upload.filename, user_id)
+
+    if 'text/event-stream' not in request.headers.get('Accept', ''):
+        try:
+            stats = food_import.import_food_log(upload.stream, file_format, user_id)
+        except Exception as e:
+            return jsonify({'error': f"Import failed: {str(e)}"}), 400
+        return jsonify(stats.to_dict())
+
+    def generate():
+        stats = None
+        try:
+            # Each batch is committed before its progress event is sent
+            for stats in food_import.iter_import(upload.stream, file_format, user_id):
+                yield format_sse('progress', stats.to_dict())
+        except Exception as e:
+            yield format_sse('failed', {'error': f"Import failed: {str(e)}"})
+            return
+        yield format_sse('done', stats.to_dict())
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@api_bp.route('/export')
+@login_required
+def export_food_log():
+    """Download the user's food log as CSV or NDJSON with per-quantity nutrition.
+
+    Query parameters: format=csv|ndjson, from and to (YYYY-MM-DD, inclusive)
+    and gzip=true for a compressed download. The body is streamed, so any
+    size of history is exported in constant memory.
+    """
+    file_format = request.args.get('format', 'csv').lower()
+    if file_format not in food_export.FORMATS:
+        return jsonify({'error': 'Format must be csv or ndjson'}), 400
+
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+    filename = f"food-log.{file_format}" + ('.gz' if compress else '')
+    body = food_export.export_chunks(session['user_id'], file_format, start, end, compress)
+
+    return Response(
+        stream_with_context(body),
+        mimetype='application/gzip' if compress else food_export.FORMATS[file_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @api_bp.route('/food/<int:id>', methods=['DELETE'])
 @login_required
 def delete_food(id):
@@ -361,8 +468,7 @@ def get_weekly_score():
     }
     
     for date, day_entries in entries_by_date.items():
-        daily_score = calculate_period_score(day_entries)
-        daily_data = daily_score.get_json()
+        daily_data = period_score(day_entries)
         daily_scores.append({
             'date': date,
             'score': daily_data['score'],
@@ -452,8 +558,7 @@ def get_monthly_score():
     }
     
     for date, day_entries in entries_by_date.items():
-        daily_score = calculate_period_score(day_entries)
-        daily_data = daily_score.get_json()
+        daily_data = period_score(day_entries)
         daily_scores.append({
             'date': date,
             'score': daily_data['score'],
@@ -508,12 +613,76 @@ def delete_food_reference(id):
     if food_ref.creator_id != session['user_id']:
         return jsonify({'error': 'Unauthorized - you can only delete foods you created'}), 403
     
+    if recipes.recipes_using([id]):
+        return jsonify({'error': 'This food is an ingredient of a recipe'}), 409
+    
     # Delete the food reference
     db.session.delete(food_ref)
     db.session.commit()
     
     return jsonify({'success': True})
 
+@api_bp.route('/recipes', methods=['GET'])
+@login_required
+def get_recipes():
+    """Get the recipes the user can see"""
+    visible = Recipe.query.filter(
+        db.or_(
+            Recipe.is_shared == True,
+            Recipe.creator_id == session['user_id']
+        )
+    ).order_by(Recipe.name).all()
+    return jsonify([recipe.to_dict() for recipe in visible])
+
+def save_recipe(recipe, data):
+    """Apply a recipe request body ({name, is_shared, ingredients: [{reference_id, grams}]}) and commit"""
+    name = (data.get('name') or recipe.name or '').strip()
+    if not name:
+        return jsonify({'error': 'Recipe name is required'}), 400
+    
+    recipe.name = name
+    recipe.is_shared = bool(data.get('is_shared', recipe.is_shared or False))
+    if 'ingredients' in data or recipe.id is None:
+        try:
+            recipes.set_ingredients(recipe, [
+                (ingredient.get('reference_id'), ingredient.get('grams'))
+                for ingredient in data.get('ingredients') or []
+            ], session['user_id'])
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+    
+    db.session.add(recipe)
+    db.session.commit()
+    return jsonify(recipe.to_dict())
+
+@api_bp.route('/recipes', methods=['POST'])
+@login_required
+def create_recipe():
+    """Create a recipe from food references and gram amounts"""
+    return save_recipe(Recipe(creator_id=session['user_id']), request.json or {})
+
+@api_bp.route('/recipes/<int:id>', methods=['PUT'])
+@login_required
+def update_recipe(id):
+    """Rename, share or change the ingredients of a recipe"""
+    recipe = Recipe.query.get_or_404(id)
+    if recipe.creator_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized - you can only edit recipes you created'}), 403
+    return save_recipe(recipe, request.json or {})
+
+@api_bp.route('/recipes/<int:id>', methods=['DELETE'])
+@login_required
+def delete_recipe(id):
+    """Delete a recipe"""
+    recipe = Recipe.query.get_or_404(id)
+    if recipe.creator_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized - you can only delete recipes you created'}), 403
+    
+    db.session.delete(recipe)
+    db.session.commit()
+    return jsonify({'success': True})
+
 @api_bp.route('/serving-sizes/<food_name>')
 def get_serving_sizes(food_name):
     """Get appropriate serving sizes for a food item"""
@@ -536,7 +705,7 @@ def get_food_type_info(food_name):
         # If we have a record with last used data, prefer that
         if food_ref and food_ref.last_used_quantity:
             food_type = Config.get_food_type(food_name)
-            serving_sizes = Config.SERVING_SIZES.get(food_type, Config.SERVING_SIZES['default'])
+            serving_sizes = serving_resolver.type_sizes(food_type)
             
             # Prepare a custom options list with the last used quantity as the first option
             custom_options = [{'label': f"Last used: {food_ref.last_used_quantity}g", 'value': food_ref.last_used_quantity}]
@@ -558,191 +727,18 @@ def get_food_type_info(food_name):
             
             return jsonify(response)
         
-        # If no record or no last used data, use the LLM to get food type info
-        if Config.CURRENT_MODEL == ModelType.FREE:
-            prompt = Config.HUGGINGFACE_FOOD_TYPE_PROMPT.format(food_name=food_name)
-            headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
-            api_url = f"{Config.HUGGINGFACE_API_BASE_URL}/models/google/flan-t5-base"
-            
-            response = requests.post(api_url, headers=headers, json={
-                "inputs": prompt,
-                "parameters": {"max_length": 50}
-            })
-            
-            if response.status_code == 200:
-                result = response.json()[0]["generated_text"].strip().lower()
-                if '|' in result:
-                    parts = result.split('|')
-                    if len(parts) == 3:
-                        food_type, unit, weight = parts
-                        weight = float(weight)
-                    else:
-                        food_type = parts[0]
-                        unit = parts[1] if len(parts) > 1 else 'g'
-                        weight = None
-                else:
-                    food_type = result
-                    unit = 'g'
-                    weight = None
-            else:
-                food_type = Config.get_food_type(food_name)
-                unit = 'g'
-                weight = None
-        else:
-            if Config.OPENAI_API_KEY:
-                import openai
-                
-                messages = [
-                    {"role": "system", "content": Config.OPENAI_FOOD_TYPE_SYSTEM_PROMPT},
-                    {"role": "user", "content": Config.OPENAI_FOOD_TYPE_PROMPT.format(food_name=food_name)}
-                ]
-                
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    temperature=0.3,
-                    max_tokens=50
-                )
-                
-                if response.choices:
-                    result = response.choices[0].message.content.strip().lower()
-                    if '|' in result:
-                        parts = result.split('|')
-                        if len(parts) == 3:
-                            food_type, unit, weight = parts
-                            weight = float(weight)
-                        else:
-                            food_type = parts[0]
-                            unit = parts[1] if len(parts) > 1 else 'g'
-                            weight = None
-                    else:
-                        food_type = result
-                        unit = 'g'
-                        weight = None
-                else:
-                    food_type = Config.get_food_type(food_name)
-                    unit = 'g'
-                    weight = None
-            else:
-                food_type = Config.get_food_type(food_name)
-                unit = 'g'
-                weight = None
-        
-        # If we didn't get a weight from the model, try to get it from our standard weights
-        if weight is None and unit in ['cookie', 'unit', 'piece', 'slice', 'tablespoon', 'cup']:
-            food_name_lower = food_name.lower()
-            
-            if unit == 'cookie':
-                if 'oreo' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['cookie']['oreo']
-                elif 'chocolate chip' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['cookie']['chocolate_chip']
-                else:
-                    weight = Config.STANDARD_WEIGHTS['cookie']['standard']
-            
-            elif unit == 'unit' and 'cracker' in food_name_lower:
-                if 'saltine' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['cracker']['saltine']
-                elif 'graham' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['cracker']['graham']
-                else:
-                    weight = Config.STANDARD_WEIGHTS['cracker']['standard']
-            
-            elif unit == 'piece' and food_type == 'fruits':
-                if 'apple' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['fruit']['apple']
-                elif 'banana' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['fruit']['banana']
-                elif 'orange' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['fruit']['orange']
-                else:
-                    weight = Config.STANDARD_WEIGHTS['fruit']['standard']
-            
-            elif unit == 'slice' and 'bread' in food_name_lower:
-                if 'white' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['bread']['white']
-                elif 'whole wheat' in food_name_lower or 'wholemeal' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['bread']['whole_wheat']
-                else:
-                    weight = Config.STANDARD_WEIGHTS['bread']['standard']
-            
-            elif unit == 'tablespoon':
-                weight = Config.STANDARD_WEIGHTS['tablespoon']
-            
-            elif unit == 'cup':
-                if food_type == 'beverages':
-                    weight = Config.STANDARD_WEIGHTS['cup']['liquid']
-                elif 'cereal' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['cup']['cereal']
-                elif 'leafy' in food_name_lower or 'salad' in food_name_lower:
-                    weight = Config.STANDARD_WEIGHTS['cup']['leafy_greens']
-                else:
-                    weight = Config.STANDARD_WEIGHTS['cup']['liquid']
-        
-        # Get serving sizes based on the unit and weight
-        if unit in ['cookie', 'unit', 'piece', 'slice']:
-            serving_sizes = {
-                'unit': unit,
-                'sizes': [
-                    {'label': f'1 {unit}', 'value': weight},
-                    {'label': f'2 {unit}s', 'value': weight * 2},
-                    {'label': f'3 {unit}s', 'value': weight * 3},
-                    {'label': f'Custom amount ({unit}s)', 'value': 'custom'}
-                ]
-            }
-        elif unit == 'tablespoon':
-            serving_sizes = {
-                'unit': unit,
-                'sizes': [
-                    {'label': '1 tablespoon', 'value': weight},
-                    {'label': '2 tablespoons', 'value': weight * 2},
-                    {'label': '3 tablespoons', 'value': weight * 3},
-                    {'label': 'Custom amount (tbsp)', 'value': 'custom'}
-                ]
-            }
-        elif unit == 'cup' and food_type == 'beverages':
-            serving_sizes = {
-                'unit': 'ml',
-                'sizes': [
-                    {'label': 'Small glass (200ml)', 'value': 200},
-                    {'label': 'Regular glass (250ml)', 'value': 250},
-                    {'label': 'Large glass (330ml)', 'value': 330},
-                    {'label': 'Custom volume (ml)', 'value': 'custom'}
-                ]
-            }
-        else:
-            serving_sizes = Config.SERVING_SIZES.get(food_type, Config.SERVING_SIZES['default'])
-        
-        # Get default quantity based on food type and unit
-        default_quantity = serving_sizes['sizes'][1]['value'] if len(serving_sizes['sizes']) > 1 else weight or 100
-        
-        # For display purposes, convert unit 'unit' to a more natural name
-        display_unit = unit
-        if unit == 'unit':
-            display_unit = 'piece'
-        
-        return jsonify({
-            'food_type': food_type,
-            'serving_sizes': serving_sizes,
-            'default_quantity': default_quantity,
-            'unit': unit,
-            'display_unit': display_unit,
-            'weight_per_unit': weight
-        })
+        # Foods the model has already typed are answered from the cache
+        cached = food_type_cache.get(food_name)
+        if cached is not None:
+            return jsonify(serving_resolver.food_type_options(food_name, cached.food_type, cached.unit, cached.weight_per_unit))
         
+        # If no record or no last used data, use the LLM to get food type info
+        return run_ai_lookup('food_type', {'name': food_name})
+
     except Exception as e:
         logger.error(f"Error getting food type info: {str(e)}")
         # Fallback to basic detection
-        food_type = Config.get_food_type(food_name)
-        serving_sizes = Config.SERVING_SIZES.get(food_type, Config.SERVING_SIZES['default'])
-        return jsonify({
-            'food_type': food_type,
-            'serving_sizes': serving_sizes,
-            'default_quantity': 100,
-            'unit': 'g',
-            'display_unit': 'g',
-            'weight_per_unit': None
-        })
+        return jsonify(serving_resolver.fallback_food_type_options(food_name))
 
 @api_bp.route('/food-info/verify', methods=['POST'])
 @login_required
@@ -764,28 +760,17 @@ def verify_food_info():
         formatted_description += f" - {description}"
     
     # Check if we already have this food in our database
-    reference = None
-    search_brand = brand if brand else "Generic"
+    reference = FoodReference.find_for_user(food_name, brand, session['user_id'])
     
-    # Try to find exact match with name and brand
-    reference = FoodReference.query.filter(
-        FoodReference.name.ilike(f"%{food_name}%"),
-        FoodReference.brand.ilike(f"%{search_brand}%"),
-        db.or_(
-            FoodReference.is_shared == True,
-            FoodReference.creator_id == session['user_id']
+    # Not in the database, so the nutrition step will need the AI. Start that lookup
+    # now so it runs while the user picks a serving size.
+    # With the job queue enabled, web workers leave all model calls to the lookup workers.
+    if reference is None and not Config.AI_JOBS_ENABLED:
+        nutrition_prefetcher.prefetch(
+            session['user_id'],
+            build_full_description(food_name, brand, description),
+            model_preference.request_model()
         )
-    ).first()
-    
-    if not reference:
-        # If not found with the specific brand, try with just the name
-        reference = FoodReference.query.filter(
-            FoodReference.name.ilike(f"%{food_name}%"),
-            db.or_(
-                FoodReference.is_shared == True,
-                FoodReference.creator_id == session['user_id']
-            )
-        ).first()
     
     return jsonify({
         'verified': True,
@@ -810,343 +795,73 @@ def get_recommended_serving_size():
         return jsonify({'error': 'Food name is required'}), 400
     
     # Check if we have this food in our database first
-    search_brand = brand if brand else "Generic"
-    reference = FoodReference.query.filter(
-        FoodReference.name.ilike(f"%{food_name}%"),
-        FoodReference.brand.ilike(f"%{search_brand}%"),
-        db.or_(
-            FoodReference.is_shared == True,
-            FoodReference.creator_id == session['user_id']
-        )
-    ).first()
-    
-    if not reference:
-        # Try with just the name
-        reference = FoodReference.query.filter(
-            FoodReference.name.ilike(f"%{food_name}%"),
-            db.or_(
-                FoodReference.is_shared == True,
-                FoodReference.creator_id == session['user_id']
-            )
-        ).first()
+    reference = FoodReference.find_for_user(food_name, brand, session['user_id'])
     
     # If found in database, use the last used quantity, unit, and weight
     if reference and reference.last_used_quantity:
-        logger.info(f"Using serving size from database for {food_name}")
+        logger.debug("Using serving size from database for %s", food_name)
         
         # Get the exact values from the database record
         exact_quantity = float(reference.last_used_quantity)
         unit = reference.last_used_unit
         weight_per_unit = float(reference.weight_per_unit) if reference.weight_per_unit else exact_quantity
         
-        # Determine display options based on unit type
-        if unit in ['cookie', 'piece', 'slice', 'unit', 'egg', 'cup', 'tbsp', 'tsp']:
-            # Format with pieces
-            pieces = 1 if weight_per_unit == exact_quantity else exact_quantity / weight_per_unit if weight_per_unit > 0 else 1
-            
-            serving_size = {
-                'food_type': 'from_database',
-                'unit': unit,
-                'weight': weight_per_unit,  # Exact weight per unit
-                'default_serving': {
-                    'quantity': exact_quantity,  # Use exact quantity from DB
-                    'unit': unit,
-                    'description': f"{pieces} {unit}{'' if pieces == 1 else 's'} ({exact_quantity}g)"
-                },
-                'options': [
-                    {'label': f"{pieces} {unit}{'' if pieces == 1 else 's'} ({exact_quantity}g)", 'value': exact_quantity},
-                    {'label': f"{pieces*2} {unit}s ({exact_quantity*2}g)", 'value': exact_quantity*2},
-                    {'label': f"1 {unit} ({weight_per_unit}g)", 'value': weight_per_unit},
-                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                ],
-                'last_used_meal_type': reference.last_used_meal_type  # Include last used meal type
-            }
-            return jsonify(serving_size)
-        else:
-            # Default options for weight/volume
-            serving_size = {
-                'food_type': 'from_database',
-                'unit': 'g',
-                'weight': 100,
-                'default_serving': {
-                    'quantity': exact_quantity,  # Use exact quantity from DB
-                    'unit': 'g',
-                    'description': f"{exact_quantity}g"
-                },
-                'options': [
-                    {'label': f"{exact_quantity}g", 'value': exact_quantity},
-                    {'label': f"100g", 'value': 100},
-                    {'label': f"150g", 'value': 150},
-                    {'label': f"200g", 'value': 200},
-                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                ],
-                'last_used_meal_type': reference.last_used_meal_type  # Include last used meal type
-            }
-            return jsonify(serving_size)
+        return jsonify(serving_resolver.reference_serving_options(
+            exact_quantity, unit, weight_per_unit, reference.last_used_meal_type
+        ))
     
-    # Prepare a full description for better LLM context
-    full_description = food_name
-    if brand:
-        full_description += f" made by {brand}"
-    if description:
-        full_description += f" ({description})"
+    # Foods the model has already sized are answered from the cache
+    cached = cached_serving_size(build_full_description(food_name, brand, description))
+    if cached is not None:
+        return jsonify(cached)
+    
+    return run_ai_lookup('serving_size', {
+        'name': food_name,
+        'brand': brand,
+        'description': description
+    })
+
+def reference_nutrition_result(reference, quantity):
+    """Build the nutrition step's response for a food found in the reference database"""
+    # Use existing reference
+    nutrition = reference.nutrition_dict()
+    
+    # Include the serving unit if available
+    serving_unit = reference.last_used_unit
+    serving_weight = reference.weight_per_unit
+    
+    # If we have a serving weight that's the same as the quantity, use it directly
+    if serving_weight and abs(serving_weight - quantity) < 0.01:
+        # This is likely a 1-piece serving where we should preserve the exact values
+        serving_weight = quantity  # Match it exactly to avoid decimal display issues
+
+    # Calculate Nutri-Score
+    nutri_score = FoodCategory.calculate_nutri_score(nutrition)
     
+    # Adjust values for the specified quantity
+    adjusted_nutrition = FoodCategory.adjust_for_quantity(nutrition, quantity)
+    
+    return {
+        'nutrition': nutrition,  # Per 100g
+        'adjusted_nutrition': adjusted_nutrition,  # Adjusted for quantity
+        'nutri_score': nutri_score,
+        'source': 'database',
+        'tier': 'database',
+        'from_reference': True,
+        'reference_id': reference.id,
+        'unit': serving_unit,
+        'weight': serving_weight
+    }
+
+def parse_quantity(quantity):
+    """Ensure quantity is a valid number, defaulting to 100g"""
     try:
-        # Use the LLM to get food type information
-        if Config.CURRENT_MODEL == ModelType.FREE:
-            prompt = Config.HUGGINGFACE_FOOD_TYPE_PROMPT.format(food_name=full_description)
-            headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
-            api_url = f"{Config.HUGGINGFACE_API_BASE_URL}/models/google/flan-t5-base"
-            
-            response = requests.post(api_url, headers=headers, json={
-                "inputs": prompt,
-                "parameters": {
-                    "max_length": 50,
-                    "temperature": 0.2,
-                    "num_return_sequences": 1,
-                    "do_sample": True
-                }
-            })
-            
-            if response.status_code == 200:
-                result = response.json()[0]["generated_text"].strip().lower()
-                logger.info(f"Hugging Face serving size response: {result}")
-                
-                # Parse the response
-                if '|' in result:
-                    parts = result.split('|')
-                    if len(parts) >= 4:  # Now expecting 4 parts with the quantity
-                        food_type, unit, weight, suggested_qty = parts[0], parts[1], float(parts[2]), int(float(parts[3]))
-                        
-                        # Set proper display options based on unit type
-                        if unit in ['cookie', 'piece', 'slice', 'unit', 'egg']:
-                            # Use the suggested quantity from the LLM response
-                            total_weight = weight * suggested_qty
-                            
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'suggested_quantity': suggested_qty,
-                                'default_serving': {
-                                    'quantity': total_weight,
-                                    'unit': unit,
-                                    'description': f"{suggested_qty} {unit}{'' if suggested_qty == 1 else 's'} ({total_weight}g)"
-                                },
-                                'options': [
-                                    {'label': f"{suggested_qty} {unit}{'' if suggested_qty == 1 else 's'} ({total_weight}g)", 'value': total_weight},
-                                    {'label': f"{suggested_qty*2} {unit}s ({total_weight*2}g)", 'value': total_weight*2},
-                                    {'label': f"1 {unit} ({weight}g)", 'value': weight},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        else:
-                            # Default options for weight/volume
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'default_serving': {
-                                    'quantity': weight,
-                                    'unit': unit,
-                                    'description': f"{weight}g"
-                                },
-                                'options': [
-                                    {'label': f"100g", 'value': 100},
-                                    {'label': f"150g", 'value': 150},
-                                    {'label': f"200g", 'value': 200},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        return jsonify(serving_size)
-                    elif len(parts) >= 3:  # Backward compatibility for old format
-                        food_type, unit, weight = parts[0], parts[1], float(parts[2])
-                        
-                        # Set proper display options based on unit type
-                        if unit in ['cookie', 'piece', 'slice', 'unit', 'egg']:
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'default_serving': {
-                                    'quantity': weight,
-                                    'unit': unit,
-                                    'description': f"1 {unit} ({weight}g)"
-                                },
-                                'options': [
-                                    {'label': f"1 {unit} ({weight}g)", 'value': weight},
-                                    {'label': f"2 {unit}s ({weight*2}g)", 'value': weight*2},
-                                    {'label': f"3 {unit}s ({weight*3}g)", 'value': weight*3},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        else:
-                            # Default options for weight/volume
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'default_serving': {
-                                    'quantity': weight,
-                                    'unit': unit,
-                                    'description': f"{weight}g"
-                                },
-                                'options': [
-                                    {'label': f"100g", 'value': 100},
-                                    {'label': f"150g", 'value': 150},
-                                    {'label': f"200g", 'value': 200},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        return jsonify(serving_size)
-        else:
-            import openai
-            
-            messages = [
-                {"role": "system", "content": Config.OPENAI_FOOD_TYPE_SYSTEM_PROMPT},
-                {"role": "user", "content": Config.OPENAI_FOOD_TYPE_PROMPT.format(food_name=full_description)}
-            ]
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.2,
-                max_tokens=50
-            )
-            
-            if response.choices:
-                result = response.choices[0].message.content.strip().lower()
-                logger.info(f"OpenAI serving size response: {result}")
-                
-                # Parse the response
-                if '|' in result:
-                    parts = result.split('|')
-                    if len(parts) >= 4:  # Now expecting 4 parts with the quantity
-                        food_type, unit, weight, suggested_qty = parts[0], parts[1], float(parts[2]), int(float(parts[3]))
-                        
-                        # Set proper display options based on unit type
-                        if unit in ['cookie', 'piece', 'slice', 'unit', 'egg']:
-                            # Use the suggested quantity from the LLM response
-                            total_weight = weight * suggested_qty
-                            
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'suggested_quantity': suggested_qty,
-                                'default_serving': {
-                                    'quantity': total_weight,
-                                    'unit': unit,
-                                    'description': f"{suggested_qty} {unit}{'' if suggested_qty == 1 else 's'} ({total_weight}g)"
-                                },
-                                'options': [
-                                    {'label': f"{suggested_qty} {unit}{'' if suggested_qty == 1 else 's'} ({total_weight}g)", 'value': total_weight},
-                                    {'label': f"{suggested_qty*2} {unit}s ({total_weight*2}g)", 'value': total_weight*2},
-                                    {'label': f"1 {unit} ({weight}g)", 'value': weight},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        else:
-                            # Default options for weight/volume
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'default_serving': {
-                                    'quantity': weight,
-                                    'unit': unit,
-                                    'description': f"{weight}g"
-                                },
-                                'options': [
-                                    {'label': f"100g", 'value': 100},
-                                    {'label': f"150g", 'value': 150},
-                                    {'label': f"200g", 'value': 200},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        return jsonify(serving_size)
-                    elif len(parts) >= 3:  # Backward compatibility for old format
-                        food_type, unit, weight = parts[0], parts[1], float(parts[2])
-                        
-                        # Set proper display options based on unit type
-                        if unit in ['cookie', 'piece', 'slice', 'unit', 'egg']:
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'default_serving': {
-                                    'quantity': weight,
-                                    'unit': unit,
-                                    'description': f"1 {unit} ({weight}g)"
-                                },
-                                'options': [
-                                    {'label': f"1 {unit} ({weight}g)", 'value': weight},
-                                    {'label': f"2 {unit}s ({weight*2}g)", 'value': weight*2},
-                                    {'label': f"3 {unit}s ({weight*3}g)", 'value': weight*3},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        else:
-                            # Default options for weight/volume
-                            serving_size = {
-                                'food_type': food_type,
-                                'unit': unit,
-                                'weight': weight,
-                                'default_serving': {
-                                    'quantity': weight,
-                                    'unit': unit,
-                                    'description': f"{weight}g"
-                                },
-                                'options': [
-                                    {'label': f"100g", 'value': 100},
-                                    {'label': f"150g", 'value': 150},
-                                    {'label': f"200g", 'value': 200},
-                                    {'label': 'Custom amount (g)', 'value': 'custom'}
-                                ]
-                            }
-                        return jsonify(serving_size)
-        
-        # If we reach here, either the API call failed or parsing failed
-        # Return default serving sizes
-        logger.info(f"Using default serving sizes for {food_name}")
-        default_serving = {
-            'food_type': 'default',
-            'unit': 'g',
-            'weight': 100,
-            'default_serving': {
-                'quantity': 100,
-                'unit': 'g',
-                'description': '100g'
-            },
-            'options': [
-                {'label': '100g', 'value': 100},
-                {'label': '150g', 'value': 150},
-                {'label': '200g', 'value': 200},
-                {'label': 'Custom amount (g)', 'value': 'custom'}
-            ]
-        }
-        return jsonify(default_serving)
-        
-    except Exception as e:
-        logger.error(f"Error getting serving size info: {str(e)}")
-        # Return default serving sizes
-        default_serving = {
-            'food_type': 'default',
-            'unit': 'g',
-            'weight': 100,
-            'default_serving': {
-                'quantity': 100,
-                'unit': 'g',
-                'description': '100g'
-            },
-            'options': [
-                {'label': '100g', 'value': 100},
-                {'label': '150g', 'value': 150},
-                {'label': '200g', 'value': 200},
-                {'label': 'Custom amount (g)', 'value': 'custom'}
-            ]
-        }
-        return jsonify(default_serving)
+        quantity = float(quantity)
+        if quantity <= 0:
+            quantity = 100  # Default to 100g if invalid
+    except (TypeError, ValueError):
+        quantity = 100  # Default to 100g if conversion fails
+    return quantity
 
 @api_bp.route('/food-info/nutrition', methods=['POST'])
 @login_required
@@ -1162,26 +877,17 @@ def get_nutrition_information():
     manual_nutrition = data.get('nutrition')
     
     # Ensure quantity is a valid number
-    try:
-        quantity = float(quantity)
-        if quantity <= 0:
-            quantity = 100  # Default to 100g if invalid
-    except (TypeError, ValueError):
-        quantity = 100  # Default to 100g if conversion fails
+    quantity = parse_quantity(quantity)
     
     if not food_name:
         return jsonify({'error': 'Food name is required'}), 400
     
     # Prepare a full description for better LLM context
-    full_description = food_name
-    if brand:
-        full_description += f" made by {brand}"
-    if description:
-        full_description += f" ({description})"
+    full_description = build_full_description(food_name, brand, description)
     
     # If we have manual nutrition data, use that
     if manual_nutrition:
-        logger.info(f"Using manually provided nutrition for {food_name}")
+        logger.debug("Using manually provided nutrition for %s", food_name)
         
         # Get the custom serving unit and weight if provided
         serving_unit = manual_nutrition.get('unit')
@@ -1228,92 +934,138 @@ def get_nutrition_information():
         })
     
     # Check if we have this food in our reference database
-    reference = None
-    search_brand = brand if brand else "Generic"
+    reference = FoodReference.find_for_user(food_name, brand, session['user_id'])
     
-    # Try to find exact match with name and brand
-    reference = FoodReference.query.filter(
-        FoodReference.name.ilike(f"%{food_name}%"),
-        FoodReference.brand.ilike(f"%{search_brand}%"),
-        db.or_(
-            FoodReference.is_shared == True,
-            FoodReference.creator_id == session['user_id']
-        )
-    ).first()
+    if reference:
+        logger.debug("Found existing nutrition info for %s", food_name)
+        return jsonify(reference_nutrition_result(reference, quantity))
+    else:
+        # Use the lookup started by the verify step if there is one
+        prefetched = nutrition_prefetcher.collect(session['user_id'], full_description, model_preference.request_model())
+        if prefetched is not None:
+            nutrition, tier = prefetched
+            return jsonify(FoodCategory.ai_nutrition_result(nutrition, tier, quantity))
+        
+        # Otherwise ask the AI now
+        return run_ai_lookup('nutrition', {
+            'name': food_name,
+            'brand': brand,
+            'description': description,
+            'quantity': quantity
+        })
+
+def format_sse(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@api_bp.route('/food-info/nutrition/stream')
+@login_required
+def stream_nutrition_information():
+    """Third step as server-sent events, so the wizard can show progress and partial results.
+
+    Events: db_hit or db_miss, cache_hit, queued, model_call_started, parsed,
+    score, then done (same body as POST /food-info/nutrition) or failed.
+    """
+    food_name = request.args.get('name', '').strip()
+    brand = request.args.get('brand', '').strip()
+    description = request.args.get('description', '').strip()
+    quantity = parse_quantity(request.args.get('quantity', 100))
     
-    if not reference:
-        # If not found with the specific brand, try with just the name
-        reference = FoodReference.query.filter(
-            FoodReference.name.ilike(f"%{food_name}%"),
-            db.or_(
-                FoodReference.is_shared == True,
-                FoodReference.creator_id == session['user_id']
-            )
-        ).first()
+    if not food_name:
+        return jsonify({'error': 'Food name is required'}), 400
     
-    if reference:
-        logger.info(f"Found existing nutrition info for {food_name}")
-        # Use existing reference
-        nutrition = {
-            'calories': reference.calories,
-            'energy_kj': reference.energy_kj,
-            'protein': reference.protein,
-            'carbs': reference.carbs,
-            'sugars': reference.sugars,
-            'fat': reference.fat,
-            'saturated_fat': reference.saturated_fat,
-            'sodium': reference.sodium,
-            'fiber': reference.fiber,
-            'fruits_veg_nuts': reference.fruits_veg_nuts
-        }
+    # Read everything needed from the request up front; the generator runs after the request context is gone
+    user_id = session['user_id']
+    model_type = model_preference.request_model()
+    full_description = build_full_description(food_name, brand, description)
+    app = current_app._get_current_object()
+    
+    def generate():
+        # Leaving the app context returns the connection to the pool before any model call
+        with app.app_context():
+            reference = FoodReference.find_for_user(food_name, brand, user_id)
+            result = reference_nutrition_result(reference, quantity) if reference else None
+            
+            if result is None and Config.AI_JOBS_ENABLED:
+                job_id = lookup_jobs.enqueue_job('nutrition', {
+                    'name': food_name,
+                    'brand': brand,
+                    'description': description,
+                    'quantity': quantity,
+                    'model': model_type.value
+                }, user_id).id
         
-        # Include the serving unit if available
-        serving_unit = reference.last_used_unit
-        serving_weight = reference.weight_per_unit
+        if result is not None:
+            yield format_sse('db_hit', {'reference_id': result['reference_id']})
+            yield format_sse('done', result)
+            return
+        yield format_sse('db_miss', {})
         
-        # If we have a serving weight that's the same as the quantity, use it directly
-        if serving_weight and abs(serving_weight - quantity) < 0.01:
-            # This is likely a 1-piece serving where we should preserve the exact values
-            serving_weight = quantity  # Match it exactly to avoid decimal display issues
-
-        # Calculate Nutri-Score
-        nutri_score = FoodCategory.calculate_nutri_score(nutrition)
+        if Config.AI_JOBS_ENABLED:
+            yield format_sse('queued', {'job_id': job_id})
+            yield from stream_job(app, job_id)
+            return
         
-        # Adjust values for the specified quantity
-        factor = quantity / 100.0
-        adjusted_nutrition = {k: round(v * factor, 1) for k, v in nutrition.items()}
-        adjusted_nutrition['fruits_veg_nuts'] = nutrition['fruits_veg_nuts']  # Percentage stays the same
+        events = queue.Queue()
         
-        return jsonify({
-            'nutrition': nutrition,  # Per 100g
-            'adjusted_nutrition': adjusted_nutrition,  # Adjusted for quantity
-            'nutri_score': nutri_score,
-            'source': 'database',
-            'from_reference': True,
-            'reference_id': reference.id,
-            'unit': serving_unit,
-            'weight': serving_weight
-        })
-    else:
-        # Use AI to get nutrition information
-        logger.info(f"Getting nutrition info from AI for {full_description}")
-        nutrition = FoodCategory.get_nutrition_info(full_description)
+        def on_event(stage, data):
+            if stage == 'parsed':
+                data = dict(data, adjusted_nutrition=FoodCategory.adjust_for_quantity(data['nutrition'], quantity))
+            events.put((stage, data))
         
-        if nutrition:
-            # Get Nutri-Score from nutrition data
-            nutri_score = nutrition.get('nutri_score', FoodCategory.calculate_nutri_score(nutrition))
-            
-            # Adjust values for the specified quantity
-            factor = quantity / 100.0
-            adjusted_nutrition = {k: round(v * factor, 1) for k, v in nutrition.items() if k != 'nutri_score'}
-            adjusted_nutrition['fruits_veg_nuts'] = nutrition['fruits_veg_nuts']  # Percentage stays the same
-            
-            return jsonify({
-                'nutrition': nutrition,  # Per 100g
-                'adjusted_nutrition': adjusted_nutrition,  # Adjusted for quantity
-                'nutri_score': nutri_score,
-                'source': 'ai',
-                'from_reference': False
-            })
-        else:
-            return jsonify({'error': 'Failed to get nutrition information'}), 400 
\ No newline at end of file
+        def lookup():
+            try:
+                prefetched = nutrition_prefetcher.collect(user_id, full_description, model_type)
+                if prefetched is not None:
+                    events.put(('cache_hit', {'source': 'prefetch'}))
+                    nutrition, tier = prefetched
+                else:
+                    nutrition, tier = FoodCategory.get_nutrition_info_with_tier(full_description, model_type, on_event)
+                events.put(('done', FoodCategory.ai_nutrition_result(nutrition, tier, quantity)))
+            except Exception as e:
+                logger.error(f"Error streaming nutrition info: {str(e)}")
+                events.put(('failed', {'error': 'Failed to get nutrition information'}))
+        
+        threading.Thread(target=llm_metrics.bind_context(lookup), daemon=True).start()
+        
+        while True:
+            try:
+                stage, data = events.get(timeout=Config.SSE_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(stage, data)
+            if stage in ('done', 'failed'):
+                return
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let nginx buffer the stream
+    })
+
+def stream_job(app, job_id):
+    """Yield SSE events until a queued job finishes, holding a DB connection only while polling"""
+    waited = 0
+    deadline = time.monotonic() + Config.AI_JOB_STREAM_DEADLINE
+    while True:
+        time.sleep(Config.AI_JOB_POLL_INTERVAL)
+        waited += Config.AI_JOB_POLL_INTERVAL
+        with app.app_context():
+            job = db.session.get(LookupJob, job_id)
+            if job is None:
+                status, result, error = 'failed', None, 'Lookup job not found'
+            else:
+                status, result, error = job.status, job.result, job.error
+        
+        if status not in ('done', 'failed') and time.monotonic() >= deadline:
+            status, error = 'failed', 'Timed out waiting for the lookup'
+        if status == 'done':
+            yield format_sse('done', result)
+            return
+        if status == 'failed':
+            yield format_sse('failed', {'error': error or 'Failed to get nutrition information'})
+            return
+        if waited >= Config.SSE_HEARTBEAT_SECONDS:
+            waited = 0
+            yield ": keep-alive\n\n"
@@ -1,5 +1,6 @@
 # Services package 
 from app.services.food_category import FoodCategory
 from app.services.food_scoring import calculate_period_score
+from app.services.nutrition_prefetch import nutrition_prefetcher
 
-__all__ = ['FoodCategory', 'calculate_period_score'] 
\ No newline at end of file
+__all__ = ['FoodCategory', 'calculate_period_score', 'nutrition_prefetcher']
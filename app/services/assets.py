@@ -0,0 +1,134 @@
+"""Fingerprinted, precompressed static bundles.
+
+    python -m app.services.assets
+
+concatenates the sources of each bundle in BUNDLES into
+static/dist/<name>.<hash>.<ext>, writes gzip and (when the Brotli package is
+installed) brotli variants next to it, and records the URLs in
+static/dist/manifest.json. Templates link bundles with asset_urls(name),
+which falls back to the separate source files when no manifest has been
+built, so development needs no build step.
+
+install() replaces Flask's static view: fingerprinted files are served
+precompressed with a year-long immutable Cache-Control, since a change in
+content means a new filename; other static files get STATIC_MAX_AGE.
+"""
+from flask import current_app, request, send_from_directory, url_for
+from config import Config
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+logger = logging.getLogger(__name__)
+
+# Bundle name -> source files under static/, concatenated in order
+BUNDLES = {
+    'main.js': ['js/index.js', 'js/food_entry.js']
+}
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+# Precompressed variants, preferred in this order when the client accepts both
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def build(static_folder):
+    """Write the bundles, their compressed variants and the manifest; returns the manifest"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    brotli = _brotli()
+    if brotli is None:
+        logger.warning("Brotli isn't installed, writing gzip variants only")
+
+    manifest, written = {}, {MANIFEST}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), 'rb') as f:
+                parts.append(f.read().rstrip() + b'\n')
+        content = b'\n'.join(parts)
+        stem, ext = os.path.splitext(name)
+        filename = f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+        variants = {filename: content, filename + '.gz': gzip.compress(content, 9, mtime=0)}
+        if brotli is not None:
+            variants[filename + '.br'] = brotli.compress(content, quality=11)
+        for variant, data in variants.items():
+            with open(os.path.join(dist, variant), 'wb') as f:
+                f.write(data)
+        written.update(variants)
+        manifest[name] = f"{DIST_DIR}/{filename}"
+        logger.info(f"Built {manifest[name]}: {len(content)} bytes, gzip {len(variants[filename + '.gz'])}"
+                    + (f", brotli {len(variants[filename + '.br'])}" if brotli is not None else ""))
+
+    # Drop bundles from earlier builds
+    for entry in os.listdir(dist):
+        if entry not in written:
+            os.remove(os.path.join(dist, entry))
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_manifest(static_folder):
+    """The built manifest, or an empty one if the assets haven't been built"""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"Error reading the asset manifest: {str(e)}")
+        return {}
+
+def asset_urls(name):
+    """URLs to include for a bundle: the built file, or its sources when not built"""
+    built = current_app.extensions['assets'].get(name)
+    if built:
+        return [url_for('static', filename=built)]
+    return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+def _send_static(filename):
+    """Serve a static file, precompressed and immutable if it's a built bundle"""
+    static_folder = current_app.static_folder
+    if filename not in current_app.extensions['assets'].values():
+        return send_from_directory(static_folder, filename, max_age=Config.STATIC_MAX_AGE)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(static_folder, filename + suffix)):
+            response = send_from_directory(static_folder, filename + suffix, mimetype=mimetype,
+                                           max_age=Config.ASSET_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(static_folder, filename, max_age=Config.ASSET_MAX_AGE)
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+def install(app):
+    """Load the manifest, expose asset_urls to templates and take over the static view"""
+    app.extensions['assets'] = load_manifest(app.static_folder)
+    app.jinja_env.globals['asset_urls'] = asset_urls
+    app.view_functions['static'] = _send_static
+    if not app.extensions['assets']:
+        logger.info("No built assets, serving bundle sources; run python -m app.services.assets to build them")
+
+def main():
+    static_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'static')
+    manifest = build(static_folder)
+    for name, path in manifest.items():
+        print(f"{name} -> {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Async serving mode: gunicorn gevent workers.
+
+With SERVER_MODE=async the app runs under `gunicorn -k gevent`. The worker
+patches the standard library, so the provider calls made through requests
+and openai, the hedging thread pool and the prefetcher all yield to other
+requests while they wait. One process can then keep hundreds of wizard
+requests in flight. The views stay as they are.
+
+psycopg2 blocks in C, so install() gives it a wait callback that waits on
+gevent instead. psycopg 3 does this on its own once gevent has patched the
+standard library.
+"""
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+def enabled():
+    """Whether this process runs under gevent with a patched standard library"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+def _psycopg2_wait(connection, timeout=None):
+    """Wait for a psycopg2 connection by polling it and yielding to gevent"""
+    from gevent.socket import wait_read, wait_write
+    import psycopg2
+    from psycopg2 import extensions
+
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state}")
+
+def install(app):
+    """Make database waits cooperative when running under gevent"""
+    if not enabled():
+        if Config.SERVER_MODE == 'async':
+            logger.warning("SERVER_MODE is async but gevent isn't active; start gunicorn with -k gevent")
+        return
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        pass
+    else:
+        extensions.set_wait_callback(_psycopg2_wait)
+    logger.info(f"Async mode: gevent worker, up to {Config.PROVIDER_MAX_IN_FLIGHT} provider calls in flight")
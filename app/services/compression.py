@@ -0,0 +1,95 @@
+"""Negotiated gzip/brotli compression of JSON responses.
+
+install() adds an after_request hook that compresses responses whose
+mimetype is in Config.COMPRESS_MIMETYPES when the client accepts br or
+gzip. Buffered bodies smaller than COMPRESS_MIN_SIZE are left alone, since
+compressing them saves less than it costs; streamed bodies are compressed
+chunk by chunk as they are sent. 304s, responses that already carry a
+Content-Encoding (built assets, gzip exports) and server-sent events are
+never touched.
+"""
+from flask import request
+from config import Config
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+class _Gzip:
+    """Streaming gzip compressor"""
+    def __init__(self):
+        self._compressor = zlib.compressobj(Config.COMPRESS_GZIP_LEVEL, wbits=31)  # 31 writes a gzip header and trailer
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class _Brotli:
+    """Streaming brotli compressor"""
+    def __init__(self):
+        self._compressor = _brotli().Compressor(quality=Config.COMPRESS_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+def _encodings():
+    """Encodings this process can produce, most preferred first"""
+    return (['br'] if _brotli() is not None else []) + ['gzip']
+
+COMPRESSORS = {'br': _Brotli, 'gzip': _Gzip}
+
+def compress_chunks(chunks, encoding):
+    """Compress an iterable of byte strings, yielding compressed output as it becomes available"""
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+def _compress_response(response):
+    """Compress an eligible response in the encoding the client prefers"""
+    if (response.mimetype not in Config.COMPRESS_MIMETYPES or response.status_code < 200
+            or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(_encodings())
+    if encoding is None:
+        return response
+
+    try:
+        if response.is_streamed:
+            response.response = compress_chunks(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < Config.COMPRESS_MIN_SIZE:
+                return response
+            response.set_data(b''.join(compress_chunks([data], encoding)))
+        response.headers['Content-Encoding'] = encoding
+        # The compressed body is a different representation, so a strong validator no longer applies
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    except Exception as e:
+        logger.error(f"Error compressing response with {encoding}: {str(e)}")
+    return response
+
+def install(app):
+    """Compress JSON responses after each request"""
+    if Config.COMPRESSION_ENABLED:
+        app.after_request(_compress_response)
@@ -0,0 +1,161 @@
+"""Connection pool instrumentation and per-endpoint statement timeouts.
+
+create_app passes Config.SQLALCHEMY_ENGINE_OPTIONS through engine_options(),
+which swaps in pool classes that time each checkout, and install() sets
+statement_timeout with SET LOCAL at the start of every transaction: the value
+comes from Config.STATEMENT_TIMEOUTS for the current endpoint. SET LOCAL ends
+with the transaction, so it is safe behind PgBouncer in transaction mode.
+
+A statement cancelled by the timeout is answered with a 503 instead of a 500.
+"""
+from flask import has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool, QueuePool
+from app import db
+from config import Config
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = '57014'
+
+class _CheckoutStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_buckets = [0] * len(Config.DB_CHECKOUT_BUCKETS)
+        self.statement_timeouts = {}  # endpoint -> cancelled statements
+
+_stats = _CheckoutStats()
+_lock = threading.Lock()
+
+def record_checkout(wait, timed_out=False):
+    """Count one pool checkout and how long it waited for a connection"""
+    with _lock:
+        if timed_out:
+            _stats.timeouts += 1
+            return
+        _stats.checkouts += 1
+        _stats.wait_sum += wait
+        for index, bound in enumerate(Config.DB_CHECKOUT_BUCKETS):
+            if wait <= bound:
+                _stats.wait_buckets[index] += 1
+
+class _TimedCheckout:
+    """Pool mixin timing the wait for a connection (for NullPool, the time to open one)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            record_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        record_checkout(time.perf_counter() - started)
+        return connection
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+def engine_options(options, database_uri):
+    """Engine options for PostgreSQL with the timed pool classes and driver settings for the pool profile"""
+    if not database_uri.startswith('postgresql'):
+        return dict(options)
+
+    options = dict(options)
+    options['poolclass'] = TimedNullPool if options.get('poolclass') is NullPool else TimedQueuePool
+    if Config.DB_POOL_PROFILE == 'pgbouncer' and make_url(database_uri).get_dialect().driver == 'psycopg':
+        # psycopg 3 prepares repeated statements on the server, which breaks when PgBouncer
+        # hands the next transaction to another server connection
+        options['connect_args'] = dict(options.get('connect_args', {}), prepare_threshold=None)
+    return options
+
+def statement_timeout_ms():
+    """The statement timeout for the current request's endpoint, or for background work"""
+    if has_request_context():
+        return Config.STATEMENT_TIMEOUTS.get(request.endpoint, Config.DB_STATEMENT_TIMEOUT_MS)
+    return Config.DB_BACKGROUND_STATEMENT_TIMEOUT_MS
+
+def _set_statement_timeout(session, transaction, connection):
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(statement_timeout_ms())}")
+
+def _sqlstate(error):
+    # psycopg2 calls it pgcode, psycopg 3 sqlstate
+    return getattr(error.orig, 'sqlstate', None) or getattr(error.orig, 'pgcode', None)
+
+def _handle_operational_error(error):
+    if _sqlstate(error) != QUERY_CANCELED:
+        raise error
+    endpoint = request.endpoint or 'unknown'
+    with _lock:
+        _stats.statement_timeouts[endpoint] = _stats.statement_timeouts.get(endpoint, 0) + 1
+    logger.error(f"Statement timeout ({statement_timeout_ms()}ms) in {endpoint}")
+    db.session.rollback()
+    return jsonify({'error': 'The database took too long to answer, please try again'}), 503
+
+def install(app):
+    """Set statement timeouts on every transaction and answer cancelled statements with 503"""
+    if not event.contains(db.session, 'after_begin', _set_statement_timeout):
+        event.listen(db.session, 'after_begin', _set_statement_timeout)
+    app.register_error_handler(OperationalError, _handle_operational_error)
+
+def snapshot():
+    """Pool state and checkout metrics for this process"""
+    pool = db.engine.pool
+    with _lock:
+        stats = {
+            'pool': pool.__class__.__name__,
+            'checkouts': _stats.checkouts,
+            'checkout_timeouts': _stats.timeouts,
+            'checkout_wait': {
+                'sum': round(_stats.wait_sum, 6),
+                'count': _stats.checkouts,
+                # Cumulative counts, le = upper bound in seconds
+                'buckets': {str(bound): count for bound, count in zip(Config.DB_CHECKOUT_BUCKETS, _stats.wait_buckets)}
+            },
+            'statement_timeouts': dict(_stats.statement_timeouts)
+        }
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    return stats
+
+def prometheus_text():
+    """Pool metrics in the Prometheus text exposition format"""
+    labels = f'pid="{os.getpid()}"'
+    pool = db.engine.pool
+    with _lock:
+        lines = [
+            "# HELP db_pool_checkouts_total Connections handed out by the pool",
+            "# TYPE db_pool_checkouts_total counter",
+            f"db_pool_checkouts_total{{{labels}}} {_stats.checkouts}",
+            "# HELP db_pool_checkout_timeouts_total Checkouts that gave up waiting for a connection",
+            "# TYPE db_pool_checkout_timeouts_total counter",
+            f"db_pool_checkout_timeouts_total{{{labels}}} {_stats.timeouts}",
+            "# HELP db_pool_checkout_wait_seconds Time spent waiting for a pooled connection",
+            "# TYPE db_pool_checkout_wait_seconds histogram"
+        ]
+        for bound, count in zip(Config.DB_CHECKOUT_BUCKETS, _stats.wait_buckets):
+            lines.append(f'db_pool_checkout_wait_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'db_pool_checkout_wait_seconds_bucket{{{labels},le="+Inf"}} {_stats.checkouts}')
+        lines.append(f"db_pool_checkout_wait_seconds_sum{{{labels}}} {_stats.wait_sum}")
+        lines.append(f"db_pool_checkout_wait_seconds_count{{{labels}}} {_stats.checkouts}")
+        lines.append("# HELP db_statement_timeouts_total Statements cancelled by statement_timeout")
+        lines.append("# TYPE db_statement_timeouts_total counter")
+        for endpoint, count in sorted(_stats.statement_timeouts.items()):
+            lines.append(f'db_statement_timeouts_total{{endpoint="{endpoint}",{labels}}} {count}')
+    if isinstance(pool, QueuePool):
+        lines.append("# HELP db_pool_checked_out Connections currently checked out")
+        lines.append("# TYPE db_pool_checked_out gauge")
+        lines.append(f"db_pool_checked_out{{{labels}}} {pool.checkedout()}")
+    return '\n'.join(lines) + '\n'
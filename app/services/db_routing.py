@@ -0,0 +1,69 @@
+"""Route reads of read-only endpoints to replica databases.
+
+Replicas are the SQLALCHEMY_BINDS built from DATABASE_REPLICA_URLS. During a
+request to one of Config.REPLICA_ENDPOINTS, RoutingSession sends queries to a
+replica picked once per request; writes, flushes and every other endpoint use
+the primary. A commit that wrote anything stamps the user's Flask session, and
+for REPLICA_STICKY_SECONDS afterwards that user reads from the primary, so
+they never see a replica that hasn't caught up with their own change yet.
+
+This module doesn't import the app, so app/__init__ can pass RoutingSession
+to SQLAlchemy(session_options=...).
+"""
+from flask import g, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+from config import Config
+import random
+import time
+
+# Flask session key holding the time of the user's last committed write
+LAST_WRITE_KEY = 'db_last_write'
+
+def replica_keys():
+    """Bind keys of the configured replicas"""
+    return [key for key in Config.SQLALCHEMY_BINDS if key.startswith('replica_')]
+
+def recently_wrote():
+    """Whether the current user committed a write within the stickiness window"""
+    return time.time() - flask_session.get(LAST_WRITE_KEY, 0) < Config.REPLICA_STICKY_SECONDS
+
+def _request_replica():
+    # One replica per request, so a request never mixes snapshots from different replicas
+    if '_db_replica' not in g:
+        g._db_replica = random.choice(replica_keys())
+    return g._db_replica
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that reads from a replica during read-only endpoints"""
+
+    def _reads_from_replica(self, clause):
+        if not Config.SQLALCHEMY_BINDS or not has_request_context():
+            return False
+        if request.endpoint not in Config.REPLICA_ENDPOINTS:
+            return False
+        if self._flushing or isinstance(clause, UpdateBase) or self.new or self.dirty or self.deleted:
+            return False
+        return not recently_wrote()
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        # Only reroute what would go to the primary, not explicit binds or other bind keys
+        if bind is None and engine is self._db.engines.get(None) and self._reads_from_replica(clause):
+            return self._db.engines[_request_replica()]
+        return engine
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_write(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _start_sticky_window(session):
+    """Send the user's reads to the primary for a while after a committed write"""
+    if session.info.pop('wrote', False) and has_request_context() and Config.SQLALCHEMY_BINDS:
+        flask_session[LAST_WRITE_KEY] = time.time()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
@@ -1,8 +1,10 @@
+from concurrent.futures import wait, FIRST_COMPLETED
 import requests
-import openai
 from config import Config, ModelType
+from app.services import provider_health, local_nutrition, llm_metrics, openai_sdk
 import logging
 import re
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -155,27 +157,49 @@ class FoodCategory:
             }
 
     @staticmethod
-    def get_nutrition_info(food_name, model_type=None):
+    def get_nutrition_info(food_name, model_type):
         """Get comprehensive nutrition info using the specified model."""
+        nutrition, _ = FoodCategory.get_nutrition_info_with_tier(food_name, model_type)
+        return nutrition
+
+    @staticmethod
+    def get_nutrition_info_with_tier(food_name, model_type, on_event=None):
+        """Get nutrition info and the tier that served it.
+
+        Tiers, in order of preference:
+        - 'local': the bundled generic-foods table had the food (the only tier when the LOCAL model is selected)
+        - 'primary': the selected provider answered
+        - 'hedge': a fallback provider answered because the selected one was slow, failing or its circuit was open
+        - 'heuristic': no provider could answer (or we're overloaded), typical values for the food type are used
+
+        on_event, if given, is called with (stage, data) as the lookup progresses:
+        'cache_hit', 'model_call_started', 'parsed' and 'score'.
+        """
+        if on_event is None:
+            on_event = lambda stage, data: None
+
         try:
-            if model_type is None:
-                model_type = Config.CURRENT_MODEL
-            logger.info(f"\n=== Getting nutrition info for {food_name} using {model_type} ===")
+            logger.debug("Getting nutrition info for %s using %s", food_name, model_type)
             
-            # Update prompts to request additional nutritional information
-            if model_type == ModelType.FREE:
-                logger.info("Using Hugging Face model (free tier)")
-                nutrition = FoodCategory.huggingface_nutrition(food_name)
-            else:
-                if Config.OPENAI_API_KEY:
-                    logger.info(f"Using OpenAI model ({model_type.value})")
-                    nutrition = FoodCategory.openai_nutrition(food_name)
-                else:
-                    logger.info("No OpenAI API key found, falling back to Hugging Face")
-                    nutrition = FoodCategory.huggingface_nutrition(food_name)
+            nutrition, tier = None, None
+            if model_type == ModelType.LOCAL or Config.LOCAL_NUTRITION_FIRST:
+                nutrition = local_nutrition.lookup(food_name)
+                tier = 'local' if nutrition else None
+                if nutrition:
+                    llm_metrics.record_cache_hit('local', 'nutrition')
+                    on_event('cache_hit', {'source': 'local'})
+            
+            if nutrition is None and model_type != ModelType.LOCAL:
+                primary = FoodCategory._resolve_provider(model_type)
+                fallback = FoodCategory._resolve_provider(Config.PROVIDER_FALLBACKS.get(primary))
+                if fallback == primary:
+                    fallback = None
+                
+                nutrition, tier = FoodCategory._hedged_nutrition(food_name, primary, fallback, on_event)
             
             if nutrition:
-                logger.info(f"Successfully retrieved nutrition values: {nutrition}")
+                logger.debug("Retrieved nutrition values (%s): %s", tier, nutrition)
+                on_event('parsed', {'nutrition': dict(nutrition), 'tier': tier})
                 
                 # Convert calories to kJ if needed (1 kcal ≈ 4.184 kJ)
                 if 'calories' in nutrition and 'energy_kj' not in nutrition:
@@ -184,43 +208,138 @@ class FoodCategory:
                 # Calculate comprehensive Nutri-Score
                 nutri_score = FoodCategory.calculate_nutri_score(nutrition)
                 nutrition['nutri_score'] = nutri_score
-                logger.info(f"Calculated Nutri-Score: {nutri_score}")
-                return nutrition
+                logger.debug("Calculated Nutri-Score: %s", nutri_score)
+                on_event('score', {'nutri_score': nutri_score})
+                return nutrition, tier
                 
-            logger.info("Failed to get nutrition values, using defaults")
-            return {
-                'calories': 100,
-                'energy_kj': 418.4,
-                'protein': 5,
-                'carbs': 15,
-                'sugars': 5,
-                'fat': 5,
-                'saturated_fat': 2,
-                'sodium': 100,
-                'fiber': 2,
-                'fruits_veg_nuts': 0
-            }
+            logger.info("Failed to get nutrition values, using heuristic values", extra={'food': food_name})
+            llm_metrics.record_default_fallback(model_type.value, 'nutrition')
+            return FoodCategory.heuristic_nutrition(food_name), 'heuristic'
             
         except Exception as e:
             logger.error(f"Error in get_nutrition_info: {str(e)}")
-            return {
-                'calories': 100,
-                'energy_kj': 418.4,
-                'protein': 5,
-                'carbs': 15,
-                'sugars': 5,
-                'fat': 5,
-                'saturated_fat': 2,
-                'sodium': 100,
-                'fiber': 2,
-                'fruits_veg_nuts': 0
-            }
+            llm_metrics.record_default_fallback(getattr(model_type, 'value', 'unknown'), 'nutrition')
+            return FoodCategory.heuristic_nutrition(food_name), 'heuristic'
+
+    @staticmethod
+    def heuristic_nutrition(food_name):
+        """Typical nutrition values per 100g for the food's type"""
+        food_type = Config.get_food_type(food_name)
+        return dict(Config.HEURISTIC_NUTRITION.get(food_type, Config.HEURISTIC_NUTRITION['default']))
+
+    @staticmethod
+    def adjust_for_quantity(nutrition, quantity):
+        """Scale per-100g nutrition values to the given quantity"""
+        factor = quantity / 100.0
+        adjusted_nutrition = {k: round(v * factor, 1) for k, v in nutrition.items() if k != 'nutri_score'}
+        adjusted_nutrition['fruits_veg_nuts'] = nutrition['fruits_veg_nuts']  # Percentage stays the same
+        return adjusted_nutrition
+
+    @staticmethod
+    def ai_nutrition_result(nutrition, tier, quantity):
+        """Build the nutrition step's response for values that came from a model"""
+        return {
+            'nutrition': nutrition,  # Per 100g
+            'adjusted_nutrition': FoodCategory.adjust_for_quantity(nutrition, quantity),  # Adjusted for quantity
+            'nutri_score': nutrition.get('nutri_score', FoodCategory.calculate_nutri_score(nutrition)),
+            'source': 'ai',
+            'tier': tier,  # local, primary, hedge or heuristic
+            'from_reference': False
+        }
+
+    @staticmethod
+    def _resolve_provider(model_type):
+        """Map a requested model to the provider that will actually be called"""
+        if model_type is None:
+            return None
+        if model_type in (ModelType.GPT35, ModelType.GPT4) and not Config.OPENAI_API_KEY:
+            logger.info("No OpenAI API key found, falling back to Hugging Face")
+            return ModelType.FREE
+        return model_type
+
+    @staticmethod
+    def call_provider(food_name, model_type):
+        """Call a single provider and return parsed nutrition, or None"""
+        if model_type == ModelType.LOCAL:
+            return local_nutrition.lookup(food_name)
+        if model_type == ModelType.FREE:
+            logger.debug("Using Hugging Face model (free tier)")
+            return FoodCategory.huggingface_nutrition(food_name)
+        logger.debug("Using OpenAI model (%s)", model_type.value)
+        return FoodCategory.openai_nutrition(food_name, model=model_type.value)
+
+    @staticmethod
+    def _submit_provider_call(food_name, model_type):
+        """Run a provider call in the background, feeding its outcome to the provider's breaker.
+
+        Returns a future, or None if the circuit is open or there is no free call slot.
+        """
+        breaker = provider_health.get_breaker(model_type)
+        if not provider_health.try_acquire_slot():
+            logger.info("Too many provider calls in flight, skipping %s", model_type.value)
+            return None
+        if not breaker.allow_request():
+            logger.info("Circuit for %s is open, skipping", model_type.value)
+            provider_health.release_slot()
+            return None
+
+        def run():
+            started = time.monotonic()
+            nutrition = None
+            try:
+                nutrition = FoodCategory.call_provider(food_name, model_type)
+                return nutrition
+            except Exception as e:
+                logger.error(f"Error calling {model_type.value}: {str(e)}")
+                return None
+            finally:
+                breaker.record(time.monotonic() - started, nutrition is not None)
+                provider_health.release_slot()
+
+        return provider_health.get_executor().submit(llm_metrics.bind_context(run))
+
+    @staticmethod
+    def _hedged_nutrition(food_name, primary, fallback, on_event):
+        """Ask the primary provider, hedging with the fallback once the primary exceeds its p95.
+
+        Gives up after PROVIDER_LOOKUP_DEADLINE seconds, so the caller can fall back to the heuristic tier.
+        """
+        deadline = time.monotonic() + Config.PROVIDER_LOOKUP_DEADLINE
+        primary_future = FoodCategory._submit_provider_call(food_name, primary)
+        futures = {}
+        if primary_future is not None:
+            futures[primary_future] = 'primary'
+            on_event('model_call_started', {'provider': primary.value, 'role': 'primary'})
+            done, _ = wait([primary_future], timeout=provider_health.get_breaker(primary).hedge_delay())
+            if done and primary_future.result():
+                return primary_future.result(), 'primary'
+        
+        if fallback is not None:
+            logger.info("Hedging nutrition lookup for %s with %s", food_name, fallback.value)
+            fallback_future = FoodCategory._submit_provider_call(food_name, fallback)
+            if fallback_future is not None:
+                futures[fallback_future] = 'hedge'
+                on_event('model_call_started', {'provider': fallback.value, 'role': 'hedge'})
+        
+        # Take the first usable answer from whichever provider finishes
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            done, pending = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+            if not done:
+                logger.info("Nutrition lookup for %s passed its %ss deadline", food_name, Config.PROVIDER_LOOKUP_DEADLINE)
+                break
+            for future in done:
+                nutrition = future.result()
+                if nutrition:
+                    return nutrition, futures[future]
+        return None, None
 
     @staticmethod
     def parse_nutrition_values(result):
         """Parse nutrition values from API response, handling various formats."""
         try:
-            logger.info(f"Parsing nutrition values from: {result}")
+            logger.debug("Parsing nutrition values from: %s", result)
             
             # Initialize nutrition dict with all required fields
             nutrition = {
@@ -260,11 +379,11 @@ class FoodCategory:
                     # Estimate carbs (assuming they're mostly from sugars plus some complex carbs)
                     nutrition['carbs'] = round(nutrition['sugars'] * 1.2, 1)  # rough estimate
                     
-                    logger.info(f"Parsed nutrition values: {nutrition}")
+                    logger.debug("Parsed nutrition values: %s", nutrition)
                     
                     # Basic validation - check if we have reasonable numbers
                     if nutrition['calories'] < 1 or nutrition['calories'] > 1000:
-                        logger.info(f"Calories value seems unreasonable: {nutrition['calories']}")
+                        logger.info("Calories value seems unreasonable: %s", nutrition['calories'])
                         
                     # Reject results where all main nutrients are zero
                     if all(v == 0 for v in [nutrition['calories'], nutrition['protein'], nutrition['fat']]):
@@ -304,7 +423,7 @@ class FoodCategory:
                         # Estimate carbs
                         nutrition['carbs'] = round(nutrition['sugars'] * 1.2, 1)
                         
-                        logger.info(f"Parsed nutrition values using fallback method: {nutrition}")
+                        logger.debug("Parsed nutrition values using fallback method: %s", nutrition)
                         
                         # Basic validation
                         if all(v == 0 for v in [nutrition['calories'], nutrition['protein'], nutrition['fat']]):
@@ -316,7 +435,7 @@ class FoodCategory:
                         logger.error(f"Error parsing values with fallback method: {str(e)}")
                         return None
                 else:
-                    logger.info(f"Not enough values provided: expected 9, got {len(values)}")
+                    logger.info("Not enough values provided: expected 9, got %d", len(values))
                     return None
             
         except Exception as e:
@@ -327,33 +446,36 @@ class FoodCategory:
     def huggingface_nutrition(food_name):
         """Get nutrition info using Hugging Face API."""
         try:
-            logger.info(f"Getting nutrition info from Hugging Face for: {food_name}")
+            logger.debug("Getting nutrition info from Hugging Face for: %s", food_name)
             
             prompt = Config.HUGGINGFACE_NUTRITION_PROMPT.format(food_name=food_name)
-            logger.info(f"Prompt: {prompt}")
+            logger.debug("Prompt: %s", prompt)
             
             headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
             api_url = f"{Config.HUGGINGFACE_API_BASE_URL}/models/google/flan-t5-base"
             
-            response = requests.post(api_url, headers=headers, json={
-                "inputs": prompt,
-                "parameters": {
-                    "max_length": 150,
-                    "temperature": 0.2,
-                    "num_return_sequences": 1,
-                    "do_sample": True
-                }
-            })
+            with llm_metrics.track_call(ModelType.FREE.value, 'nutrition') as call:
+                response = requests.post(api_url, headers=headers, json={
+                    "inputs": prompt,
+                    "parameters": {
+                        "max_length": 150,
+                        "temperature": 0.2,
+                        "num_return_sequences": 1,
+                        "do_sample": True
+                    }
+                }, timeout=Config.PROVIDER_REQUEST_TIMEOUT)
+                call.error = response.status_code != 200
             
             if response.status_code == 200:
                 result = response.json()[0]["generated_text"]
-                logger.info(f"Raw response: {result}")
+                logger.debug("Raw response: %s", result)
                 
                 nutrition = FoodCategory.parse_nutrition_values(result)
                 if nutrition:
                     return nutrition
+                llm_metrics.record_parse_failure(ModelType.FREE.value, 'nutrition')
                     
-            logger.info(f"Failed to get valid nutrition values from Hugging Face")
+            logger.info("Failed to get valid nutrition values from Hugging Face")
             return None
             
         except Exception as e:
@@ -361,36 +483,40 @@ class FoodCategory:
             return None
 
     @staticmethod
-    def openai_nutrition(food_name):
+    def openai_nutrition(food_name, model="gpt-3.5-turbo"):
         """Get nutrition info using OpenAI API."""
         try:
-            logger.info(f"Getting nutrition info from OpenAI for: {food_name}")
+            logger.debug("Getting nutrition info from OpenAI for: %s", food_name)
             
             messages = [
                 {"role": "system", "content": Config.OPENAI_NUTRITION_SYSTEM_PROMPT},
                 {"role": "user", "content": Config.OPENAI_NUTRITION_PROMPT.format(food_name=food_name)}
             ]
-            logger.info(f"Messages: {messages}")
+            logger.debug("Messages: %s", messages)
             
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=Config.OPENAI_TEMPERATURE,
-                max_tokens=Config.OPENAI_MAX_TOKENS,
-                top_p=0.9,
-                frequency_penalty=0.0,
-                presence_penalty=0.0
-            )
+            with llm_metrics.track_call(model, 'nutrition') as call:
+                response = openai_sdk.openai().ChatCompletion.create(
+                    model=model,
+                    messages=messages,
+                    temperature=Config.OPENAI_TEMPERATURE,
+                    max_tokens=Config.OPENAI_MAX_TOKENS,
+                    top_p=0.9,
+                    frequency_penalty=0.0,
+                    presence_penalty=0.0,
+                    request_timeout=Config.PROVIDER_REQUEST_TIMEOUT
+                )
+                call.set_usage(response)
             
             if response.choices:
                 result = response.choices[0].message.content
-                logger.info(f"Raw response: {result}")
+                logger.debug("Raw response: %s", result)
                 
                 nutrition = FoodCategory.parse_nutrition_values(result)
                 if nutrition:
                     return nutrition
+                llm_metrics.record_parse_failure(model, 'nutrition')
                     
-            logger.info(f"Failed to get valid nutrition values from OpenAI")
+            logger.info("Failed to get valid nutrition values from OpenAI")
             return None
             
         except Exception as e:
@@ -0,0 +1,126 @@
+"""Keyword-based food type classification behind Config.get_food_type.
+
+The keyword dictionary (app/data/food_keywords.json) is compiled once into
+hash indexes over whole words: names are tokenized and each word (or run of
+words, for multi-word keywords) is looked up in a single pass, instead of one
+substring search per keyword. When a name matches keywords of several types,
+the type listed first in the dictionary wins.
+"""
+from functools import lru_cache
+from config import Config
+import json
+import logging
+import string
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Punctuation separates words: "chocolate-chip" -> "chocolate chip". A bytes table is
+# several times faster than str.translate, and utf-8 never uses ASCII bytes inside a character.
+_PUNCTUATION_TO_SPACE = bytes.maketrans(string.punctuation.encode(), b' ' * len(string.punctuation))
+
+def tokenize(food_name):
+    """Lowercase a name and split it into words"""
+    return food_name.lower().encode('utf-8').translate(_PUNCTUATION_TO_SPACE).decode('utf-8').split()
+
+def plural_forms(word):
+    """The word and its plural spellings"""
+    if word.endswith('y') and word[-2:-1] not in 'aeiou':
+        return [word, word[:-1] + 'ies']
+    return [word, word + 's', word + 'es']
+
+class FoodClassifier:
+    """Compiled keyword matcher mapping food names to food types"""
+
+    def __init__(self, keywords_by_type, default='default'):
+        """keywords_by_type is a list of (food_type, keywords) in priority order"""
+        self.default = default
+        self._priority = {}
+        self._phrases = {}  # tuple of words (last one in any plural spelling) -> food type
+        self._compounds = []  # (word ending, food type) for keywords with a leading *
+        for priority, (food_type, keywords) in enumerate(keywords_by_type):
+            self._priority[food_type] = priority
+            for keyword in keywords:
+                words = tokenize(keyword.lstrip('*'))
+                for last in plural_forms(words[-1]):
+                    self._phrases.setdefault(tuple(words[:-1]) + (last,), food_type)
+                    if keyword.startswith('*'):
+                        self._compounds.append((last, food_type))
+
+        # Single words are the common case, so they get their own index
+        self._words = {phrase[0]: food_type for phrase, food_type in self._phrases.items() if len(phrase) == 1}
+        self._phrase_starts = {phrase[0] for phrase in self._phrases if len(phrase) > 1}
+        self._longest_phrase = max(len(phrase) for phrase in self._phrases)
+        # Longest endings first, checked only when a word isn't a keyword itself
+        self._compounds.sort(key=lambda item: -len(item[0]))
+        self._compound_endings = tuple(ending for ending, _ in self._compounds)
+        self.classify = lru_cache(maxsize=4096)(self._classify)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls([(entry['type'], entry['keywords']) for entry in data['types']])
+
+    def _match_at(self, words, index):
+        """Match the longest keyword starting at words[index]; returns (food type, words used)"""
+        word = words[index]
+        if word in self._phrase_starts:
+            for length in range(min(self._longest_phrase, len(words) - index), 1, -1):
+                food_type = self._phrases.get(tuple(words[index:index + length]))
+                if food_type is not None:
+                    return food_type, length
+
+        food_type = self._words.get(word)
+        if food_type is None and word.endswith(self._compound_endings):
+            for ending, compound_type in self._compounds:
+                if word.endswith(ending):
+                    food_type = compound_type
+                    break
+        return food_type, 1
+
+    def _classify(self, food_name):
+        words = tokenize(food_name)
+        best = None
+        index = 0
+        while index < len(words):
+            food_type, used = self._match_at(words, index)
+            if food_type is not None and (best is None or self._priority[food_type] < self._priority[best]):
+                best = food_type
+                if self._priority[best] == 0:
+                    break
+            index += used
+        return best or self.default
+
+    def classify_many(self, food_names):
+        """Classify a batch of names, returning the types in the same order"""
+        # A per-batch memo is cheaper than the shared one for large one-off batches
+        food_types = {}
+        result = []
+        for food_name in food_names:
+            food_type = food_types.get(food_name)
+            if food_type is None:
+                food_type = food_types[food_name] = self._classify(food_name)
+            result.append(food_type)
+        return result
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier():
+    """Compile the configured keyword dictionary once per process"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = FoodClassifier.from_file(Config.FOOD_KEYWORDS_PATH)
+                logger.info(f"Compiled food classifier from {Config.FOOD_KEYWORDS_PATH}")
+    return _classifier
+
+def classify(food_name):
+    """Get the food type for a name"""
+    return get_classifier().classify(food_name)
+
+def classify_many(food_names):
+    """Get the food types for a batch of names"""
+    return get_classifier().classify_many(food_names)
@@ -0,0 +1,92 @@
+"""Streaming export of a user's food log as CSV or NDJSON.
+
+Rows are read through a server-side cursor (yield_per) as plain column tuples,
+so neither the ORM identity map nor the response body grows with the size of
+the history: memory stays constant whether the export has ten rows or ten
+years of them. Output is produced in chunks of about Config.EXPORT_CHUNK_BYTES,
+optionally gzip-compressed on the fly.
+"""
+from app import db
+from app.models.food import FoodEntry
+from app.services import json_provider
+from config import Config
+import csv
+import io
+import sqlalchemy as sa
+import zlib
+
+ENTRY_FIELDS = ('id', 'date', 'meal_type', 'name', 'brand', 'description', 'quantity')
+# Per-quantity values, as returned by FoodEntry.get_adjusted_nutrition
+NUTRITION_FIELDS = (
+    'calories', 'energy_kj', 'protein', 'carbs', 'sugars', 'fat', 'saturated_fat',
+    'sodium', 'fiber', 'fruits_veg_nuts', 'grade', 'numeric_score', 'simple_score'
+)
+# Columns get_adjusted_nutrition reads
+_SOURCE_COLUMNS = (
+    'calories', 'energy_kj', 'protein', 'carbs', 'sugars', 'fat', 'saturated_fat',
+    'sodium', 'fiber', 'fruits_veg_nuts', 'nutri_score', 'numeric_score', 'simple_score'
+)
+
+# Export format -> content type
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def iter_rows(user_id, start=None, end=None):
+    """Yield (entry fields, adjusted nutrition) for a user's entries in date order"""
+    query = sa.select(*[getattr(FoodEntry, name) for name in ENTRY_FIELDS + _SOURCE_COLUMNS]).where(FoodEntry.user_id == user_id)
+    if start:
+        query = query.where(FoodEntry.date >= start)
+    if end:
+        query = query.where(FoodEntry.date <= end)
+    query = query.order_by(FoodEntry.date, FoodEntry.id).execution_options(yield_per=Config.EXPORT_BATCH_SIZE)
+
+    for row in db.session.execute(query):
+        # get_adjusted_nutrition only reads columns, so a result row can stand in for the entry
+        yield row, FoodEntry.get_adjusted_nutrition(row)
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ENTRY_FIELDS + NUTRITION_FIELDS)
+    for row, nutrition in rows:
+        writer.writerow(
+            [getattr(row, field) for field in ENTRY_FIELDS]
+            + [nutrition[field] for field in NUTRITION_FIELDS]
+        )
+        if buffer.tell() >= Config.EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson_lines(rows):
+    lines = []
+    size = 0
+    for row, nutrition in rows:
+        record = {field: getattr(row, field) for field in ENTRY_FIELDS}
+        record['date'] = row.date.isoformat()
+        record['nutrition'] = nutrition
+        line = json_provider.dumps(record) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= Config.EXPORT_CHUNK_BYTES:
+            yield ''.join(lines)
+            lines = []
+            size = 0
+    yield ''.join(lines)
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 writes a gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_chunks(user_id, file_format, start=None, end=None, compress=False):
+    """Generate the export body as bytes chunks"""
+    lines = _csv_lines if file_format == 'csv' else _ndjson_lines
+    chunks = (chunk.encode('utf-8') for chunk in lines(iter_rows(user_id, start, end)) if chunk)
+    return _gzip(chunks) if compress else chunks
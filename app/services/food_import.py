@@ -0,0 +1,327 @@
+"""Bulk import of food log history exported from other trackers.
+
+Uploads are parsed as a stream (CSV, JSON Lines or a JSON array) and handled
+in batches of Config.IMPORT_BATCH_SIZE rows: the batch's food references are
+resolved with one query, each distinct nutrition profile is scored once, and
+the entries are written with PostgreSQL COPY (a multi-row INSERT on other
+databases) and committed together.
+
+Rows give a name, date and quantity in grams, plus either per-100g nutrition
+columns or the name of a food reference the user can see. Rows without either
+are skipped rather than sent to a model, so imports never wait on an API.
+
+Run an import from the command line with:
+    python import_food_log.py --user alice history.csv
+"""
+from collections import namedtuple
+from datetime import date, datetime
+from app import db
+from app.models.food import FoodEntry, FoodReference
+from app.services import json_provider, partitions
+from app.services.food_category import FoodCategory
+from app.utils.text import normalize_food_name
+from config import Config
+import csv
+import io
+import json
+import logging
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+NUTRITION_FIELDS = (
+    'calories', 'energy_kj', 'protein', 'carbs', 'sugars', 'fat',
+    'saturated_fat', 'sodium', 'fiber', 'fruits_veg_nuts'
+)
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner', 'snack', 'tea')
+
+# Column order used for COPY and the multi-row INSERT
+ENTRY_COLUMNS = (
+    'name', 'brand', 'description', 'meal_type', 'date', 'quantity', 'user_id'
+) + NUTRITION_FIELDS + ('nutri_score', 'numeric_score', 'simple_score')
+
+ImportRow = namedtuple('ImportRow', ['line', 'name', 'brand', 'description', 'meal_type', 'date', 'quantity', 'nutrition'])
+
+class ImportStats:
+    """Running totals of an import, passed to the progress callback after each batch"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.skipped = 0
+        self.batches = 0
+        self.errors = []  # (line, reason) for the first Config.IMPORT_MAX_REPORTED_ERRORS skipped rows
+
+    def skip(self, line, reason):
+        self.skipped += 1
+        if len(self.errors) < Config.IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': reason})
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'batches': self.batches,
+            'errors': self.errors
+        }
+
+def detect_format(filename, declared=None):
+    """Pick the parser for an upload from an explicit format or the file extension"""
+    if declared:
+        return declared.lower()
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return 'json' if extension == 'json' else 'csv'
+
+def iter_records(stream, file_format):
+    """Yield (line, record dict) from a binary stream without reading it all into memory"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+    elif file_format == 'ndjson':
+        for line, raw in enumerate(text, start=1):
+            if raw.strip():
+                yield line, json_provider.loads(raw)
+    elif file_format == 'json':
+        yield from enumerate(_iter_json_array(text), start=1)
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+def _iter_json_array(text, chunk_size=65536):
+    """Decode the objects of a top-level JSON array one at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+    while True:
+        # Skip whitespace, the opening bracket and separators
+        while position < len(buffer):
+            char = buffer[position]
+            if char.isspace() or (started and char == ','):
+                position += 1
+            elif not started and char == '[':
+                started = True
+                position += 1
+            else:
+                break
+
+        if position < len(buffer):
+            if not started:
+                raise ValueError("JSON imports must be an array of objects")
+            if buffer[position] == ']':
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+                yield record
+                continue
+            except json.JSONDecodeError:
+                # Most likely an object cut off at the end of the chunk
+                if eof:
+                    raise
+        elif eof:
+            if started:
+                raise ValueError("JSON import ended before the closing bracket")
+            return
+
+        chunk = text.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    # Accept plain dates and timestamps such as 2021-03-04T08:15:00
+    return datetime.strptime(str(value).strip()[:10], '%Y-%m-%d').date()
+
+def _parse_nutrition(record):
+    """Per-100g nutrition from a record, or None if it has no calories column"""
+    source = record.get('nutrition') if isinstance(record.get('nutrition'), dict) else record
+    if source.get('calories') in (None, ''):
+        return None
+    nutrition = {field: float(source.get(field) or 0) for field in NUTRITION_FIELDS}
+    if not nutrition['energy_kj']:
+        nutrition['energy_kj'] = round(nutrition['calories'] * 4.184, 1)
+    return nutrition
+
+def parse_row(line, record):
+    """Validate one record, returning an ImportRow; raises ValueError with the reason"""
+    name = (record.get('name') or record.get('food') or '').strip()
+    if not name:
+        raise ValueError("missing name")
+    meal_type = (record.get('meal_type') or 'snack').strip().lower()
+    if meal_type not in MEAL_TYPES:
+        meal_type = 'snack'
+    quantity = float(record.get('quantity') or 100)
+    if quantity <= 0:
+        raise ValueError("quantity must be positive")
+    return ImportRow(
+        line=line,
+        name=name[:100],
+        brand=(record.get('brand') or '').strip()[:100],
+        description=(record.get('description') or '').strip()[:200],
+        meal_type=meal_type,
+        date=_parse_date(record.get('date') or ''),
+        quantity=int(round(quantity)),
+        nutrition=_parse_nutrition(record)
+    )
+
+def resolve_references(rows, user_id):
+    """Map (normalized name, brand) to the visible reference for every batch row without nutrition, in one query"""
+    names = {normalize_food_name(row.name) for row in rows if row.nutrition is None}
+    if not names:
+        return {}
+
+    references = db.session.execute(
+        sa.select(FoodReference)
+        .where(
+            sa.func.lower(FoodReference.name).in_(names),
+            sa.or_(FoodReference.is_shared == True, FoodReference.creator_id == user_id)
+        )
+        # The user's own references win over shared ones
+        .order_by(sa.case((FoodReference.creator_id == user_id, 0), else_=1), FoodReference.id)
+    ).scalars()
+
+    by_name = {}
+    for reference in references:
+        by_name.setdefault(normalize_food_name(reference.name), []).append(reference)
+
+    resolved = {}
+    for row in rows:
+        if row.nutrition is not None:
+            continue
+        key = (normalize_food_name(row.name), row.brand.lower())
+        if key in resolved:
+            continue
+        candidates = by_name.get(key[0])
+        if candidates:
+            # Prefer a brand match, falling back to the name alone like FoodReference.find_for_user
+            resolved[key] = next((ref for ref in candidates if ref.brand.lower() == key[1]), candidates[0])
+    return resolved
+
+class _ScoreCache:
+    """Nutri-Scores of the nutrition profiles seen so far in an import"""
+
+    def __init__(self):
+        self._scores = {}
+
+    def score(self, nutrition):
+        key = tuple(nutrition[field] for field in NUTRITION_FIELDS)
+        nutri_score = self._scores.get(key)
+        if nutri_score is None:
+            nutri_score = self._scores[key] = FoodCategory.calculate_nutri_score(nutrition)
+        return nutri_score
+
+def build_entries(rows, user_id, references, scores, stats):
+    """Turn a batch of rows into column tuples in ENTRY_COLUMNS order"""
+    entries = []
+    for row in rows:
+        if row.nutrition is not None:
+            nutrition = row.nutrition
+            nutri_score = scores.score(nutrition)
+        else:
+            reference = references.get((normalize_food_name(row.name), row.brand.lower()))
+            if reference is None:
+                stats.skip(row.line, f"no nutrition values and no food reference named {row.name!r}")
+                continue
+            nutrition = reference.nutrition_dict()
+            nutri_score = reference.nutri_score_dict()
+        entries.append(
+            (row.name, row.brand or None, row.description or None, row.meal_type, row.date, row.quantity, user_id)
+            + tuple(nutrition[field] for field in NUTRITION_FIELDS)
+            + (nutri_score['grade'], nutri_score['score'], nutri_score['simple_score'])
+        )
+    return entries
+
+def _copy_entries(connection, entries):
+    """Write entries with PostgreSQL COPY ... FROM STDIN"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for entry in entries:
+        # COPY's CSV format reads an unquoted empty field as NULL
+        writer.writerow(['' if value is None else value for value in entry])
+    buffer.seek(0)
+
+    sql = f'COPY "{FoodEntry.__table__.name}" ({", ".join(ENTRY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)'
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):
+            # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3, with a postgresql+psycopg:// DATABASE_URL
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+def _insert_entries(connection, entries):
+    """Write entries with a multi-row INSERT"""
+    connection.execute(
+        sa.insert(FoodEntry.__table__),
+        [dict(zip(ENTRY_COLUMNS, entry)) for entry in entries]
+    )
+
+def write_entries(entries):
+    """Write a batch of entries in the current transaction"""
+    if not entries:
+        return
+    connection = db.session.connection()
+    # Old histories get their monthly partitions instead of piling up in the default one
+    partitions.ensure_partitions(connection, {entry[ENTRY_COLUMNS.index('date')] for entry in entries})
+    if connection.dialect.name == 'postgresql' and Config.IMPORT_USE_COPY:
+        _copy_entries(connection, entries)
+    else:
+        _insert_entries(connection, entries)
+
+def iter_import(stream, file_format, user_id):
+    """Import a food log upload for a user, yielding the running ImportStats after each batch.
+
+    Each batch is committed on its own, so a failure part-way keeps the
+    batches already written and reports where it stopped.
+    """
+    stats = ImportStats()
+    scores = _ScoreCache()
+    batch = []
+
+    def flush():
+        references = resolve_references(batch, user_id)
+        entries = build_entries(batch, user_id, references, scores, stats)
+        write_entries(entries)
+        db.session.commit()
+        stats.imported += len(entries)
+        stats.batches += 1
+        batch.clear()
+
+    try:
+        for line, record in iter_records(stream, file_format):
+            stats.rows += 1
+            try:
+                batch.append(parse_row(line, record))
+            except (ValueError, TypeError, AttributeError) as e:
+                stats.skip(line, str(e))
+            if len(batch) >= Config.IMPORT_BATCH_SIZE:
+                flush()
+                yield stats
+        if batch or not stats.batches:
+            flush()
+            yield stats
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Food log import for user %s stopped after %s entries: %s", user_id, stats.imported, e)
+        raise
+
+    logger.info("Imported %s of %s food log rows for user %s", stats.imported, stats.rows, user_id)
+
+def import_food_log(stream, file_format, user_id, on_progress=None):
+    """Import a food log upload for a user, calling on_progress after each batch; returns the ImportStats"""
+    stats = None
+    for stats in iter_import(stream, file_format, user_id):
+        if on_progress:
+            on_progress(stats)
+    return stats
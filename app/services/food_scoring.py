@@ -6,8 +6,12 @@ logger = logging.getLogger(__name__)
 
 def calculate_period_score(entries):
     """Calculate nutrition score for a period (day/week/month) based on food entries."""
+    return jsonify(period_score(entries))
+
+def period_score(entries):
+    """The score data calculate_period_score responds with, for roll-ups that build on it"""
     if not entries:
-        return jsonify({
+        return {
             'score': 0,
             'simple_score': 50,
             'grade': 'C',
@@ -24,13 +28,13 @@ def calculate_period_score(entries):
                 'fiber': 0,
                 'fruits_veg_nuts': 0
             }
-        })
+        }
     
     # If there's only one entry, return its score directly
     if len(entries) == 1:
         entry = entries[0]
         nutrition = entry.get_adjusted_nutrition()
-        return jsonify({
+        return {
             'score': entry.numeric_score,
             'simple_score': entry.simple_score,
             'grade': entry.nutri_score,
@@ -56,7 +60,7 @@ def calculate_period_score(entries):
                 'fiber': nutrition['fiber'],
                 'fruits_veg_nuts': nutrition['fruits_veg_nuts']
             }
-        })
+        }
     
     # For multiple entries, calculate weighted average
     daily_nutrition = {
@@ -110,10 +114,10 @@ def calculate_period_score(entries):
     # Calculate Nutri-Score based on total nutrition
     nutri_score = FoodCategory.calculate_nutri_score(daily_nutrition)
     
-    return jsonify({
+    return {
         'score': nutri_score['score'],
         'simple_score': nutri_score['simple_score'],
         'grade': nutri_score['grade'],
         'entries': entries_data,
         'daily_nutrition': daily_nutrition
-    }) 
\ No newline at end of file
+    } 
\ No newline at end of file
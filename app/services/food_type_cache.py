@@ -0,0 +1,146 @@
+"""Cache of resolved (food_type, unit, weight_per_unit) keyed by normalized food name.
+
+Answers to the food-type prompt are stored in the food_type_cache table, so a
+food is only ever sent to the model once. An in-process LRU sits in front of
+the table because the front-end asks for the food type as the user types.
+
+The release step (setup_db.py) seeds the table from the existing food
+references; to do it by hand, run:
+    python -m app.services.food_type_cache
+"""
+from collections import OrderedDict, namedtuple
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.food import FoodReference
+from app.models.food_type import FoodTypeCache
+from app.services import llm_metrics, food_classifier
+from app.utils.text import normalize_food_name
+from config import Config
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+FoodTypeEntry = namedtuple('FoodTypeEntry', ['food_type', 'unit', 'weight_per_unit', 'suggested_quantity'])
+
+class LRUCache:
+    """Small thread-safe least-recently-used map"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+_lru = LRUCache(Config.FOOD_TYPE_CACHE_SIZE)
+
+def _entry(row):
+    return FoodTypeEntry(row.food_type, row.unit, row.weight_per_unit, row.suggested_quantity)
+
+def get(food_name, prompt_kind='food_type', need_weight=False):
+    """Get the cached food type for a name, or None if the model hasn't been asked yet.
+
+    With need_weight, entries without a unit weight count as a miss; an
+    in-process one is re-read first in case another worker has completed it.
+    """
+    key = normalize_food_name(food_name)
+    if not key:
+        return None
+
+    entry = _lru.get(key)
+    if entry is None or (need_weight and entry.weight_per_unit is None):
+        row = db.session.get(FoodTypeCache, key)
+        if row is None:
+            return None
+        entry = _entry(row)
+        _lru.put(key, entry)
+    if need_weight and entry.weight_per_unit is None:
+        return None
+
+    llm_metrics.record_cache_hit('food_type_cache', prompt_kind)
+    return entry
+
+def put(food_name, food_type, unit, weight_per_unit, suggested_quantity=None, source='model'):
+    """Store a resolved food type. An existing entry is kept, only filling in values it was missing.
+
+    The row is flushed in a savepoint; committing it is left to the caller's transaction.
+    """
+    key = normalize_food_name(food_name)
+    if not key:
+        return
+    try:
+        with db.session.begin_nested():
+            row = db.session.get(FoodTypeCache, key)
+            if row is None:
+                row = FoodTypeCache(
+                    name=key,
+                    food_type=food_type.strip(),
+                    unit=(unit or 'g').strip(),
+                    weight_per_unit=weight_per_unit,
+                    suggested_quantity=suggested_quantity,
+                    source=source
+                )
+                db.session.add(row)
+            else:
+                # The food-type prompt may not give a weight; a later serving-size answer completes the entry
+                if row.weight_per_unit is None:
+                    row.weight_per_unit = weight_per_unit
+                if row.suggested_quantity is None:
+                    row.suggested_quantity = suggested_quantity
+        _lru.put(key, _entry(row))
+    except IntegrityError:
+        # Another worker stored it first; only the savepoint was rolled back
+        pass
+    except Exception as e:
+        logger.error(f"Error caching food type for {food_name}: {str(e)}")
+
+def populate_from_references():
+    """Seed the cache from food references that have a known serving unit"""
+    existing = set(db.session.execute(db.select(FoodTypeCache.name)).scalars())
+    added = 0
+    references = db.session.execute(
+        db.select(FoodReference.name, FoodReference.last_used_unit, FoodReference.weight_per_unit)
+        .where(FoodReference.last_used_unit.isnot(None))
+    )
+    rows = references.all()
+    food_types = food_classifier.classify_many([name for name, _, _ in rows])
+    for (name, unit, weight_per_unit), food_type in zip(rows, food_types):
+        key = normalize_food_name(name)
+        if not key or key in existing:
+            continue
+        existing.add(key)
+        db.session.add(FoodTypeCache(
+            name=key,
+            food_type=food_type,
+            unit=unit,
+            weight_per_unit=weight_per_unit,
+            source='reference'
+        ))
+        added += 1
+    db.session.commit()
+    logger.info(f"Added {added} food references to the food type cache")
+    return added
+
+if __name__ == '__main__':
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO)
+    with create_app().app_context():
+        populate_from_references()
@@ -0,0 +1,115 @@
+"""Fast JSON for Flask, and MessagePack for clients that ask for it.
+
+FastJSONProvider replaces Flask's default provider, so jsonify and
+request.get_json use orjson when it is installed and JSON_SERIALIZER is
+orjson, falling back to the standard library otherwise. Output matches the
+stdlib provider's: keys are sorted and dates, decimals and the like go
+through Flask's usual conversions.
+
+With msgpack installed, responses to requests whose Accept header prefers
+application/msgpack over application/json are sent as MessagePack.
+dumps() and loads() give the same fast path to code that works outside a
+request, like the export and import streams.
+"""
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from config import Config
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+# Accept header values treated as asking for MessagePack
+MSGPACK_MIMETYPES = [MSGPACK_MIMETYPE, 'application/x-msgpack']
+
+def _orjson():
+    if Config.JSON_SERIALIZER != 'orjson':
+        return None
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def _msgpack():
+    if not Config.MSGPACK_ENABLED:
+        return None
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+_fast = _orjson()
+
+def _orjson_options(orjson, sort_keys):
+    # Hand dates and dataclasses to the default hook, so they serialize like they do with the stdlib
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+    return option | orjson.OPT_SORT_KEYS if sort_keys else option
+
+def dumps(obj, default=None):
+    """Compact JSON for a plain value; default converts anything JSON has no type for"""
+    if _fast is not None:
+        try:
+            return _fast.dumps(obj, default=default, option=_orjson_options(_fast, False)).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, default=default, separators=(',', ':'))
+
+def loads(data):
+    """Parse JSON from str or bytes"""
+    if _fast is not None:
+        return _fast.loads(data)
+    return json.loads(data)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with MessagePack negotiation"""
+    def __init__(self, app):
+        super().__init__(app)
+        self._orjson = _orjson()
+        self._msgpack = _msgpack()
+
+    def _encode(self, obj):
+        """JSON bytes, from orjson when it can encode the value"""
+        if self._orjson is not None:
+            try:
+                return self._orjson.dumps(obj, default=self.default, option=_orjson_options(self._orjson, self.sort_keys))
+            except TypeError:
+                # Integers beyond 64 bits and the like; the stdlib handles them or raises the usual error
+                pass
+        return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or self._orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or self._orjson is None:
+            return super().loads(s, **kwargs)
+        return self._orjson.loads(s)
+
+    def _wants_msgpack(self):
+        return (self._msgpack is not None and has_request_context()
+                and request.accept_mimetypes.best_match([self.mimetype, *MSGPACK_MIMETYPES]) in MSGPACK_MIMETYPES)
+
+    def response(self, *args, **kwargs):
+        if self._wants_msgpack():
+            obj = self._prepare_response_obj(args, kwargs)
+            response = self._app.response_class(self._msgpack.packb(obj, default=self.default), mimetype=MSGPACK_MIMETYPE)
+        elif self._orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            # Indented output for debugging comes from the stdlib
+            response = super().response(*args, **kwargs)
+        else:
+            obj = self._prepare_response_obj(args, kwargs)
+            response = self._app.response_class(self._encode(obj) + b'\n', mimetype=self.mimetype)
+        if self._msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+def install(app):
+    """Use FastJSONProvider for jsonify and request parsing"""
+    app.json = FastJSONProvider(app)
+    logger.info(f"JSON provider: {'orjson' if app.json._orjson else 'stdlib'}"
+                + (", MessagePack on request" if app.json._msgpack else ""))
@@ -0,0 +1,197 @@
+"""In-process metrics for model calls.
+
+Every call to a model provider records its latency, token usage and
+estimated cost, labeled by provider, prompt kind (nutrition, food_type,
+serving_size) and the endpoint that triggered it. Parse failures, default
+fallbacks and cache hits are counted with the same labels.
+
+Metrics are kept per process; with several gunicorn workers each worker
+reports its own numbers (the pid is included so scrapes can be summed).
+"""
+from contextlib import contextmanager
+from flask import has_request_context, request
+from config import Config
+import contextvars
+import os
+import threading
+import time
+
+_endpoint = contextvars.ContextVar('llm_metrics_endpoint', default=None)
+
+class _Series:
+    """Counters and a latency histogram for one label set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.parse_failures = 0
+        self.default_fallbacks = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * len(Config.LLM_LATENCY_BUCKETS)
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'parse_failures': self.parse_failures,
+            'parse_failure_rate': round(self.parse_failures / self.calls, 4) if self.calls else 0.0,
+            'default_fallbacks': self.default_fallbacks,
+            'cache_hits': self.cache_hits,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost_usd': round(self.cost_usd, 6),
+            'latency': {
+                'sum': round(self.latency_sum, 4),
+                'count': self.calls,
+                # Cumulative counts, le = upper bound in seconds
+                'buckets': {str(bound): count for bound, count in zip(Config.LLM_LATENCY_BUCKETS, self.latency_buckets)}
+            }
+        }
+
+_series = {}
+_lock = threading.Lock()
+
+def current_endpoint():
+    """The endpoint to attribute calls to: an explicit scope, the Flask endpoint, or 'background'"""
+    endpoint = _endpoint.get()
+    if endpoint:
+        return endpoint
+    if has_request_context() and request.endpoint:
+        return request.endpoint
+    return 'background'
+
+@contextmanager
+def endpoint_scope(endpoint):
+    """Attribute model calls made inside the block to the given endpoint"""
+    token = _endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        _endpoint.reset(token)
+
+def bind_context(fn):
+    """Wrap fn so it runs with the caller's endpoint label when handed to another thread"""
+    endpoint = current_endpoint()
+
+    def run(*args, **kwargs):
+        with endpoint_scope(endpoint):
+            return fn(*args, **kwargs)
+    return run
+
+def _get_series(provider, prompt_kind, endpoint):
+    key = (provider, prompt_kind, endpoint or current_endpoint())
+    series = _series.get(key)
+    if series is None:
+        series = _series.setdefault(key, _Series())
+    return series
+
+def estimate_cost(provider, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a call from Config.LLM_PRICING (per 1K tokens)"""
+    prompt_price, completion_price = Config.LLM_PRICING.get(provider, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+def token_usage(response):
+    """Prompt and completion token counts from an OpenAI response"""
+    usage = response.get('usage') or {}
+    return usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)
+
+class _Call:
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.error = False
+
+    def set_usage(self, response):
+        self.prompt_tokens, self.completion_tokens = token_usage(response)
+
+@contextmanager
+def track_call(provider, prompt_kind):
+    """Time a provider call; set token usage on the yielded object with set_usage(response)"""
+    call = _Call()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.error = True
+        raise
+    finally:
+        latency = time.perf_counter() - started
+        with _lock:
+            series = _get_series(provider, prompt_kind, None)
+            series.calls += 1
+            series.errors += int(call.error)
+            series.prompt_tokens += call.prompt_tokens
+            series.completion_tokens += call.completion_tokens
+            series.cost_usd += estimate_cost(provider, call.prompt_tokens, call.completion_tokens)
+            series.latency_sum += latency
+            for index, bound in enumerate(Config.LLM_LATENCY_BUCKETS):
+                if latency <= bound:
+                    series.latency_buckets[index] += 1
+
+def _increment(field, provider, prompt_kind):
+    with _lock:
+        series = _get_series(provider, prompt_kind, None)
+        setattr(series, field, getattr(series, field) + 1)
+
+def record_parse_failure(provider, prompt_kind):
+    """A provider answered but the response couldn't be parsed"""
+    _increment('parse_failures', provider, prompt_kind)
+
+def record_default_fallback(provider, prompt_kind):
+    """Default or keyword-based values were used instead of a model answer"""
+    _increment('default_fallbacks', provider, prompt_kind)
+
+def record_cache_hit(source, prompt_kind):
+    """A lookup was answered without calling a model (source: local, prefetch, ...)"""
+    _increment('cache_hits', source, prompt_kind)
+
+def snapshot():
+    """All series as a list of dicts"""
+    with _lock:
+        return [
+            dict(provider=provider, prompt_kind=prompt_kind, endpoint=endpoint, **series.to_dict())
+            for (provider, prompt_kind, endpoint), series in sorted(_series.items())
+        ]
+
+def prometheus_text():
+    """All series in the Prometheus text exposition format"""
+    pid = os.getpid()
+    counters = [
+        ('llm_calls_total', 'calls', 'Model calls'),
+        ('llm_errors_total', 'errors', 'Model calls that raised'),
+        ('llm_parse_failures_total', 'parse_failures', 'Responses that could not be parsed'),
+        ('llm_default_fallbacks_total', 'default_fallbacks', 'Lookups answered with default values'),
+        ('llm_cache_hits_total', 'cache_hits', 'Lookups answered without a model call'),
+        ('llm_prompt_tokens_total', 'prompt_tokens', 'Prompt tokens sent'),
+        ('llm_completion_tokens_total', 'completion_tokens', 'Completion tokens received'),
+        ('llm_cost_usd_total', 'cost_usd', 'Estimated cost in USD')
+    ]
+    with _lock:
+        items = sorted(_series.items())
+        lines = []
+        for name, field, help_text in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (provider, prompt_kind, endpoint), series in items:
+                labels = f'provider="{provider}",prompt_kind="{prompt_kind}",endpoint="{endpoint}",pid="{pid}"'
+                lines.append(f"{name}{{{labels}}} {getattr(series, field)}")
+
+        lines.append("# HELP llm_latency_seconds Model call latency")
+        lines.append("# TYPE llm_latency_seconds histogram")
+        for (provider, prompt_kind, endpoint), series in items:
+            labels = f'provider="{provider}",prompt_kind="{prompt_kind}",endpoint="{endpoint}",pid="{pid}"'
+            for bound, count in zip(Config.LLM_LATENCY_BUCKETS, series.latency_buckets):
+                lines.append(f'llm_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'llm_latency_seconds_bucket{{{labels},le="+Inf"}} {series.calls}')
+            lines.append(f"llm_latency_seconds_sum{{{labels}}} {series.latency_sum}")
+            lines.append(f"llm_latency_seconds_count{{{labels}}} {series.calls}")
+    return '\n'.join(lines) + '\n'
+
+def reset():
+    """Clear all recorded metrics"""
+    with _lock:
+        _series.clear()
@@ -0,0 +1,182 @@
+"""Offline nutrition lookups from the bundled generic-foods table.
+
+The table is built from app/data/generic_foods.csv into a compact binary
+columnar file that is memory-mapped read-only, so every gunicorn worker
+shares the same page-cache pages instead of holding its own copy.
+
+File layout (little-endian):
+    header      magic b'FNUT', uint16 version, uint16 column count, uint32 row count
+    columns     uint32 length + comma-separated column names (utf-8)
+    offsets     uint32[rows + 1] offsets of each name in the names blob
+    names       normalized food names, sorted, utf-8
+    values      float32[rows] per column, column after column
+
+Rebuild the binary file after editing the CSV with:
+    python -m app.services.local_nutrition
+"""
+from app.utils.text import normalize_food_name
+from config import Config
+import csv
+import logging
+import mmap
+import os
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'FNUT'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+UINT32 = struct.Struct('<I')
+FLOAT32 = struct.Struct('<f')
+
+NUTRITION_COLUMNS = [
+    'calories', 'energy_kj', 'protein', 'carbs', 'sugars', 'fat',
+    'saturated_fat', 'sodium', 'fiber', 'fruits_veg_nuts'
+]
+
+def _pad4(buffer):
+    buffer.extend(b'\0' * (-len(buffer) % 4))
+
+def build_table(csv_path, out_path):
+    """Compile the generic-foods CSV into the binary table format"""
+    rows = {}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name = normalize_food_name(row['name'])
+            rows[name] = [float(row[column] or 0) for column in NUTRITION_COLUMNS]
+
+    names = sorted(rows)
+    buffer = bytearray(HEADER.pack(MAGIC, VERSION, len(NUTRITION_COLUMNS), len(names)))
+    column_names = ','.join(NUTRITION_COLUMNS).encode('utf-8')
+    buffer += UINT32.pack(len(column_names)) + column_names
+    _pad4(buffer)
+
+    encoded = [name.encode('utf-8') for name in names]
+    offset = 0
+    for name in encoded:
+        buffer += UINT32.pack(offset)
+        offset += len(name)
+    buffer += UINT32.pack(offset)
+    for name in encoded:
+        buffer += name
+    _pad4(buffer)
+
+    for index in range(len(NUTRITION_COLUMNS)):
+        for name in names:
+            buffer += FLOAT32.pack(rows[name][index])
+
+    with open(out_path, 'wb') as f:
+        f.write(buffer)
+    logger.info(f"Built local nutrition table with {len(names)} foods at {out_path}")
+    return len(names)
+
+class LocalNutritionTable:
+    """Read-only view over a memory-mapped nutrition table"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, column_count, self.rows = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} nutrition table: {path}")
+
+        position = HEADER.size
+        (length,) = UINT32.unpack_from(self._mm, position)
+        position += UINT32.size
+        self.columns = self._mm[position:position + length].decode('utf-8').split(',')
+        if len(self.columns) != column_count:
+            raise ValueError(f"Corrupt nutrition table header: {path}")
+        position += length
+        position += -position % 4
+
+        self._offsets_start = position
+        self._names_start = position + UINT32.size * (self.rows + 1)
+        (names_length,) = UINT32.unpack_from(self._mm, self._offsets_start + UINT32.size * self.rows)
+        position = self._names_start + names_length
+        self._values_start = position + (-position % 4)
+
+    def __len__(self):
+        return self.rows
+
+    def _name_at(self, index):
+        start, end = struct.unpack_from('<II', self._mm, self._offsets_start + UINT32.size * index)
+        return self._mm[self._names_start + start:self._names_start + end].decode('utf-8')
+
+    def _find(self, name):
+        """Binary search the sorted names for an exact match"""
+        low, high = 0, self.rows
+        while low < high:
+            middle = (low + high) // 2
+            current = self._name_at(middle)
+            if current == name:
+                return middle
+            if current < name:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _row(self, index):
+        nutrition = {}
+        for column_index, column in enumerate(self.columns):
+            position = self._values_start + FLOAT32.size * (column_index * self.rows + index)
+            nutrition[column] = round(FLOAT32.unpack_from(self._mm, position)[0], 1)
+        return nutrition
+
+    @staticmethod
+    def _candidates(food_name):
+        """Names to try for a food, most specific first"""
+        name = normalize_food_name(food_name)
+        candidates = [name]
+        # Drop a trailing free-text description: "scrambled eggs (2 eggs)" -> "scrambled eggs"
+        if ' (' in name:
+            candidates.append(name.split(' (', 1)[0].strip())
+        # Try simple singular forms, the table stores singular names
+        for candidate in list(candidates):
+            if candidate.endswith('ies'):
+                candidates.append(candidate[:-3] + 'y')
+            elif candidate.endswith('oes') or candidate.endswith('ches'):
+                candidates.append(candidate[:-2])
+            elif candidate.endswith('s') and not candidate.endswith('ss'):
+                candidates.append(candidate[:-1])
+        return candidates
+
+    def lookup(self, food_name):
+        """Get nutrition per 100g for a generic food, or None if it isn't in the table"""
+        for candidate in self._candidates(food_name):
+            index = self._find(candidate)
+            if index is not None:
+                return self._row(index)
+        return None
+
+_table = None
+_table_lock = threading.Lock()
+
+def get_table():
+    """Open the configured table once per process, or return None if it's unavailable"""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                try:
+                    _table = LocalNutritionTable(Config.LOCAL_NUTRITION_PATH)
+                    logger.info(f"Loaded local nutrition table with {len(_table)} foods")
+                except (OSError, ValueError) as e:
+                    logger.error(f"Local nutrition table unavailable: {str(e)}")
+                    _table = False
+    return _table or None
+
+def lookup(food_name):
+    """Look up a food in the bundled table, returning None on a miss"""
+    table = get_table()
+    if table is None:
+        return None
+    return table.lookup(food_name)
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    csv_path = os.path.splitext(Config.LOCAL_NUTRITION_PATH)[0] + '.csv'
+    build_table(csv_path, Config.LOCAL_NUTRITION_PATH)
@@ -0,0 +1,141 @@
+from app import db
+from app.models.food import FoodEntry, FoodReference
+from app.models.job import LookupJob
+from app.services.food_category import FoodCategory
+from app.services import serving_size, llm_metrics
+from app.utils.text import build_full_description
+from config import Config, ModelType
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+def nutrition_handler(payload, user_id):
+    """Nutrition step for a food that isn't in the database"""
+    full_description = build_full_description(payload['name'], payload.get('brand', ''), payload.get('description', ''))
+    logger.info("Getting nutrition info from AI for %s", full_description)
+    nutrition, tier = FoodCategory.get_nutrition_info_with_tier(full_description, ModelType(payload['model']))
+    return FoodCategory.ai_nutrition_result(nutrition, tier, payload.get('quantity', 100))
+
+def serving_size_handler(payload, user_id):
+    """Serving size step for a food that isn't in the database"""
+    return serving_size.recommended_serving_size(
+        payload['name'], payload.get('brand', ''), payload.get('description', ''), ModelType(payload['model'])
+    )
+
+def food_type_handler(payload, user_id):
+    """Food type and unit detection for a food without last-used data"""
+    return serving_size.food_type_info(payload['name'], ModelType(payload['model']))
+
+def add_food_handler(payload, user_id):
+    """Log a food that isn't in the database, storing the AI nutrition as a new reference"""
+    food_name = payload['name']
+    nutrition, tier = FoodCategory.get_nutrition_info_with_tier(food_name, ModelType(payload['model']))
+
+    if tier == 'heuristic':
+        # Log the entry, but don't save a guess as a reference other lookups would reuse
+        logger.info("Using heuristic nutrition for %s, not storing a reference", food_name)
+    else:
+        food_ref = FoodReference.from_nutrition(
+            food_name, payload['brand'], nutrition, user_id,
+            is_shared=payload.get('is_shared', False),
+            quantity=payload['quantity'],
+            meal_type=payload['meal_type']
+        )
+        db.session.add(food_ref)
+        logger.info("Stored AI nutrition in reference table for: %s", food_name)
+
+    entry = FoodEntry.from_nutrition(
+        food_name, payload['brand'], payload['description'], payload['quantity'], payload['meal_type'],
+        user_id, nutrition, FoodCategory.calculate_nutri_score(nutrition)
+    )
+    db.session.add(entry)
+    db.session.commit()
+    logger.info("Added new food entry for: %s", food_name)
+    return {'success': True, 'entry_id': entry.id}
+
+HANDLERS = {
+    'nutrition': nutrition_handler,
+    'serving_size': serving_size_handler,
+    'food_type': food_type_handler,
+    'add_food': add_food_handler
+}
+
+def run_handler(kind, payload, user_id):
+    """Run a lookup inline (used when the job queue is disabled)"""
+    result = HANDLERS[kind](payload, user_id)
+    # Keep what the lookup cached, as run_job does
+    db.session.commit()
+    return result
+
+def enqueue_job(kind, payload, user_id):
+    """Queue a lookup for the worker pool"""
+    job = LookupJob(kind=kind, payload=payload, user_id=user_id, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    logger.info("Queued %s lookup job %s", kind, job.id)
+    return job
+
+def claim_next_job():
+    """Claim the oldest runnable job, skipping rows other workers have locked.
+
+    Jobs left 'running' by a worker that died are picked up again once they
+    exceed the job timeout, up to the attempt limit; past the limit they are
+    marked failed so pollers stop waiting on them.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=Config.AI_JOB_TIMEOUT)
+    db.session.execute(
+        db.update(LookupJob)
+        .where(
+            LookupJob.status == 'running',
+            LookupJob.started_at < stale_before,
+            LookupJob.attempts >= Config.AI_JOB_MAX_ATTEMPTS
+        )
+        .values(
+            status='failed',
+            error=f"Abandoned after {Config.AI_JOB_MAX_ATTEMPTS} attempts",
+            finished_at=datetime.utcnow()
+        )
+    )
+    job = db.session.execute(
+        db.select(LookupJob)
+        .where(db.or_(
+            LookupJob.status == 'queued',
+            db.and_(
+                LookupJob.status == 'running',
+                LookupJob.started_at < stale_before,
+                LookupJob.attempts < Config.AI_JOB_MAX_ATTEMPTS
+            )
+        ))
+        .order_by(LookupJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+
+    if job is None:
+        # Keeps any jobs just marked failed
+        db.session.commit()
+        return None
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    job.attempts += 1
+    # Commit right away so the row lock isn't held while waiting on the model
+    db.session.commit()
+    return job
+
+def run_job(job):
+    """Run a claimed job and store its result"""
+    try:
+        with llm_metrics.endpoint_scope(f"job:{job.kind}"):
+            result = HANDLERS[job.kind](job.payload, job.user_id)
+        job.status = 'done'
+        job.result = result
+    except Exception as e:
+        logger.error("Lookup job %s failed: %s", job.id, e)
+        db.session.rollback()
+        job.status = 'failed'
+        job.error = str(e)[:500]
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
@@ -0,0 +1,142 @@
+"""Logging several food items as one meal.
+
+All references for the meal are fetched with two queries (by id and by name),
+and the new references, last-used updates and entries are written in a single
+transaction, so a meal costs one commit however many items it has.
+"""
+from app import db
+from app.models.food import FoodEntry, FoodReference
+import logging
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner', 'snack', 'tea')
+
+class UnresolvedItems(Exception):
+    """Items that have no reference and no nutrition values, so the meal can't be logged without a model"""
+
+    def __init__(self, names):
+        super().__init__(f"No nutrition information for: {', '.join(names)}")
+        self.names = names
+
+def parse_item(item):
+    """Normalize one item of a meal request the way add_food does"""
+    try:
+        quantity = float(item.get('quantity', 100))
+        if quantity <= 0:
+            quantity = 100  # Default to 100g if invalid
+    except (TypeError, ValueError):
+        quantity = 100  # Default to 100g if conversion fails
+    return {
+        'name': (item.get('name') or '').strip(),
+        'brand': (item.get('brand') or '').strip(),
+        'description': (item.get('description') or '').strip(),
+        'quantity': quantity,
+        'reference_id': item.get('reference_id'),
+        'nutrition': item.get('nutrition'),
+        'is_shared': bool(item.get('is_shared', False))
+    }
+
+def _matches(reference, name, brand):
+    # Same containment tests as the ilike filters in FoodReference.find_for_user
+    return name.lower() in reference.name.lower() and (brand is None or brand.lower() in reference.brand.lower())
+
+def load_references(items, user_id):
+    """Fetch the references the user can see that the items could use, by id and by name"""
+    visible = sa.or_(FoodReference.is_shared == True, FoodReference.creator_id == user_id)
+    ids = {item['reference_id'] for item in items if item['reference_id']}
+    names = {item['name'] for item in items if not item['reference_id']}
+
+    by_id = {}
+    if ids:
+        by_id = {ref.id: ref for ref in db.session.execute(
+            sa.select(FoodReference).where(FoodReference.id.in_(ids), visible)
+        ).scalars()}
+
+    candidates = []
+    if names:
+        candidates = db.session.execute(
+            sa.select(FoodReference)
+            .where(
+                sa.or_(*[FoodReference.name.ilike(f"%{name}%") for name in names]),
+                visible
+            )
+            .order_by(FoodReference.id)
+        ).scalars().all()
+    return by_id, candidates
+
+def log_meal(user_id, items, meal_type, meal_date):
+    """Log a meal's items in one transaction; returns the new entries.
+
+    Raises UnresolvedItems, without writing anything, if an item has neither
+    a reference nor nutrition values.
+    """
+    by_id, candidates = load_references(items, user_id)
+    created = []  # references created for this meal, so repeated items reuse them
+
+    def find(name, brand):
+        for reference in candidates:
+            if _matches(reference, name, brand):
+                return reference
+        return None
+
+    resolved = []
+    unresolved = []
+    for item in items:
+        name, brand = item['name'], item['brand']
+        if item['reference_id']:
+            # Ids the user can't see weren't loaded, so they count as unresolved
+            reference = by_id.get(item['reference_id'])
+            if reference is not None and not name:
+                name, brand = reference.name, brand or reference.brand
+        elif item['nutrition']:
+            # Reuse a similar reference to avoid duplicates, like add_food does for manual nutrition
+            reference = find(name, brand or 'Generic')
+            if reference is not None:
+                reference.last_used_unit = item['nutrition'].get('unit')
+                reference.weight_per_unit = item['nutrition'].get('weight', 100)
+            else:
+                # An item repeated within the meal uses the reference its first occurrence created
+                reference = next((ref for ref in created if ref.name.lower() == name.lower() and ref.brand == brand), None)
+            if reference is None:
+                reference = FoodReference.from_nutrition(
+                    name, brand, item['nutrition'], user_id,
+                    is_shared=item['is_shared'],
+                    quantity=item['quantity'],
+                    meal_type=meal_type
+                )
+                db.session.add(reference)
+                created.append(reference)
+        else:
+            reference = find(name, brand or 'Generic') or find(name, None)
+            if reference is not None and (brand == 'Generic' or not brand):
+                brand = reference.brand
+
+        if reference is None:
+            unresolved.append(name or f"reference {item['reference_id']}")
+            continue
+        resolved.append((item, reference, name, brand))
+
+    if unresolved:
+        db.session.rollback()
+        raise UnresolvedItems(unresolved)
+
+    entries = []
+    for item, reference, name, brand in resolved:
+        # Like add_food, a reference picked by id is used as it is
+        if not item['reference_id']:
+            reference.last_used_quantity = item['quantity']
+            reference.last_used_meal_type = meal_type
+        # Entries take the reference's values, as in add_food
+        entry = FoodEntry.from_nutrition(
+            name, brand, item['description'], item['quantity'], meal_type,
+            user_id, reference.nutrition_dict(), reference.nutri_score_dict()
+        )
+        entry.date = meal_date
+        entries.append(entry)
+
+    db.session.add_all(entries)
+    db.session.commit()
+    logger.info("Logged %s items for %s on %s for user %s", len(entries), meal_type, meal_date, user_id)
+    return entries
@@ -0,0 +1,63 @@
+from flask import g, has_request_context, session
+from app import db
+from app.models.user import User
+from config import Config, ModelType
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# user_id -> (ModelType, expires_at). The DB is the source of truth; entries expire
+# so a change made through another worker or node is picked up within the TTL.
+_cache = {}
+_lock = threading.Lock()
+
+def _parse(value):
+    """Map a stored model value to a ModelType, falling back to the default"""
+    try:
+        model_type = ModelType(value) if value else Config.DEFAULT_MODEL
+    except ValueError:
+        logger.error(f"Unknown stored model {value}, using {Config.DEFAULT_MODEL.value}")
+        model_type = Config.DEFAULT_MODEL
+    return model_type if model_type in Config.AVAILABLE_MODELS else Config.DEFAULT_MODEL
+
+def get_user_model(user_id):
+    """Get the model a user has selected"""
+    if user_id is None:
+        return Config.DEFAULT_MODEL
+
+    now = time.monotonic()
+    with _lock:
+        cached = _cache.get(user_id)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    value = db.session.execute(
+        db.select(User.preferred_model).where(User.id == user_id)
+    ).scalar_one_or_none()
+    model_type = _parse(value)
+    with _lock:
+        _cache[user_id] = (model_type, now + Config.MODEL_PREFERENCE_CACHE_TTL)
+    return model_type
+
+def set_user_model(user_id, model_type):
+    """Store a user's model selection"""
+    user = db.session.get(User, user_id)
+    user.preferred_model = model_type.value
+    db.session.commit()
+    invalidate(user_id)
+    logger.info("User %s selected model %s", user_id, model_type.value)
+
+def invalidate(user_id):
+    """Drop a user's cached selection in this process"""
+    with _lock:
+        _cache.pop(user_id, None)
+
+def request_model():
+    """The model for the current request's user, resolved once per request"""
+    if not has_request_context():
+        return Config.DEFAULT_MODEL
+    if 'model_type' not in g:
+        g.model_type = get_user_model(session.get('user_id'))
+    return g.model_type
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.services.food_category import FoodCategory
+from app.services import llm_metrics
+from app.utils.text import normalize_food_name
+from config import Config
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class NutritionPrefetcher:
+    """Speculatively fetch AI nutrition info while the user is still in the wizard.
+
+    The verify step starts a lookup for foods that are not in the reference DB,
+    and the nutrition step collects the finished (or in-flight) result instead
+    of starting a new model call.
+    """
+
+    def __init__(self, max_workers=None, ttl=None):
+        self.max_workers = max_workers or Config.NUTRITION_PREFETCH_WORKERS
+        self.ttl = ttl or Config.NUTRITION_PREFETCH_TTL
+        self._executor = None
+        self._pending = {}  # (user_id, normalized description, model_type) -> (future, started_at)
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily so the pool is never shared across forked gunicorn workers
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='nutrition-prefetch'
+            )
+        return self._executor
+
+    @staticmethod
+    def _key(user_id, full_description, model_type):
+        # A result from one model must never be served for a request made with another
+        return (user_id, normalize_food_name(full_description), model_type)
+
+    def _expire(self, now):
+        """Drop prefetched results that were never collected"""
+        expired = [key for key, (_, started_at) in self._pending.items() if now - started_at > self.ttl]
+        for key in expired:
+            future, _ = self._pending.pop(key)
+            future.cancel()
+
+    def prefetch(self, user_id, full_description, model_type):
+        """Start a background nutrition lookup for the user's draft with their model, if not already running"""
+        key = self._key(user_id, full_description, model_type)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._pending:
+                return False
+            future = self._get_executor().submit(llm_metrics.bind_context(FoodCategory.get_nutrition_info_with_tier), full_description, model_type)
+            self._pending[key] = (future, now)
+        logger.info("Started nutrition prefetch for %s", full_description)
+        return True
+
+    def collect(self, user_id, full_description, model_type, timeout=None):
+        """Return the prefetched (nutrition, tier) for the user's draft and model, or None if none was started.
+
+        Waits for an in-flight lookup to finish. The result is consumed, so a
+        second call for the same draft returns None.
+        """
+        key = self._key(user_id, full_description, model_type)
+        with self._lock:
+            entry = self._pending.pop(key, None)
+        if entry is None:
+            return None
+
+        future, _ = entry
+        try:
+            result = future.result(timeout=timeout or Config.NUTRITION_PREFETCH_TIMEOUT)
+            logger.info("Using prefetched nutrition for %s", full_description)
+            llm_metrics.record_cache_hit('prefetch', 'nutrition')
+            return result
+        except Exception as e:
+            logger.error("Error collecting prefetched nutrition: %s", e)
+            return None
+
+# Shared per-process instance
+nutrition_prefetcher = NutritionPrefetcher()
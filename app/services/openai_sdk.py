@@ -0,0 +1,23 @@
+"""The OpenAI SDK, imported on first use.
+
+Importing openai is a large share of the app's import time and most
+processes (the offline model, workers that never reach a fallback) never
+call it, so it is loaded by the first model call instead of at startup.
+"""
+from config import Config
+import threading
+
+_lock = threading.Lock()
+_module = None
+
+def openai():
+    """The configured openai module"""
+    global _module
+    if _module is None:
+        with _lock:
+            if _module is None:
+                import openai as module
+                if Config.OPENAI_API_KEY:
+                    module.api_key = Config.OPENAI_API_KEY
+                _module = module
+    return _module
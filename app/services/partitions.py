@@ -0,0 +1,180 @@
+"""Monthly range partitions of food_entry on PostgreSQL.
+
+food_entry is partitioned by month on `date`, named food_entry_y2026m10 and
+so on, with a food_entry_default partition catching dates that have no
+partition yet. ensure_partitions() creates the partitions for the coming
+months and for any month found in the default partition, moving those rows
+into place. It runs from the migration, before each import batch, every
+PARTITION_CHECK_INTERVAL seconds in each worker, and from the command line:
+
+    python -m app.services.partitions ensure
+    python -m app.services.partitions list
+    python -m app.services.partitions detach 2023-01
+
+A detached partition is left as a plain table, ready to pg_dump and drop.
+On other databases food_entry is a plain table and all of this does nothing.
+"""
+from datetime import date, timedelta
+from app import db
+from config import Config
+import logging
+import re
+import sqlalchemy as sa
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PARENT = 'food_entry'
+DEFAULT_PARTITION = f'{PARENT}_default'
+PARTITION_NAME = re.compile(rf'^{PARENT}_y(\d{{4}})m(\d{{2}})$')
+
+# Serializes partition changes between workers (pg_advisory_xact_lock key)
+LOCK_KEY = 0x666f6f64
+
+def month_start(day):
+    return day.replace(day=1)
+
+def next_month(start):
+    return (start + timedelta(days=32)).replace(day=1)
+
+def partition_name(start):
+    return f"{PARENT}_y{start.year}m{start.month:02d}"
+
+def upcoming_months(ahead=None):
+    """The current month and the next `ahead` months"""
+    ahead = Config.PARTITION_MONTHS_AHEAD if ahead is None else ahead
+    months = [month_start(date.today())]
+    for _ in range(ahead):
+        months.append(next_month(months[-1]))
+    return months
+
+def is_partitioned(connection):
+    """Whether food_entry is a partitioned table on this connection's database"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(sa.text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:parent)"
+    ), {'parent': PARENT}).scalar() or False
+
+def attached_partitions(connection):
+    """Month start -> name of the monthly partitions attached to food_entry"""
+    names = connection.execute(sa.text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:parent)
+    """), {'parent': PARENT}).scalars()
+    months = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return months
+
+def _default_months(connection):
+    # Months of the rows that landed in the default partition
+    if connection.execute(sa.text("SELECT to_regclass(:name)"), {'name': DEFAULT_PARTITION}).scalar() is None:
+        return set()
+    return set(connection.execute(sa.text(
+        f"SELECT DISTINCT date_trunc('month', date)::date FROM {DEFAULT_PARTITION}"
+    )).scalars())
+
+def create_partition(connection, start):
+    """Create and attach the partition for the month starting at `start`.
+
+    The partition is built as a plain table and then attached, which only
+    takes a SHARE UPDATE EXCLUSIVE lock on food_entry, so reads and writes
+    carry on. Rows for the month waiting in the default partition move in first.
+    """
+    name = partition_name(start)
+    end = next_month(start)
+    connection.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    moved = 0
+    if start in _default_months(connection):
+        moved = connection.execute(sa.text(f"""
+            WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING *)
+            INSERT INTO {name} SELECT * FROM moved
+        """), {'start': start, 'end': end}).rowcount
+    connection.exec_driver_sql(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    logger.info(f"Created partition {name}" + (f", moved {moved} entries from {DEFAULT_PARTITION}" if moved else ""))
+    return name
+
+def ensure_partitions(connection, months=()):
+    """Create the missing partitions for `months`, the coming months and the months stuck in the default partition.
+
+    Runs in the connection's transaction; returns the names of the partitions created.
+    """
+    if not is_partitioned(connection):
+        return []
+
+    def missing():
+        wanted = {month_start(month) for month in months} | set(upcoming_months()) | _default_months(connection)
+        return sorted(wanted - attached_partitions(connection).keys())
+
+    if not missing():
+        return []
+    # Check again once no other worker is creating partitions
+    connection.execute(sa.text("SELECT pg_advisory_xact_lock(:key)"), {'key': LOCK_KEY})
+    return [create_partition(connection, start) for start in missing()]
+
+def detach_partition(connection, start):
+    """Detach a month's partition from food_entry, keeping it as a plain table; returns its name"""
+    name = attached_partitions(connection).get(month_start(start))
+    if name is None:
+        raise ValueError(f"No partition for {start:%Y-%m}")
+    # CONCURRENTLY isn't allowed while a default partition exists, so this briefly locks food_entry
+    connection.exec_driver_sql(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+    logger.info(f"Detached partition {name}")
+    return name
+
+_next_check = 0.0
+_check_lock = threading.Lock()
+
+def _ensure_upcoming_periodically():
+    """Create upcoming partitions at most once per PARTITION_CHECK_INTERVAL in this process"""
+    global _next_check
+    if time.time() < _next_check or not _check_lock.acquire(blocking=False):
+        return
+    try:
+        _next_check = time.time() + Config.PARTITION_CHECK_INTERVAL
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.begin() as connection:
+                ensure_partitions(connection)
+    except Exception as e:
+        logger.error(f"Error creating upcoming food_entry partitions: {str(e)}")
+    finally:
+        _check_lock.release()
+
+def install(app):
+    """Check for missing upcoming partitions before requests"""
+    app.before_request(_ensure_upcoming_periodically)
+
+def main():
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of food_entry")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('ensure', help='create partitions for the coming months and for rows in the default partition')
+    commands.add_parser('list', help='list the attached partitions')
+    detach = commands.add_parser('detach', help='detach months (YYYY-MM) for archival')
+    detach.add_argument('months', nargs='+')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context(), db.engine.begin() as connection:
+        if not is_partitioned(connection):
+            parser.error("food_entry isn't partitioned on this database")
+        if args.command == 'ensure':
+            created = ensure_partitions(connection)
+            print(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+        elif args.command == 'list':
+            for start, name in sorted(attached_partitions(connection).items()):
+                print(f"{start:%Y-%m}  {name}")
+        else:
+            for month in args.months:
+                name = detach_partition(connection, date.fromisoformat(f"{month}-01"))
+                print(f"Detached {name}; archive it with pg_dump -t {name}, then DROP TABLE {name}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import Config, ModelType
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Latency-aware circuit breaker for a single nutrition provider.
+
+    Calls that fail or take longer than the slow-call threshold count against
+    the provider. When enough of the recent calls are bad the breaker opens and
+    the provider is skipped until the reset timeout passes, after which one
+    trial call is let through (half-open) to decide whether to close again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, window=None, min_calls=None, failure_rate=None,
+                 slow_call_seconds=None, reset_timeout=None):
+        self.name = name
+        self.window = window or Config.PROVIDER_BREAKER_WINDOW
+        self.min_calls = min_calls or Config.PROVIDER_BREAKER_MIN_CALLS
+        self.failure_rate = failure_rate or Config.PROVIDER_BREAKER_FAILURE_RATE
+        self.slow_call_seconds = slow_call_seconds or Config.PROVIDER_SLOW_CALL_SECONDS
+        self.reset_timeout = reset_timeout or Config.PROVIDER_BREAKER_RESET_TIMEOUT
+
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._latencies = deque(maxlen=self.window)
+        self._outcomes = deque(maxlen=self.window)  # True for a good call, False for failed or slow
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a call to this provider may be attempted now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                logger.info("Circuit for %s is half-open, allowing a trial call", self.name)
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            # Half-open: only one trial call at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record(self, latency, success):
+        """Record the outcome of a call made after allow_request()"""
+        good = success and latency <= self.slow_call_seconds
+        with self._lock:
+            self._latencies.append(latency)
+            self._outcomes.append(good)
+
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if good:
+                    logger.info("Circuit for %s closed after successful trial call", self.name)
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            if self.state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                bad = self._outcomes.count(False)
+                if bad / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self):
+        logger.warning("Circuit for %s opened", self.name)
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def p95(self):
+        """95th percentile latency of recent calls, or None without enough samples"""
+        with self._lock:
+            if len(self._latencies) < self.min_calls:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def hedge_delay(self):
+        """How long to wait on this provider before hedging with a fallback"""
+        p95 = self.p95()
+        if p95 is None:
+            return Config.PROVIDER_HEDGE_DELAY
+        return max(p95, Config.PROVIDER_HEDGE_DELAY)
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'p95': self.p95(),
+            'recent_calls': len(self._outcomes)
+        }
+
+# One breaker per provider, shared by all requests in this process
+_breakers = {model_type: CircuitBreaker(model_type.value) for model_type in ModelType}
+
+# Limits concurrent provider calls; when exhausted, requests degrade instead of queueing
+_in_flight = threading.BoundedSemaphore(Config.PROVIDER_MAX_IN_FLIGHT)
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_breaker(model_type):
+    """Get the circuit breaker for a provider"""
+    return _breakers[model_type]
+
+def try_acquire_slot():
+    """Reserve a provider call slot without blocking; False means we're overloaded"""
+    return _in_flight.acquire(blocking=False)
+
+def release_slot():
+    _in_flight.release()
+
+def get_executor():
+    """Thread pool used to run (and hedge) provider calls"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.PROVIDER_MAX_IN_FLIGHT,
+                thread_name_prefix='nutrition-provider'
+            )
+    return _executor
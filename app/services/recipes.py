@@ -0,0 +1,109 @@
+"""Recipes made of food references, with precomputed per-100g nutrition.
+
+A recipe's nutrition and Nutri-Score are stored on the recipe and computed
+when it is saved, so logging a recipe costs the same as logging a single
+food. When a reference's nutrition changes, the recipes using it are found
+through the recipe_ingredient.reference_id index and recomputed in the same
+flush; other recipes are left alone.
+"""
+from datetime import datetime
+from app import db
+from app.models.food import FoodReference
+from app.models.recipe import Recipe, RecipeIngredient
+from app.services.food_category import FoodCategory
+import logging
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+NUTRITION_FIELDS = (
+    'calories', 'energy_kj', 'protein', 'carbs', 'sugars', 'fat',
+    'saturated_fat', 'sodium', 'fiber', 'fruits_veg_nuts'
+)
+
+def compute_nutrition(ingredients):
+    """Per-100g nutrition of a mix of (per-100g nutrition, grams)"""
+    total_weight = sum(grams for _, grams in ingredients)
+    if total_weight <= 0:
+        return {field: 0 for field in NUTRITION_FIELDS}
+    # Per-100g values of the mix are the weight-averaged per-100g values of its ingredients
+    return {
+        field: round(sum((nutrition.get(field) or 0) * grams for nutrition, grams in ingredients) / total_weight, 1)
+        for field in NUTRITION_FIELDS
+    }
+
+def recompute(recipe):
+    """Refresh a recipe's stored nutrition and Nutri-Score from its ingredients"""
+    nutrition = compute_nutrition([
+        (ingredient.reference.nutrition_dict(), ingredient.grams) for ingredient in recipe.ingredients
+    ])
+    nutri_score = FoodCategory.calculate_nutri_score(nutrition)
+    for field, value in nutrition.items():
+        setattr(recipe, field, value)
+    recipe.total_weight = sum(ingredient.grams for ingredient in recipe.ingredients)
+    recipe.nutri_score = nutri_score['grade']
+    recipe.numeric_score = nutri_score['score']
+    recipe.simple_score = nutri_score['simple_score']
+    recipe.computed_at = datetime.utcnow()
+
+def set_ingredients(recipe, ingredients, user_id):
+    """Replace a recipe's ingredients with (reference_id, grams) pairs and recompute it.
+
+    Raises ValueError if a reference doesn't exist, isn't visible to the user,
+    or an amount isn't a positive number of grams.
+    """
+    amounts = []
+    for reference_id, grams in ingredients:
+        try:
+            grams = float(grams)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid amount for ingredient {reference_id}")
+        if grams <= 0:
+            raise ValueError(f"Invalid amount for ingredient {reference_id}")
+        amounts.append((reference_id, grams))
+    if not amounts:
+        raise ValueError("A recipe needs at least one ingredient")
+
+    ids = {reference_id for reference_id, _ in amounts}
+    references = {ref.id: ref for ref in db.session.execute(
+        sa.select(FoodReference).where(
+            FoodReference.id.in_(ids),
+            sa.or_(FoodReference.is_shared == True, FoodReference.creator_id == user_id)
+        )
+    ).scalars()}
+    missing = ids - references.keys()
+    if missing:
+        raise ValueError(f"Unknown food references: {', '.join(str(id) for id in sorted(missing))}")
+
+    recipe.ingredients = [
+        RecipeIngredient(reference=references[reference_id], grams=grams)
+        for reference_id, grams in amounts
+    ]
+    recompute(recipe)
+
+def recipes_using(reference_ids):
+    """Ids of the recipes that use any of the references"""
+    return set(db.session.execute(
+        sa.select(RecipeIngredient.recipe_id).where(RecipeIngredient.reference_id.in_(reference_ids)).distinct()
+    ).scalars())
+
+def _nutrition_changed(reference):
+    state = sa.inspect(reference)
+    return any(state.attrs[field].history.has_changes() for field in NUTRITION_FIELDS)
+
+@sa.event.listens_for(db.session, 'before_flush')
+def _recompute_dependent_recipes(session, flush_context, instances):
+    """Recompute the recipes that use a reference whose nutrition is being changed"""
+    changed = [
+        obj.id for obj in session.dirty
+        if isinstance(obj, FoodReference) and obj.id is not None and _nutrition_changed(obj)
+    ]
+    if not changed:
+        return
+    with session.no_autoflush:
+        recipe_ids = recipes_using(changed)
+        if not recipe_ids:
+            return
+        for recipe in session.execute(sa.select(Recipe).where(Recipe.id.in_(recipe_ids))).scalars():
+            recompute(recipe)
+    logger.info("Recomputed %s recipes after changes to food references %s", len(recipe_ids), changed)
@@ -0,0 +1,246 @@
+"""Serving sizes and unit weights for the food-type and serving-size endpoints.
+
+Config.STANDARD_WEIGHTS, Config.UNIT_WEIGHT_RULES and Config.SERVING_SIZES are
+compiled into lookup tables once, when the module is imported. Unit weights
+are memoized per (normalized name, unit, food type).
+"""
+from collections import namedtuple
+from functools import lru_cache
+from app.utils.text import normalize_food_name
+from config import Config
+
+# Units counted in whole items ("2 cookies"), as opposed to weights and volumes
+COUNTED_UNITS = ('cookie', 'unit', 'piece', 'slice')
+# Units the serving-size endpoint offers as item counts
+SERVING_COUNT_UNITS = ('cookie', 'piece', 'slice', 'unit', 'egg')
+REFERENCE_COUNT_UNITS = ('cookie', 'piece', 'slice', 'unit', 'egg', 'cup', 'tbsp', 'tsp')
+
+_WeightRule = namedtuple('_WeightRule', ['keywords', 'food_types', 'grams'])
+_UnitWeights = namedtuple('_UnitWeights', ['required_keywords', 'required_types', 'rules', 'default_grams'])
+
+BEVERAGE_GLASS_SIZES = {
+    'unit': 'ml',
+    'sizes': [
+        {'label': 'Small glass (200ml)', 'value': 200},
+        {'label': 'Regular glass (250ml)', 'value': 250},
+        {'label': 'Large glass (330ml)', 'value': 330},
+        {'label': 'Custom volume (ml)', 'value': 'custom'}
+    ]
+}
+
+WEIGHT_OPTIONS = [
+    {'label': "100g", 'value': 100},
+    {'label': "150g", 'value': 150},
+    {'label': "200g", 'value': 200},
+    {'label': 'Custom amount (g)', 'value': 'custom'}
+]
+
+def _plural(count, unit):
+    return f"{count} {unit}{'' if count == 1 else 's'}"
+
+class ServingSizeResolver:
+    """Compiled unit-weight rules and serving size tables"""
+
+    def __init__(self, standard_weights, unit_weight_rules, serving_sizes):
+        self._units = {unit: self._compile_unit(rules, standard_weights) for unit, rules in unit_weight_rules.items()}
+        self._serving_sizes = dict(serving_sizes)
+        self._default_sizes = serving_sizes['default']
+        self.unit_weight = lru_cache(maxsize=4096)(self._unit_weight)
+
+    @staticmethod
+    def _compile_unit(rules, standard_weights):
+        weights = standard_weights[rules['group']]
+        if not isinstance(weights, dict):
+            # A single weight for the whole unit, like a tablespoon
+            return _UnitWeights((), frozenset(), (), weights)
+
+        requires = rules.get('requires', {})
+        return _UnitWeights(
+            tuple(requires.get('keywords', ())),
+            frozenset(requires.get('food_types', ())),
+            tuple(
+                _WeightRule(tuple(rule.get('keywords', ())), frozenset(rule.get('food_types', ())), weights[rule['weight']])
+                for rule in rules.get('rules', ())
+            ),
+            weights[rules.get('default', 'standard')]
+        )
+
+    def _unit_weight(self, normalized_name, unit, food_type):
+        compiled = self._units.get(unit)
+        if compiled is None:
+            return None
+        if compiled.required_keywords and not any(keyword in normalized_name for keyword in compiled.required_keywords):
+            return None
+        if compiled.required_types and food_type not in compiled.required_types:
+            return None
+        for rule in compiled.rules:
+            if food_type in rule.food_types or any(keyword in normalized_name for keyword in rule.keywords):
+                return rule.grams
+        return compiled.default_grams
+
+    def weight_for(self, food_name, unit, food_type):
+        """Standard weight in grams of one unit of a food, or None if there isn't one"""
+        return self.unit_weight(normalize_food_name(food_name), unit, food_type)
+
+    def type_sizes(self, food_type):
+        """Standard serving sizes for a food type"""
+        return self._serving_sizes.get(food_type, self._default_sizes)
+
+    def unit_sizes(self, unit, food_type, weight):
+        """Serving sizes for the food-type endpoint, by unit when the food is counted or spooned"""
+        if unit in COUNTED_UNITS:
+            return {
+                'unit': unit,
+                'sizes': [
+                    {'label': f'1 {unit}', 'value': weight},
+                    {'label': f'2 {unit}s', 'value': weight * 2},
+                    {'label': f'3 {unit}s', 'value': weight * 3},
+                    {'label': f'Custom amount ({unit}s)', 'value': 'custom'}
+                ]
+            }
+        if unit == 'tablespoon':
+            return {
+                'unit': unit,
+                'sizes': [
+                    {'label': '1 tablespoon', 'value': weight},
+                    {'label': '2 tablespoons', 'value': weight * 2},
+                    {'label': '3 tablespoons', 'value': weight * 3},
+                    {'label': 'Custom amount (tbsp)', 'value': 'custom'}
+                ]
+            }
+        if unit == 'cup' and food_type == 'beverages':
+            return BEVERAGE_GLASS_SIZES
+        return self.type_sizes(food_type)
+
+    def food_type_options(self, food_name, food_type, unit, weight=None):
+        """Food-type endpoint response for a resolved type and unit"""
+        if weight is None:
+            weight = self.weight_for(food_name, unit, food_type)
+        if weight is None and (unit in COUNTED_UNITS or unit == 'tablespoon'):
+            # A counted unit without a known weight can't be offered as counts
+            return self.fallback_food_type_options(food_name, food_type)
+
+        serving_sizes = self.unit_sizes(unit, food_type, weight)
+        return {
+            'food_type': food_type,
+            'serving_sizes': serving_sizes,
+            'default_quantity': serving_sizes['sizes'][1]['value'] if len(serving_sizes['sizes']) > 1 else weight or 100,
+            'unit': unit,
+            # For display purposes, convert unit 'unit' to a more natural name
+            'display_unit': 'piece' if unit == 'unit' else unit,
+            'weight_per_unit': weight
+        }
+
+    def fallback_food_type_options(self, food_name, food_type=None):
+        """Food-type endpoint response from keyword detection alone"""
+        food_type = food_type or Config.get_food_type(food_name)
+        return {
+            'food_type': food_type,
+            'serving_sizes': self.type_sizes(food_type),
+            'default_quantity': 100,
+            'unit': 'g',
+            'display_unit': 'g',
+            'weight_per_unit': None
+        }
+
+    def serving_options(self, food_type, unit, weight, suggested_qty=None):
+        """Serving-size endpoint response for a resolved type, unit and unit weight"""
+        if unit not in SERVING_COUNT_UNITS:
+            # Default options for weight/volume
+            return {
+                'food_type': food_type,
+                'unit': unit,
+                'weight': weight,
+                'default_serving': {'quantity': weight, 'unit': unit, 'description': f"{weight}g"},
+                'options': list(WEIGHT_OPTIONS)
+            }
+
+        if suggested_qty is None:
+            # The older 3-part answer has no quantity, so offer 1-3 units
+            return {
+                'food_type': food_type,
+                'unit': unit,
+                'weight': weight,
+                'default_serving': {'quantity': weight, 'unit': unit, 'description': f"1 {unit} ({weight}g)"},
+                'options': [
+                    {'label': f"1 {unit} ({weight}g)", 'value': weight},
+                    {'label': f"2 {unit}s ({weight*2}g)", 'value': weight*2},
+                    {'label': f"3 {unit}s ({weight*3}g)", 'value': weight*3},
+                    {'label': 'Custom amount (g)', 'value': 'custom'}
+                ]
+            }
+
+        # Use the suggested quantity from the LLM response
+        total_weight = weight * suggested_qty
+        return {
+            'food_type': food_type,
+            'unit': unit,
+            'weight': weight,
+            'suggested_quantity': suggested_qty,
+            'default_serving': {
+                'quantity': total_weight,
+                'unit': unit,
+                'description': f"{_plural(suggested_qty, unit)} ({total_weight}g)"
+            },
+            'options': [
+                {'label': f"{_plural(suggested_qty, unit)} ({total_weight}g)", 'value': total_weight},
+                {'label': f"{suggested_qty*2} {unit}s ({total_weight*2}g)", 'value': total_weight*2},
+                {'label': f"1 {unit} ({weight}g)", 'value': weight},
+                {'label': 'Custom amount (g)', 'value': 'custom'}
+            ]
+        }
+
+    def default_serving_options(self):
+        """Serving-size endpoint response when the model can't answer"""
+        return {
+            'food_type': 'default',
+            'unit': 'g',
+            'weight': 100,
+            'default_serving': {'quantity': 100, 'unit': 'g', 'description': '100g'},
+            'options': [
+                {'label': '100g', 'value': 100},
+                {'label': '150g', 'value': 150},
+                {'label': '200g', 'value': 200},
+                {'label': 'Custom amount (g)', 'value': 'custom'}
+            ]
+        }
+
+    def reference_serving_options(self, exact_quantity, unit, weight_per_unit, last_used_meal_type):
+        """Serving-size endpoint response from the quantity last logged for a food reference"""
+        if unit in REFERENCE_COUNT_UNITS:
+            # Format with pieces
+            pieces = 1 if weight_per_unit == exact_quantity else exact_quantity / weight_per_unit if weight_per_unit > 0 else 1
+            return {
+                'food_type': 'from_database',
+                'unit': unit,
+                'weight': weight_per_unit,  # Exact weight per unit
+                'default_serving': {
+                    'quantity': exact_quantity,  # Use exact quantity from DB
+                    'unit': unit,
+                    'description': f"{_plural(pieces, unit)} ({exact_quantity}g)"
+                },
+                'options': [
+                    {'label': f"{_plural(pieces, unit)} ({exact_quantity}g)", 'value': exact_quantity},
+                    {'label': f"{pieces*2} {unit}s ({exact_quantity*2}g)", 'value': exact_quantity*2},
+                    {'label': f"1 {unit} ({weight_per_unit}g)", 'value': weight_per_unit},
+                    {'label': 'Custom amount (g)', 'value': 'custom'}
+                ],
+                'last_used_meal_type': last_used_meal_type  # Include last used meal type
+            }
+
+        # Default options for weight/volume
+        return {
+            'food_type': 'from_database',
+            'unit': 'g',
+            'weight': 100,
+            'default_serving': {
+                'quantity': exact_quantity,  # Use exact quantity from DB
+                'unit': 'g',
+                'description': f"{exact_quantity}g"
+            },
+            'options': [{'label': f"{exact_quantity}g", 'value': exact_quantity}] + list(WEIGHT_OPTIONS),
+            'last_used_meal_type': last_used_meal_type  # Include last used meal type
+        }
+
+# Compiled once per process
+serving_resolver = ServingSizeResolver(Config.STANDARD_WEIGHTS, Config.UNIT_WEIGHT_RULES, Config.SERVING_SIZES)
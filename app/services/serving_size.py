@@ -0,0 +1,176 @@
+import requests
+from config import Config, ModelType
+from app.utils.text import build_full_description
+from app.services import llm_metrics, food_type_cache, openai_sdk
+from app.services.serving_resolver import serving_resolver
+import logging
+
+logger = logging.getLogger(__name__)
+
+def parse_food_type(food_name, result, provider):
+    """Parse a 'type|unit[|weight]' answer, caching it; returns (food_type, unit, weight)"""
+    if '|' not in result:
+        llm_metrics.record_parse_failure(provider, 'food_type')
+        return result, 'g', None
+    parts = result.split('|')
+    if len(parts) == 3:
+        food_type, unit, weight = parts[0], parts[1], float(parts[2])
+    else:
+        food_type, unit, weight = parts[0], parts[1] if len(parts) > 1 else 'g', None
+    food_type_cache.put(food_name, food_type, unit, weight)
+    return food_type, unit, weight
+
+def food_type_info(food_name, model_type):
+    """Get food type, unit and serving sizes for a food using the LLM"""
+    try:
+        cached = food_type_cache.get(food_name)
+        if cached is not None:
+            return serving_resolver.food_type_options(food_name, cached.food_type, cached.unit, cached.weight_per_unit)
+        
+        # Ask the model for the type, natural unit and weight per unit
+        result = None
+        if model_type == ModelType.FREE:
+            prompt = Config.HUGGINGFACE_FOOD_TYPE_PROMPT.format(food_name=food_name)
+            headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
+            api_url = f"{Config.HUGGINGFACE_API_BASE_URL}/models/google/flan-t5-base"
+            
+            with llm_metrics.track_call(ModelType.FREE.value, 'food_type') as call:
+                response = requests.post(api_url, headers=headers, json={
+                    "inputs": prompt,
+                    "parameters": {"max_length": 50}
+                }, timeout=Config.PROVIDER_REQUEST_TIMEOUT)
+                call.error = response.status_code != 200
+            
+            if response.status_code == 200:
+                result, provider = response.json()[0]["generated_text"], ModelType.FREE.value
+        # The offline model never makes network calls, so it uses keyword detection
+        elif Config.OPENAI_API_KEY and model_type != ModelType.LOCAL:
+            messages = [
+                {"role": "system", "content": Config.OPENAI_FOOD_TYPE_SYSTEM_PROMPT},
+                {"role": "user", "content": Config.OPENAI_FOOD_TYPE_PROMPT.format(food_name=food_name)}
+            ]
+            
+            with llm_metrics.track_call(ModelType.GPT35.value, 'food_type') as call:
+                response = openai_sdk.openai().ChatCompletion.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=50,
+                    request_timeout=Config.PROVIDER_REQUEST_TIMEOUT
+                )
+                call.set_usage(response)
+            
+            if response.choices:
+                result, provider = response.choices[0].message.content, ModelType.GPT35.value
+        
+        if result is not None:
+            food_type, unit, weight = parse_food_type(food_name, result.strip().lower(), provider)
+        else:
+            llm_metrics.record_default_fallback(model_type.value, 'food_type')
+            food_type, unit, weight = Config.get_food_type(food_name), 'g', None
+        
+        return serving_resolver.food_type_options(food_name, food_type, unit, weight)
+        
+    except Exception as e:
+        logger.error(f"Error getting food type info: {str(e)}")
+        llm_metrics.record_default_fallback(model_type.value, 'food_type')
+        # Fallback to basic detection
+        return serving_resolver.fallback_food_type_options(food_name)
+
+def cached_serving_size(full_description):
+    """Serving size from the food type cache, or None if the model hasn't answered for this food"""
+    cached = food_type_cache.get(full_description, 'serving_size', need_weight=True)
+    if cached is None:
+        return None
+    return serving_resolver.serving_options(cached.food_type, cached.unit, cached.weight_per_unit, cached.suggested_quantity)
+
+def parse_serving_size(full_description, result):
+    """Parse a 'type|unit|weight[|quantity]' answer, caching it; returns the response or None"""
+    if '|' not in result:
+        return None
+    parts = result.split('|')
+    if len(parts) >= 4:  # Now expecting 4 parts with the quantity
+        food_type, unit, weight, suggested_qty = parts[0], parts[1], float(parts[2]), int(float(parts[3]))
+    elif len(parts) >= 3:  # Backward compatibility for old format
+        food_type, unit, weight, suggested_qty = parts[0], parts[1], float(parts[2]), None
+    else:
+        return None
+    food_type_cache.put(full_description, food_type, unit, weight, suggested_qty)
+    return serving_resolver.serving_options(food_type, unit, weight, suggested_qty)
+
+def recommended_serving_size(food_name, brand, description, model_type):
+    """Get a recommended serving size for a food that isn't in the database using the LLM"""
+    # Prepare a full description for better LLM context
+    full_description = build_full_description(food_name, brand, description)
+    # Provider that answered, for counting unparseable responses
+    responded_provider = None
+    
+    try:
+        cached = cached_serving_size(full_description)
+        if cached is not None:
+            return cached
+        
+        # Use the LLM to get food type information
+        if model_type == ModelType.FREE:
+            prompt = Config.HUGGINGFACE_FOOD_TYPE_PROMPT.format(food_name=full_description)
+            headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
+            api_url = f"{Config.HUGGINGFACE_API_BASE_URL}/models/google/flan-t5-base"
+            
+            with llm_metrics.track_call(ModelType.FREE.value, 'serving_size') as call:
+                response = requests.post(api_url, headers=headers, json={
+                    "inputs": prompt,
+                    "parameters": {
+                        "max_length": 50,
+                        "temperature": 0.2,
+                        "num_return_sequences": 1,
+                        "do_sample": True
+                    }
+                }, timeout=Config.PROVIDER_REQUEST_TIMEOUT)
+                call.error = response.status_code != 200
+            
+            if response.status_code == 200:
+                result = response.json()[0]["generated_text"].strip().lower()
+                logger.debug("Hugging Face serving size response: %s", result)
+                responded_provider = ModelType.FREE.value
+                
+                serving_size = parse_serving_size(full_description, result)
+                if serving_size:
+                    return serving_size
+        elif model_type != ModelType.LOCAL:
+            messages = [
+                {"role": "system", "content": Config.OPENAI_FOOD_TYPE_SYSTEM_PROMPT},
+                {"role": "user", "content": Config.OPENAI_FOOD_TYPE_PROMPT.format(food_name=full_description)}
+            ]
+            
+            with llm_metrics.track_call(ModelType.GPT35.value, 'serving_size') as call:
+                response = openai_sdk.openai().ChatCompletion.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    temperature=0.2,
+                    max_tokens=50,
+                    request_timeout=Config.PROVIDER_REQUEST_TIMEOUT
+                )
+                call.set_usage(response)
+            
+            if response.choices:
+                result = response.choices[0].message.content.strip().lower()
+                logger.debug("OpenAI serving size response: %s", result)
+                responded_provider = ModelType.GPT35.value
+                
+                serving_size = parse_serving_size(full_description, result)
+                if serving_size:
+                    return serving_size
+        
+        # If we reach here, either the API call failed or parsing failed
+        if responded_provider:
+            llm_metrics.record_parse_failure(responded_provider, 'serving_size')
+        llm_metrics.record_default_fallback(model_type.value, 'serving_size')
+        # Return default serving sizes
+        logger.info("Using default serving sizes for %s", food_name)
+        return serving_resolver.default_serving_options()
+        
+    except Exception as e:
+        logger.error(f"Error getting serving size info: {str(e)}")
+        llm_metrics.record_default_fallback(model_type.value, 'serving_size')
+        # Return default serving sizes
+        return serving_resolver.default_serving_options()
@@ -0,0 +1,114 @@
+"""Structured JSON logs, written off the request thread.
+
+configure() routes every logger through a QueueHandler on the root logger.
+The calling thread only checks the level, samples DEBUG records, merges the
+message with its %-style arguments and tags the record with the current
+request. A QueueListener thread then encodes the JSON and writes it to
+stdout, so a request never waits on the output.
+
+Levels come from LOG_LEVEL, with per-logger overrides in LOG_LEVELS. Only
+LOG_DEBUG_SAMPLE_RATE of the DEBUG records that pass the level check are
+kept, so turning DEBUG on for a busy logger doesn't flood the output.
+Fields passed with extra= become JSON keys. LOG_FORMAT=text writes plain
+lines for local development.
+"""
+from datetime import datetime, timezone
+from flask import has_request_context, request
+from config import Config
+from app.services import json_provider
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Attributes every record has; anything else was passed with extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_handler = None
+_listener = None
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record"""
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json_provider.dumps(entry, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        """Merge the arguments now, so later changes to them don't show up, and leave encoding to the listener"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _sample_debug(record):
+    """Keep every record above DEBUG and a sample of the DEBUG ones"""
+    return record.levelno > logging.DEBUG or random.random() < Config.LOG_DEBUG_SAMPLE_RATE
+
+def _tag_request(record):
+    """Add the method and path of the request being served"""
+    if has_request_context():
+        record.request = f"{request.method} {request.path}"
+    return True
+
+def _output():
+    output = logging.StreamHandler(sys.stdout)
+    if Config.LOG_FORMAT == 'json':
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    return output
+
+def _start_listener():
+    global _listener
+    _handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_handler.queue, _output())
+    _listener.start()
+
+def _stop_listener():
+    """Write out what is still queued"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def configure():
+    """Send all logging through the queue; later calls do nothing"""
+    global _handler
+    if _handler is not None:
+        return
+    root = logging.getLogger()
+    root.setLevel(Config.LOG_LEVEL)
+    for name, level in Config.LOG_LEVELS.items():
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    _handler = _QueueHandler(queue.SimpleQueue())
+    _handler.addFilter(_sample_debug)
+    _handler.addFilter(_tag_request)
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+
+    _start_listener()
+    atexit.register(_stop_listener)
+    # The listener thread doesn't survive a fork, so each gunicorn worker starts its own
+    os.register_at_fork(after_in_child=_start_listener)
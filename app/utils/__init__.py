@@ -1 +1,4 @@
-# Utils package 
\ No newline at end of file
+# Utils package
+from app.utils.text import normalize_food_name, build_full_description
+
+__all__ = ['normalize_food_name', 'build_full_description']
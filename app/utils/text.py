@@ -0,0 +1,19 @@
+import re
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_food_name(food_name):
+    """Normalize a food name for use as a lookup/cache key"""
+    if not food_name:
+        return ''
+    # Lowercase and collapse runs of whitespace so "Greek  Yogurt " == "greek yogurt"
+    return _WHITESPACE.sub(' ', food_name.strip().lower())
+
+def build_full_description(food_name, brand='', description=''):
+    """Build the description sent to the LLM for a food, brand and free-text description"""
+    full_description = food_name
+    if brand:
+        full_description += f" made by {brand}"
+    if description:
+        full_description += f" ({description})"
+    return full_description
@@ -0,0 +1,79 @@
+"""Check the food classifier against the labeled corpus and time it against the old substring scan.
+
+    python benchmarks/classify_food_types.py [--names 100000]
+
+Exits non-zero if any corpus name is misclassified.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.food_classifier import FoodClassifier
+from config import Config
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'food_type_corpus.csv')
+
+def legacy_food_type(food_name):
+    """The substring scan Config.get_food_type used before the compiled classifier"""
+    food_name = food_name.lower()
+    if any(word in food_name for word in ['water', 'juice', 'milk', 'coffee', 'tea', 'soda']):
+        return 'beverages'
+    elif any(word in food_name for word in ['apple', 'banana', 'orange', 'berry', 'fruit']):
+        return 'fruits'
+    elif any(word in food_name for word in ['vegetable', 'carrot', 'broccoli', 'spinach']):
+        return 'vegetables'
+    elif any(word in food_name for word in ['beef', 'chicken', 'pork', 'fish', 'meat']):
+        return 'meats'
+    elif any(word in food_name for word in ['bread', 'rice', 'pasta', 'grain', 'cereal']):
+        return 'grains'
+    elif any(word in food_name for word in ['cookie', 'chip', 'cracker', 'snack', 'candy']):
+        return 'snacks'
+    return 'default'
+
+def load_corpus():
+    with open(CORPUS_PATH, newline='', encoding='utf-8') as f:
+        return [(row['name'], row['food_type']) for row in csv.DictReader(f)]
+
+def accuracy(classify, corpus):
+    wrong = [(name, expected, classify(name)) for name, expected in corpus if classify(name) != expected]
+    return 1 - len(wrong) / len(corpus), wrong
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=100000, help='number of names to classify for the timing run')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    classifier = FoodClassifier.from_file(Config.FOOD_KEYWORDS_PATH)
+
+    legacy_accuracy, _ = accuracy(legacy_food_type, corpus)
+    engine_accuracy, wrong = accuracy(classifier._classify, corpus)
+    print(f"Corpus: {len(corpus)} labeled names")
+    print(f"  legacy substring scan  accuracy {legacy_accuracy:.1%}")
+    print(f"  compiled classifier    accuracy {engine_accuracy:.1%}")
+    for name, expected, got in wrong:
+        print(f"    {name!r}: expected {expected}, got {got}")
+
+    # Unique names so the classifier's memo doesn't hide the matching cost
+    names = [f"{corpus[i % len(corpus)][0]} {i}" for i in range(args.names)]
+
+    started = time.perf_counter()
+    for name in names:
+        legacy_food_type(name)
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    classifier.classify_many(names)
+    engine_seconds = time.perf_counter() - started
+
+    print(f"Classifying {len(names)} names:")
+    print(f"  legacy substring scan  {legacy_seconds:.3f}s ({len(names) / legacy_seconds:,.0f} names/s)")
+    print(f"  compiled classifier    {engine_seconds:.3f}s ({len(names) / engine_seconds:,.0f} names/s)")
+    return 1 if wrong else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
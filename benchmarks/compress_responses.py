@@ -0,0 +1,108 @@
+"""Measure bytes on the wire and latency of the large JSON endpoints with and without compression.
+
+    python benchmarks/compress_responses.py [--references 2000] [--entries-per-day 8] [--rounds 20] [--bandwidth 10]
+
+Seeds a scratch SQLite database with --references shared food references
+and a month of entries, then requests /api/food-references and
+/api/monthly-score with Accept-Encoding identity (the uncompressed baseline),
+gzip and br. Reports the body size, the median time the app takes to build
+and compress the response, and that time plus the transfer time on a
+--bandwidth Mbit/s link.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ENDPOINTS = ['/api/food-references', '/api/monthly-score']
+ENCODINGS = ['identity', 'gzip', 'br']
+
+WORDS = ['apple', 'bread', 'cheese', 'chicken', 'rice', 'yogurt', 'salad', 'soup', 'pasta', 'banana', 'oat', 'bean']
+
+def nutrition(rng):
+    """Plausible, varied per-100g values so the payloads don't compress unrealistically well"""
+    calories = round(rng.uniform(20, 600), 1)
+    return dict(calories=calories, energy_kj=round(calories * 4.184, 1), protein=round(rng.uniform(0, 30), 1),
+                carbs=round(rng.uniform(0, 80), 1), sugars=round(rng.uniform(0, 40), 1), fat=round(rng.uniform(0, 40), 1),
+                saturated_fat=round(rng.uniform(0, 15), 1), sodium=round(rng.uniform(0, 900), 1),
+                fiber=round(rng.uniform(0, 10), 1), fruits_veg_nuts=rng.choice([0, 40, 60, 80, 100]),
+                nutri_score=rng.choice('ABCDE'), numeric_score=rng.randint(-15, 40), simple_score=rng.randint(0, 100))
+
+def food_name(rng, n):
+    return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {n}"
+
+def seed(db, references, entries_per_day):
+    """A user with shared references and entries on every day of the month so far; returns the user id"""
+    from app.models import User, FoodReference, FoodEntry
+
+    rng = random.Random(0)
+    user = User(username='compress', email='compress@example.com')
+    user.set_password('compress')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all(FoodReference(name=food_name(rng, n), brand=rng.choice(WORDS).title(), is_shared=True,
+                                     creator_id=user.id, **nutrition(rng)) for n in range(references))
+    today = date.today()
+    day = today.replace(day=1)
+    while day <= today:
+        db.session.add_all(FoodEntry(name=food_name(rng, n), meal_type=rng.choice(['breakfast', 'lunch', 'dinner', 'snack']),
+                                     date=day, quantity=rng.randint(20, 400), user_id=user.id, **nutrition(rng))
+                           for n in range(entries_per_day))
+        day += timedelta(days=1)
+    db.session.commit()
+    return user.id
+
+def measure(client, path, encoding, rounds):
+    """(body bytes, median seconds) for a GET with the given Accept-Encoding"""
+    timings, size = [], 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = client.get(path, headers={'Accept-Encoding': encoding})
+        size = len(response.get_data())
+        timings.append(time.perf_counter() - started)
+        served = response.headers.get('Content-Encoding', 'identity')
+        if response.status_code != 200 or served != encoding:
+            raise RuntimeError(f"{path} with {encoding}: HTTP {response.status_code}, Content-Encoding {served}")
+    return size, statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--references', type=int, default=2000)
+    parser.add_argument('--entries-per-day', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--bandwidth', type=float, default=10, help='link speed in Mbit/s for the transfer estimate')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'compress.db')}"
+        from app import create_app, db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            user_id = seed(db, args.references, args.entries_per_day)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+
+        for path in ENDPOINTS:
+            print(path)
+            baseline = None
+            for encoding in ENCODINGS:
+                size, server = measure(client, path, encoding, args.rounds)
+                total = server + size * 8 / (args.bandwidth * 1_000_000)
+                baseline = baseline or (size, total)
+                print(f"  {encoding:8}  {size:8} bytes ({size / baseline[0] * 100:5.1f}%)  "
+                      f"app {server * 1000:6.1f} ms  at {args.bandwidth:g} Mbit/s {total * 1000:7.1f} ms "
+                      f"({total / baseline[1] * 100:5.1f}%)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Run the hot queries from app/routes/api.py under EXPLAIN on a seeded PostgreSQL database.
+
+    python benchmarks/explain_hot_queries.py --database-url postgresql://localhost/food_explain
+
+The database must be empty (or created by a previous run, with --reuse): the
+script creates the tables, seeds a large dataset, ANALYZEs it and exits
+non-zero if any query plan reads food_entry or food_reference with a
+sequential scan, or if a score query reads more monthly partitions of
+food_entry than its date range covers.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tables a hot query must never scan in full
+CHECKED_TABLES = ('food_entry', 'food_reference', 'recipe_ingredient')
+
+# Most food_entry partitions a score query may read once partitions are pruned
+PARTITION_LIMITS = {'daily-score': 1, 'weekly-score': 2, 'monthly-score': 1}
+
+def seed(db, users, references, entries, shared_share):
+    """Insert users, references and entries with generate_series; entries span the last three years"""
+    from app.services import partitions
+
+    # Monthly partitions first, so the entries don't all land in the default partition
+    partitions.ensure_partitions(db.session.connection(), [date.today() - timedelta(days=days) for days in range(0, 1096, 28)])
+    db.session.execute(db.text("""
+        INSERT INTO "user" (username, email, password_hash, salt, created_at)
+        SELECT 'explain-' || n, 'explain-' || n || '@example.com', 'x', 'x', now() FROM generate_series(1, :users) AS n
+    """), {'users': users})
+    db.session.execute(db.text("""
+        INSERT INTO food_reference (name, brand, calories, energy_kj, protein, carbs, sugars, fat, saturated_fat,
+                                    sodium, fiber, fruits_veg_nuts, nutri_score, numeric_score, simple_score,
+                                    is_shared, creator_id, last_used_quantity)
+        SELECT 'food ' || n, 'Generic', 100, 418, 5, 10, 2, 3, 1, 100, 2, 0, 'B', 1, 60,
+               random() < :shared_share, (SELECT min(id) FROM "user") + n % :users, 100
+        FROM generate_series(1, :references) AS n
+    """), {'references': references, 'users': users, 'shared_share': shared_share})
+    db.session.execute(db.text("""
+        INSERT INTO food_entry (name, meal_type, date, quantity, user_id, calories, energy_kj, protein, carbs,
+                                sugars, fat, saturated_fat, sodium, fiber, fruits_veg_nuts,
+                                nutri_score, numeric_score, simple_score)
+        SELECT 'food ' || n % 5000, 'lunch', current_date - (n % 1095), 150, (SELECT min(id) FROM "user") + n % :users,
+               100, 418, 5, 10, 2, 3, 1, 100, 2, 0, 'B', 1, 60
+        FROM generate_series(1, :entries) AS n
+    """), {'entries': entries, 'users': users})
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+
+def hot_queries(db, user_id):
+    """The queries behind the score, lookup and export endpoints, built like the routes build them"""
+    from app.models import FoodEntry, FoodReference, RecipeIngredient
+
+    today = date.today()
+    visible = db.or_(FoodReference.is_shared == True, FoodReference.creator_id == user_id)
+    return {
+        'daily-score': db.select(FoodEntry).where(FoodEntry.date == today, FoodEntry.user_id == user_id),
+        'weekly-score': db.select(FoodEntry).where(
+            FoodEntry.date.between(today - timedelta(days=today.weekday()), today),
+            FoodEntry.user_id == user_id
+        ).order_by(FoodEntry.date.desc()),
+        'monthly-score': db.select(FoodEntry).where(
+            FoodEntry.date.between(today.replace(day=1), today),
+            FoodEntry.user_id == user_id
+        ),
+        'export': db.select(FoodEntry).where(
+            FoodEntry.user_id == user_id,
+            FoodEntry.date >= today - timedelta(days=365)
+        ).order_by(FoodEntry.date, FoodEntry.id),
+        'food-references': db.select(FoodReference).where(visible).order_by(
+            db.case((FoodReference.creator_id == user_id, 0), else_=1),
+            FoodReference.name
+        ),
+        'find-for-user': db.select(FoodReference).where(
+            FoodReference.name.ilike('%food 12%'),
+            FoodReference.brand.ilike('%Generic%'),
+            visible
+        ).limit(1),
+        'recipes-using': db.select(RecipeIngredient.recipe_id).where(RecipeIngredient.reference_id.in_([1, 2, 3])).distinct()
+    }
+
+def table_name(relation):
+    """The table a relation belongs to, with food_entry partitions counted as food_entry"""
+    return 'food_entry' if relation and relation.startswith('food_entry_') else relation
+
+def sequential_scans(plan):
+    """Names of the checked tables read by Seq Scan nodes anywhere in a plan"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and table_name(plan.get('Relation Name')) in CHECKED_TABLES:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found.extend(sequential_scans(child))
+    return found
+
+def entry_partitions(plan):
+    """Names of the food_entry partitions read anywhere in a plan"""
+    found = set()
+    if (plan.get('Relation Name') or '').startswith('food_entry_'):
+        found.add(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found |= entry_partitions(child)
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', required=True, help='scratch PostgreSQL database; it is migrated and seeded')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--references', type=int, default=200000)
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--shared-share', type=float, default=0.01, help='fraction of references that are shared')
+    parser.add_argument('--reuse', action='store_true', help='skip migrating and seeding an already seeded database')
+    args = parser.parse_args()
+
+    if not args.database_url.startswith('postgresql'):
+        parser.error('EXPLAIN checks need PostgreSQL')
+    # Config reads the URL at import time
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from flask_migrate import stamp
+    from app import create_app, db
+
+    app = create_app()
+    with app.app_context():
+        if not args.reuse:
+            # The migrations start from an existing schema, so build it from the models and mark it current
+            db.create_all()
+            stamp()
+            print(f"Seeding {args.users} users, {args.references} references, {args.entries} entries")
+            seed(db, args.users, args.references, args.entries, args.shared_share)
+
+        user_id = db.session.execute(db.text("SELECT min(id) FROM \"user\" WHERE username LIKE 'explain-%'")).scalar()
+        failures = 0
+        for name, query in hot_queries(db, user_id).items():
+            # Expanding IN lists are only rendered at execution time unless asked for here
+            compiled = query.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+            plan = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            root = plan[0]['Plan']
+            scans = sequential_scans(root)
+            read = entry_partitions(root)
+            unpruned = name in PARTITION_LIMITS and len(read) > PARTITION_LIMITS[name]
+            status = 'FAIL' if scans or unpruned else 'ok'
+            failures += bool(scans or unpruned)
+            print(f"  {status:4}  {name:16} {root['Node Type']}, cost {root['Total Cost']:.0f}"
+                  + (f", {len(read)} partitions" if read else '')
+                  + (f" (seq scan on {', '.join(scans)})" if scans else ''))
+        return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Compare the stdlib JSON provider, the orjson provider and MessagePack on the heaviest endpoint payloads.
+
+    python benchmarks/json_encoding.py [--references 2000] [--entries-per-day 8] [--rounds 50]
+
+Seeds a scratch SQLite database like benchmarks/compress_responses.py, then
+for /api/food-references and the score roll-ups reports the median time to
+encode and decode each payload and the median time of the whole request
+with Flask's default provider, with FastJSONProvider, and with
+FastJSONProvider answering Accept: application/msgpack.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compress_responses import seed
+
+ENDPOINTS = ['/api/food-references', '/api/monthly-score', '/api/weekly-score']
+
+def median_time(function, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def request_time(client, path, accept, rounds):
+    def get():
+        response = client.get(path, headers={'Accept': accept, 'Accept-Encoding': 'identity'})
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: HTTP {response.status_code}")
+    return median_time(get, rounds)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--references', type=int, default=2000)
+    parser.add_argument('--entries-per-day', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'json.db')}"
+        from flask.json.provider import DefaultJSONProvider
+        from app import create_app, db
+        from app.services.json_provider import FastJSONProvider
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            user_id = seed(db, args.references, args.entries_per_day)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+
+        stdlib, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+        if fast._orjson is None or fast._msgpack is None:
+            print("orjson or msgpack isn't installed (or is turned off); the fast columns fall back to the stdlib")
+        for path in ENDPOINTS:
+            payload = client.get(path, headers={'Accept-Encoding': 'identity'}).get_json()
+            encoded = {'stdlib': stdlib.dumps(payload), 'orjson': fast.dumps(payload)}
+            print(f"{path} ({len(encoded['orjson'])} bytes of compact JSON)")
+            with app.test_request_context():
+                for name, provider in (('stdlib', stdlib), ('orjson', fast)):
+                    dump = median_time(lambda: provider.dumps(payload), args.rounds)
+                    load = median_time(lambda: provider.loads(encoded[name]), args.rounds)
+                    print(f"  {name:8}  encode {dump * 1000:7.2f} ms  decode {load * 1000:7.2f} ms")
+                if fast._msgpack is not None:
+                    packed = fast._msgpack.packb(payload)
+                    dump = median_time(lambda: fast._msgpack.packb(payload, default=fast.default), args.rounds)
+                    load = median_time(lambda: fast._msgpack.unpackb(packed), args.rounds)
+                    print(f"  {'msgpack':8}  encode {dump * 1000:7.2f} ms  decode {load * 1000:7.2f} ms  ({len(packed)} bytes)")
+
+            app.json = stdlib
+            baseline = request_time(client, path, 'application/json', args.rounds)
+            app.json = fast
+            timings = [('orjson', request_time(client, path, 'application/json', args.rounds))]
+            if fast._msgpack is not None:
+                timings.append(('msgpack', request_time(client, path, 'application/msgpack', args.rounds)))
+            print(f"  request   stdlib {baseline * 1000:.1f} ms, "
+                  + ', '.join(f"{name} {timing * 1000:.1f} ms ({timing / baseline * 100:.0f}%)" for name, timing in timings))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
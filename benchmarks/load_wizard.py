@@ -0,0 +1,182 @@
+"""Load test the wizard's nutrition step in the sync and async serving modes.
+
+    python benchmarks/load_wizard.py [--modes sync,async] [--concurrency 200] [--requests 1000] [--latency 1.0]
+
+Starts a stub OpenAI-compatible provider that answers after --latency
+seconds, then for each mode starts one gunicorn worker (gthread for sync,
+gevent for async) on a scratch SQLite database and sends --requests POSTs to
+/api/food-info/nutrition for foods nobody has looked up, --concurrency at a
+time. Reports throughput, latency and which tier answered: 'heuristic'
+answers mean the worker was at its provider call limit and degraded
+instead of waiting.
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from aiohttp import ClientSession, ClientTimeout, CookieJar, web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Per-100g values in the order the nutrition prompt asks for
+STUB_ANSWER = "52.0, 218.0, 10.4, 0.0, 0.2, 1.0, 2.4, 0.3, 100.0"
+
+WORKER_CLASSES = {
+    'sync': ['--worker-class', 'gthread', '--threads', '8'],
+    'async': ['--worker-class', 'gevent', '--worker-connections', '1000']
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_stub_provider(port, latency):
+    """Serve /v1/chat/completions from a background thread, answering after `latency` seconds"""
+    async def chat_completion(request):
+        await asyncio.sleep(latency)
+        return web.json_response({
+            'id': 'load-test',
+            'object': 'chat.completion',
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': STUB_ANSWER}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+        })
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', chat_completion)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port, backlog=4096).start()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(serve())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn didn't start listening on {port}")
+
+async def run_load(base_url, mode, total, concurrency):
+    """Register a user, then send the lookups; returns (elapsed seconds, latencies, statuses, tiers)"""
+    latencies, statuses, tiers = [], {}, {}
+    limit = asyncio.Semaphore(concurrency)
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True), timeout=ClientTimeout(total=300)) as client:
+        username = f"load-{mode}-{os.getpid()}"
+        await client.post(f"{base_url}/register", data={
+            'username': username, 'email': f"{username}@example.com",
+            'password': 'load-test', 'confirm_password': 'load-test'
+        })
+
+        async def lookup(number):
+            async with limit:
+                started = time.perf_counter()
+                try:
+                    async with client.post(f"{base_url}/api/food-info/nutrition",
+                                           json={'name': f"load test food {mode} {number}"}) as response:
+                        body = await response.json(content_type=None)
+                        status = response.status
+                except Exception as e:
+                    body, status = {}, type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+                tier = body.get('tier', 'none') if isinstance(body, dict) else 'none'
+                tiers[tier] = tiers.get(tier, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(lookup(number) for number in range(total)))
+        return time.perf_counter() - started, latencies, statuses, tiers
+
+def run_mode(mode, args, provider_port, workdir):
+    """Start one gunicorn worker in a serving mode and load it; returns a result row, or None if unavailable"""
+    if mode == 'async' and importlib.util.find_spec('gevent') is None:
+        print("  async: skipped, gevent isn't installed")
+        return None
+
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        SECRET_KEY='load-test',
+        OPENAI_API_KEY='load-test',
+        OPENAI_API_BASE=f"http://127.0.0.1:{provider_port}/v1",
+        DEFAULT_MODEL='gpt-3.5-turbo',
+        LOCAL_NUTRITION_FIRST='false',
+        AI_JOBS_ENABLED='false',
+        SERVER_MODE=mode,
+        # The stub is always slow by the same amount, so hedging and the breaker would only add noise
+        PROVIDER_HEDGE_DELAY=str(args.latency * 10),
+        PROVIDER_SLOW_CALL_SECONDS=str(args.latency * 10)
+    )
+    subprocess.run([sys.executable, 'setup_db.py'], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    server = subprocess.Popen(
+        ['gunicorn', '--bind', f"127.0.0.1:{port}", '--workers', '1', '--backlog', '4096',
+         '--timeout', '300', *WORKER_CLASSES[mode], 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port, server)
+        elapsed, latencies, statuses, tiers = asyncio.run(
+            run_load(f"http://127.0.0.1:{port}", mode, args.requests, args.concurrency)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'throughput': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'statuses': statuses,
+        'tiers': tiers
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='sync,async', help='comma-separated serving modes to compare')
+    parser.add_argument('--concurrency', type=int, default=200, help='requests in flight at once')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=1.0, help='seconds the stub provider takes to answer')
+    args = parser.parse_args()
+
+    provider_port = free_port()
+    start_stub_provider(provider_port, args.latency)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.modes.split(','):
+            print(f"Running {mode} mode: {args.requests} requests, {args.concurrency} at a time, "
+                  f"provider latency {args.latency}s")
+            result = run_mode(mode, args, provider_port, workdir)
+            if result:
+                results.append(result)
+                print(f"  {mode}: {result['throughput']:.1f} req/s, p50 {result['p50']:.2f}s, p95 {result['p95']:.2f}s, "
+                      f"status {result['statuses']}, tiers {result['tiers']}")
+
+    if len(results) > 1:
+        baseline = results[0]
+        for result in results[1:]:
+            print(f"{result['mode']} vs {baseline['mode']}: {result['throughput'] / baseline['throughput']:.1f}x throughput")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Measure log volume and per-request logging overhead on the food logging hot paths.
+
+    python benchmarks/logging_overhead.py [--iterations 2000] [--repeats 3]
+
+Runs the same workload in a fresh process per logging setup: adding a food
+with manual nutrition through POST /api/food, then parsing a model answer
+and running a local nutrition lookup, the steps that used to log prompts,
+raw responses and parsed values at INFO. Setups:
+
+- off: logging disabled, the baseline
+- before: a synchronous stdout handler with the hot-path messages enabled,
+  like the old logging.basicConfig at INFO
+- after: the queued JSON logs at their defaults
+- after-debug: the same with DEBUG turned on for the app and sampled
+
+Log output goes to a scratch file. Reports the lines and bytes written per
+iteration, the time per iteration and the time of the parse and lookup
+step alone, where logging is most of the work, from the fastest of
+--repeats runs.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUPS = {
+    'off': {'LOG_LEVEL': 'CRITICAL'},
+    'before': {'LOG_LEVEL': 'INFO', 'LOG_LEVELS': 'app=DEBUG', 'LOG_FORMAT': 'text', 'LOG_DEBUG_SAMPLE_RATE': '1',
+               'SYNC_HANDLER': 'true'},
+    'after': {},
+    'after-debug': {'LOG_LEVELS': 'app=DEBUG'}
+}
+
+WORKLOAD = """
+import json, logging, os, sys, time
+if os.environ.get('SYNC_HANDLER'):
+    # What app/__init__.py used to do: format and write on the calling thread
+    import app.services.structured_logging as structured_logging
+    structured_logging.configure()
+    root = logging.getLogger()
+    root.removeHandler(structured_logging._handler)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s'))
+    root.addHandler(handler)
+from app import create_app, db
+from app.models import User
+from app.services import structured_logging
+from app.services.food_category import FoodCategory
+from config import ModelType
+
+app = create_app()
+with app.app_context():
+    db.create_all()
+    user = User(username='logging', email='logging@example.com')
+    user.set_password('logging')
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+client = app.test_client()
+with client.session_transaction() as session:
+    session['user_id'] = user_id
+
+iterations = int(sys.argv[1])
+nutrition = {'calories': 52, 'energy_kj': 218, 'protein': 0.3, 'carbs': 14, 'sugars': 10.4, 'fat': 0.2,
+             'saturated_fat': 0, 'sodium': 1, 'fiber': 2.4, 'fruits_veg_nuts': 100}
+sys.stdout.flush()
+start_size = os.fstat(sys.stdout.fileno()).st_size
+lookup = 0
+started = time.perf_counter()
+for number in range(iterations):
+    client.post('/api/food', json={'name': f"apple {number % 50}", 'quantity': 150, 'meal_type': 'lunch',
+                                   'nutrition': nutrition})
+    with app.test_request_context('/api/food-info/nutrition', method='POST'):
+        lookup_started = time.perf_counter()
+        FoodCategory.parse_nutrition_values("52.0, 218.0, 10.4, 0.0, 0.2, 1.0, 2.4, 0.3, 100.0")
+        FoodCategory.get_nutrition_info('apple', ModelType.LOCAL)
+        lookup += time.perf_counter() - lookup_started
+elapsed = time.perf_counter() - started
+structured_logging._stop_listener()
+sys.stdout.flush()
+with open(sys.argv[2], 'w') as f:
+    json.dump({'elapsed': elapsed, 'lookup': lookup, 'start_size': start_size}, f)
+"""
+
+def run_setup(name, iterations, workdir):
+    """Run the workload with one logging setup; returns (seconds, seconds in the lookup step, lines, bytes)"""
+    log_path = os.path.join(workdir, f"{name}.log")
+    for leftover in (log_path, os.path.join(workdir, f"{name}.db")):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    result_path = os.path.join(workdir, f"{name}.json")
+    env = dict(os.environ, PYTHONPATH=ROOT, DATABASE_URL=f"sqlite:///{os.path.join(workdir, name + '.db')}",
+               LOCAL_NUTRITION_FIRST='true', AI_JOBS_ENABLED='false', **SETUPS[name])
+    with open(log_path, 'wb') as log:
+        subprocess.run([sys.executable, '-c', WORKLOAD, str(iterations), result_path], cwd=ROOT, env=env,
+                       stdout=log, stderr=subprocess.DEVNULL, check=True)
+    with open(result_path) as f:
+        result = json.load(f)
+    with open(log_path, 'rb') as log:
+        log.seek(result['start_size'])
+        output = log.read()
+    return result['elapsed'], result['lookup'], output.count(b'\n'), len(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(args.repeats):
+            for name in SETUPS:
+                result = run_setup(name, args.iterations, workdir)
+                if name not in results or result[1] < results[name][1]:
+                    results[name] = result
+
+    baseline = results['off'][1] / args.iterations
+    for name, (elapsed, lookup, lines, size) in results.items():
+        per_lookup = lookup / args.iterations
+        print(f"  {name:12} {lines / args.iterations:5.2f} lines {size / args.iterations:7.1f} bytes per iteration, "
+              f"{elapsed / args.iterations * 1000:6.3f} ms per iteration, lookup step {per_lookup * 1e6:6.1f} us "
+              f"({(per_lookup - baseline) * 1e6:+.1f} us over off)")
+    off, before, after = results['off'], results['before'], results['after']
+    print(f"after vs before: {after[3] / before[3] * 100:.1f}% of the log bytes, "
+          f"{(after[1] - off[1]) / max(before[1] - off[1], 1e-9) * 100:.0f}% of the lookup step's logging overhead")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
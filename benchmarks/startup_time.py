@@ -0,0 +1,88 @@
+"""Time how long a freshly started worker takes to import the app and answer its first request.
+
+    python benchmarks/startup_time.py [--workers 4] [--rounds 3] [--path /login] [--budget 1.5]
+
+Each round starts --workers Python processes at once, like gunicorn booting
+its workers, and each reports its interpreter start, wsgi import (create_app
+included) and first request times. Exits non-zero if the median
+time-to-first-request exceeds --budget seconds.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Provider SDKs a worker shouldn't load until a request needs them
+LAZY_MODULES = ('openai',)
+
+WORKER = """
+import json, sys, time
+started = float(sys.argv[1])
+interpreter = time.time()
+import wsgi
+imported = time.time()
+response = wsgi.app.test_client().get(sys.argv[2])
+answered = time.time()
+print(json.dumps({
+    'interpreter': interpreter - started,
+    'import': imported - interpreter,
+    'first_request': answered - imported,
+    'total': answered - started,
+    'status': response.status_code,
+    'loaded': [name for name in sys.argv[3:] if name in sys.modules]
+}))
+"""
+
+def boot_workers(count, path):
+    """Start `count` workers together and collect their timings"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    started = time.time()
+    processes = [
+        subprocess.Popen([sys.executable, '-c', WORKER, str(started), path, *LAZY_MODULES],
+                         cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(count)
+    ]
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"Worker exited with {process.returncode}")
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='workers started at once per round')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--path', default='/login', help='first request each worker answers')
+    parser.add_argument('--budget', type=float, help='fail if the median time-to-first-request is above this many seconds')
+    args = parser.parse_args()
+
+    results = []
+    for round_number in range(1, args.rounds + 1):
+        for worker, result in enumerate(boot_workers(args.workers, args.path), 1):
+            results.append(result)
+            print(f"  round {round_number} worker {worker}: interpreter {result['interpreter']:.3f}s, "
+                  f"import {result['import']:.3f}s, first request {result['first_request']:.3f}s "
+                  f"(HTTP {result['status']}), time-to-first-request {result['total']:.3f}s"
+                  + (f", loaded {', '.join(result['loaded'])}" if result['loaded'] else ''))
+
+    median = statistics.median(result['total'] for result in results)
+    print(f"Median time-to-first-request over {len(results)} workers: {median:.3f}s "
+          f"(import {statistics.median(result['import'] for result in results):.3f}s, "
+          f"first request {statistics.median(result['first_request'] for result in results):.3f}s)")
+    eager = sorted({name for result in results for name in result['loaded']})
+    if eager:
+        print(f"Loaded at startup: {', '.join(eager)}")
+    if args.budget is not None and median > args.budget:
+        print(f"Above the {args.budget:.3f}s budget")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Compare gunicorn worker memory with and without preloading the app (Linux only).
+
+    python benchmarks/worker_memory.py [--workers 4] [--requests 50]
+
+Starts gunicorn with gunicorn.conf.py twice, with GUNICORN_PRELOAD=false and
+=true, sends --requests requests so every worker has served a few, then reads
+each worker's proportional (PSS) and private (USS) memory from
+/proc/<pid>/smaps_rollup. PSS splits shared pages between the processes
+sharing them, so the total PSS is what the workers really cost.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def children(pid):
+    """Pids of a process's direct children"""
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The parent pid is the 2nd field after the command name
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        found.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return found
+
+def memory(pid):
+    """(PSS, USS) of a process in MiB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    uss = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    return values.get('Pss', 0) / 1024, uss / 1024
+
+def measure(preload, workers, requests, database_url):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_PRELOAD=str(preload).lower(),
+               DATABASE_URL=database_url, SERVER_MODE='sync')
+    master = subprocess.Popen(['gunicorn', 'wsgi:app'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 60
+        while len(children(master.pid)) < workers and time.time() < deadline:
+            time.sleep(0.2)
+        for _ in range(requests):
+            for attempt in range(50):
+                try:
+                    urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=10).read()
+                    break
+                except OSError:
+                    time.sleep(0.2)
+        time.sleep(1)
+        return memory(master.pid), [memory(pid) for pid in children(master.pid)]
+    finally:
+        master.terminate()
+        master.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--database-url', help='defaults to a scratch SQLite database')
+    args = parser.parse_args()
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        parser.error('needs Linux /proc/<pid>/smaps_rollup')
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'memory.db')}"
+        subprocess.run([sys.executable, 'setup_db.py'], cwd=ROOT, env=dict(os.environ, DATABASE_URL=database_url),
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        totals = {}
+        for preload in (False, True):
+            (master_pss, _), workers = measure(preload, args.workers, args.requests, database_url)
+            pss = sum(worker[0] for worker in workers)
+            uss = sum(worker[1] for worker in workers)
+            totals[preload] = pss
+            print(f"  preload={str(preload).lower():5}  {len(workers)} workers: "
+                  f"PSS {pss / len(workers):.1f} MiB/worker, USS {uss / len(workers):.1f} MiB/worker, "
+                  f"master PSS {master_pss:.1f} MiB, total {pss + master_pss:.1f} MiB")
+    print(f"Preloading changes worker PSS by {(totals[True] - totals[False]) / totals[False] * 100:+.0f}%")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
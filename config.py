@@ -1,14 +1,18 @@
 import os
 from dotenv import load_dotenv
 from enum import Enum
+from sqlalchemy.pool import NullPool
 
 # Load environment variables
 load_dotenv()
 
+basedir = os.path.dirname(os.path.abspath(__file__))
+
 class ModelType(Enum):
     FREE = "flan-t5-base"
     GPT35 = "gpt-3.5-turbo"
     GPT4 = "gpt-4"
+    LOCAL = "local"
 
 class Config:
     # Flask settings
@@ -22,19 +26,122 @@ class Config:
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool. With DB_POOL_PROFILE=pgbouncer, connections go through PgBouncer in
+    # transaction mode: PgBouncer does the pooling, so each checkout opens a new client connection
+    # and no server-side prepared statements or session-level settings are used.
+    DB_POOL_PROFILE = os.getenv('DB_POOL_PROFILE', 'default')  # default or pgbouncer
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))  # connections kept open per worker process
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))  # extra connections allowed under load
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # seconds before a connection is replaced
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'  # test connections on checkout
+    if not DATABASE_URL.startswith('postgresql'):
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+    elif DB_POOL_PROFILE == 'pgbouncer':
+        SQLALCHEMY_ENGINE_OPTIONS = {'poolclass': NullPool}
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'pool_recycle': DB_POOL_RECYCLE,
+            'pool_pre_ping': DB_POOL_PRE_PING
+        }
+    DB_CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)  # pool wait histogram upper bounds in seconds
+
+    # Read replicas. Requests to REPLICA_ENDPOINTS read from a replica unless the user wrote in the
+    # last REPLICA_STICKY_SECONDS, so they always see their own changes; everything else uses the primary.
+    DATABASE_REPLICA_URLS = [
+        url.strip().replace("postgres://", "postgresql://", 1)
+        for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+    ]
+    SQLALCHEMY_BINDS = {f'replica_{index}': url for index, url in enumerate(DATABASE_REPLICA_URLS)}
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 10))  # should exceed the usual replication lag
+    REPLICA_ENDPOINTS = {
+        'api.get_daily_score',
+        'api.get_weekly_score',
+        'api.get_monthly_score',
+        'api.get_food_references',
+        'api.get_recipes',
+        'api.export_food_log'
+    }
+
+    # Statement timeouts, set with SET LOCAL at the start of each transaction so they also work through PgBouncer
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 5000))  # requests to endpoints not listed below
+    DB_BACKGROUND_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_BACKGROUND_STATEMENT_TIMEOUT_MS', 0))  # workers and scripts, 0 = none
+    STATEMENT_TIMEOUTS = {  # endpoint -> milliseconds, 0 = none
+        'api.import_food_log': 120000,
+        'api.export_food_log': 0,  # one long-running cursor for the whole download
+        'api.get_monthly_score': 15000
+    }
+
     # API Keys
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
     HUGGINGFACE_API_BASE_URL = "https://api-inference.huggingface.co/models"
 
     # Model settings
-    CURRENT_MODEL = ModelType.GPT35
+    DEFAULT_MODEL = ModelType(os.getenv('DEFAULT_MODEL', ModelType.GPT35.value))  # use "local" for air-gapped deployments
+    MODEL_PREFERENCE_CACHE_TTL = int(os.getenv('MODEL_PREFERENCE_CACHE_TTL', 30))  # seconds other workers may serve a stale choice
     AVAILABLE_MODELS = {
         ModelType.FREE: "Free (FLAN-T5)",
         ModelType.GPT35: "GPT-3.5",
-        ModelType.GPT4: "GPT-4"
+        ModelType.GPT4: "GPT-4",
+        ModelType.LOCAL: "Offline (generic foods table)"
     }
 
+    # Bundled generic-foods table, checked before any model call
+    LOCAL_NUTRITION_PATH = os.getenv('LOCAL_NUTRITION_PATH', os.path.join(basedir, 'app', 'data', 'generic_foods.bin'))
+    LOCAL_NUTRITION_FIRST = os.getenv('LOCAL_NUTRITION_FIRST', 'true').lower() == 'true'
+
+    # Provider to hedge with when the selected one is slow or its circuit is open
+    PROVIDER_FALLBACKS = {
+        ModelType.GPT4: ModelType.GPT35,
+        ModelType.GPT35: ModelType.FREE,
+        ModelType.FREE: ModelType.GPT35
+    }
+
+    # AI lookup job queue. When enabled, endpoints that need a model return a job id
+    # and lookup_worker.py processes the jobs, so web workers never wait on a model.
+    AI_JOBS_ENABLED = os.getenv('AI_JOBS_ENABLED', 'false').lower() == 'true'
+    AI_JOB_WORKERS = int(os.getenv('AI_JOB_WORKERS', 4))  # worker processes started by lookup_worker.py
+    AI_JOB_POLL_INTERVAL = float(os.getenv('AI_JOB_POLL_INTERVAL', 0.5))  # seconds between polls when the queue is empty
+    AI_JOB_TIMEOUT = int(os.getenv('AI_JOB_TIMEOUT', 120))  # seconds before a running job is considered abandoned
+    AI_JOB_MAX_ATTEMPTS = int(os.getenv('AI_JOB_MAX_ATTEMPTS', 3))
+    AI_JOB_STREAM_DEADLINE = float(os.getenv('AI_JOB_STREAM_DEADLINE', AI_JOB_TIMEOUT * AI_JOB_MAX_ATTEMPTS))  # seconds a stream waits on a job before failing
+
+    # Bulk food log import (see app/services/food_import.py)
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 5000))  # rows resolved, written and committed together
+    IMPORT_USE_COPY = os.getenv('IMPORT_USE_COPY', 'true').lower() == 'true'  # COPY on PostgreSQL, multi-row INSERT otherwise
+    IMPORT_MAX_REPORTED_ERRORS = int(os.getenv('IMPORT_MAX_REPORTED_ERRORS', 100))  # skipped rows listed in the result
+
+    # Monthly food_entry partitions on PostgreSQL (see app/services/partitions.py)
+    PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))  # months created ahead of the current one
+    PARTITION_CHECK_INTERVAL = int(os.getenv('PARTITION_CHECK_INTERVAL', 6 * 3600))  # seconds between checks per worker
+
+    # Food log export (see app/services/food_export.py)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))  # rows fetched per server-side cursor round trip
+    EXPORT_CHUNK_BYTES = int(os.getenv('EXPORT_CHUNK_BYTES', 64 * 1024))  # response chunk size before compression
+
+    # Server-sent events for the wizard's nutrition step
+    SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))  # idle seconds before a keep-alive comment is sent
+
+    # sync: gunicorn gthread workers, one thread per in-flight request.
+    # async: gunicorn gevent workers (see app/services/async_mode.py), one greenlet per request,
+    # so a process can wait on hundreds of model calls at once.
+    SERVER_MODE = os.getenv('SERVER_MODE', 'sync')
+
+    # Circuit breaker and hedging settings for nutrition providers
+    PROVIDER_BREAKER_WINDOW = int(os.getenv('PROVIDER_BREAKER_WINDOW', 20))  # recent calls considered
+    PROVIDER_BREAKER_MIN_CALLS = int(os.getenv('PROVIDER_BREAKER_MIN_CALLS', 5))
+    PROVIDER_BREAKER_FAILURE_RATE = float(os.getenv('PROVIDER_BREAKER_FAILURE_RATE', 0.5))  # failed or slow share that opens the circuit
+    PROVIDER_BREAKER_RESET_TIMEOUT = float(os.getenv('PROVIDER_BREAKER_RESET_TIMEOUT', 30))  # seconds before a trial call
+    PROVIDER_SLOW_CALL_SECONDS = float(os.getenv('PROVIDER_SLOW_CALL_SECONDS', 10))  # calls slower than this count as failures
+    PROVIDER_HEDGE_DELAY = float(os.getenv('PROVIDER_HEDGE_DELAY', 3))  # minimum wait before hedging, p95 is used once known
+    PROVIDER_MAX_IN_FLIGHT = int(os.getenv('PROVIDER_MAX_IN_FLIGHT', 500 if SERVER_MODE == 'async' else 8))  # concurrent provider calls per process
+    PROVIDER_REQUEST_TIMEOUT = float(os.getenv('PROVIDER_REQUEST_TIMEOUT', 20))  # seconds before a single provider HTTP call is abandoned
+    PROVIDER_LOOKUP_DEADLINE = float(os.getenv('PROVIDER_LOOKUP_DEADLINE', 25))  # seconds a lookup waits on primary and hedge before the heuristic tier
+
     # Hugging Face settings
     HUGGINGFACE_API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-base"
     
@@ -88,6 +195,49 @@ Format as comma-separated numbers ONLY. No text, no labels, no units."""
     OPENAI_TEMPERATURE = 0.2
     OPENAI_MAX_TOKENS = 75
 
+    # Keyword dictionary for Config.get_food_type, compiled by app/services/food_classifier.py
+    FOOD_KEYWORDS_PATH = os.getenv('FOOD_KEYWORDS_PATH', os.path.join(basedir, 'app', 'data', 'food_keywords.json'))
+
+    # Static files (see app/services/assets.py)
+    STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 3600))  # seconds browsers may cache unfingerprinted files
+    ASSET_MAX_AGE = int(os.getenv('ASSET_MAX_AGE', 365 * 24 * 3600))  # for fingerprinted bundles, whose names change with content
+
+    # JSON serialization (see app/services/json_provider.py)
+    JSON_SERIALIZER = os.getenv('JSON_SERIALIZER', 'orjson')  # orjson when installed, or stdlib
+    MSGPACK_ENABLED = os.getenv('MSGPACK_ENABLED', 'true').lower() == 'true'  # answer Accept: application/msgpack with MessagePack
+
+    # JSON response compression (see app/services/compression.py)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'  # off when a proxy in front already compresses
+    COMPRESS_MIMETYPES = ['application/json', 'application/x-ndjson', 'application/msgpack']
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes; smaller buffered bodies are sent as they are
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))  # 0-11; high qualities are too slow for dynamic responses
+
+    # Logging (see app/services/structured_logging.py)
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json, or text for local development
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_LEVELS = dict(  # per-logger overrides, e.g. LOG_LEVELS=app.services.food_category=DEBUG,sqlalchemy.engine=WARNING
+        item.strip().split('=', 1) for item in os.getenv('LOG_LEVELS', '').split(',') if '=' in item
+    )
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.1))  # share of DEBUG records kept; higher levels are never sampled
+
+    # Food type cache (see app/services/food_type_cache.py)
+    FOOD_TYPE_CACHE_SIZE = int(os.getenv('FOOD_TYPE_CACHE_SIZE', 2048))  # entries kept in each process
+
+    # Model call metrics (see /api/metrics)
+    LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)  # histogram upper bounds in seconds
+    LLM_PRICING = {  # USD per 1K (prompt, completion) tokens, used for cost estimates
+        ModelType.GPT35.value: (0.0005, 0.0015),
+        ModelType.GPT4.value: (0.03, 0.06)
+    }
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # scrapers send "Authorization: Bearer <token>" to /api/metrics
+    METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', 'false').lower() == 'true'  # serve /api/metrics without a token or login
+
+    # Speculative nutrition prefetch (started by the wizard's verify step)
+    NUTRITION_PREFETCH_WORKERS = int(os.getenv('NUTRITION_PREFETCH_WORKERS', 4))
+    NUTRITION_PREFETCH_TTL = int(os.getenv('NUTRITION_PREFETCH_TTL', 300))  # seconds before an uncollected result is dropped
+    NUTRITION_PREFETCH_TIMEOUT = int(os.getenv('NUTRITION_PREFETCH_TIMEOUT', 60))  # seconds to wait for an in-flight lookup
+
     # Food type detection prompts
     HUGGINGFACE_FOOD_TYPE_PROMPT = """Analyze this food: "{food_name}"
 Extract any quantity information (e.g., "2 eggs", "3 slices") from the description.
@@ -198,6 +348,56 @@ Example: "snacks|cookie|11|2" for 2 Oreo cookies"""
         }
     }
     
+    # How a unit's weight is picked from STANDARD_WEIGHTS when the model doesn't give one.
+    # Rules are checked in order; 'keywords' match anywhere in the food name, 'food_types'
+    # against the detected type. 'requires' limits the unit to matching foods.
+    UNIT_WEIGHT_RULES = {
+        'cookie': {
+            'group': 'cookie',
+            'rules': [
+                {'keywords': ['oreo'], 'weight': 'oreo'},
+                {'keywords': ['chocolate chip'], 'weight': 'chocolate_chip'}
+            ]
+        },
+        'unit': {
+            'group': 'cracker',
+            'requires': {'keywords': ['cracker']},
+            'rules': [
+                {'keywords': ['saltine'], 'weight': 'saltine'},
+                {'keywords': ['graham'], 'weight': 'graham'}
+            ]
+        },
+        'piece': {
+            'group': 'fruit',
+            'requires': {'food_types': ['fruits']},
+            'rules': [
+                {'keywords': ['apple'], 'weight': 'apple'},
+                {'keywords': ['banana'], 'weight': 'banana'},
+                {'keywords': ['orange'], 'weight': 'orange'}
+            ]
+        },
+        'slice': {
+            'group': 'bread',
+            'requires': {'keywords': ['bread']},
+            'rules': [
+                {'keywords': ['white'], 'weight': 'white'},
+                {'keywords': ['whole wheat', 'wholemeal'], 'weight': 'whole_wheat'}
+            ]
+        },
+        'tablespoon': {
+            'group': 'tablespoon'
+        },
+        'cup': {
+            'group': 'cup',
+            'default': 'liquid',
+            'rules': [
+                {'food_types': ['beverages'], 'weight': 'liquid'},
+                {'keywords': ['cereal'], 'weight': 'cereal'},
+                {'keywords': ['leafy', 'salad'], 'weight': 'leafy_greens'}
+            ]
+        }
+    }
+    
     # Standard serving sizes for different food types
     SERVING_SIZES = {
         'beverages': {
@@ -267,26 +467,30 @@ Example: "snacks|cookie|11|2" for 2 Oreo cookies"""
         }
     }
 
+    # Typical nutrition per 100g for each food type, served when no provider can answer
+    HEURISTIC_NUTRITION = {
+        'beverages': {'calories': 40, 'energy_kj': 167.4, 'protein': 1, 'carbs': 8, 'sugars': 7, 'fat': 1,
+                      'saturated_fat': 0.5, 'sodium': 20, 'fiber': 0, 'fruits_veg_nuts': 20},
+        'fruits': {'calories': 55, 'energy_kj': 230.1, 'protein': 0.7, 'carbs': 13, 'sugars': 10, 'fat': 0.2,
+                   'saturated_fat': 0, 'sodium': 1, 'fiber': 2.2, 'fruits_veg_nuts': 100},
+        'vegetables': {'calories': 30, 'energy_kj': 125.5, 'protein': 2, 'carbs': 5, 'sugars': 2.5, 'fat': 0.3,
+                       'saturated_fat': 0.1, 'sodium': 30, 'fiber': 2.5, 'fruits_veg_nuts': 100},
+        'meats': {'calories': 200, 'energy_kj': 836.8, 'protein': 25, 'carbs': 0, 'sugars': 0, 'fat': 11,
+                  'saturated_fat': 4, 'sodium': 80, 'fiber': 0, 'fruits_veg_nuts': 0},
+        'grains': {'calories': 250, 'energy_kj': 1046.0, 'protein': 8, 'carbs': 48, 'sugars': 3, 'fat': 2,
+                   'saturated_fat': 0.4, 'sodium': 200, 'fiber': 4, 'fruits_veg_nuts': 0},
+        'snacks': {'calories': 480, 'energy_kj': 2008.3, 'protein': 6, 'carbs': 60, 'sugars': 25, 'fat': 24,
+                   'saturated_fat': 10, 'sodium': 400, 'fiber': 3, 'fruits_veg_nuts': 0},
+        'default': {'calories': 100, 'energy_kj': 418.4, 'protein': 5, 'carbs': 15, 'sugars': 5, 'fat': 5,
+                    'saturated_fat': 2, 'sodium': 100, 'fiber': 2, 'fruits_veg_nuts': 0}
+    }
+
     @staticmethod
     def get_food_type(food_name):
         """Determine the food type based on the name"""
-        food_name = food_name.lower()
-        
-        # Simple detection based on common keywords
-        if any(word in food_name for word in ['water', 'juice', 'milk', 'coffee', 'tea', 'soda']):
-            return 'beverages'
-        elif any(word in food_name for word in ['apple', 'banana', 'orange', 'berry', 'fruit']):
-            return 'fruits'
-        elif any(word in food_name for word in ['vegetable', 'carrot', 'broccoli', 'spinach']):
-            return 'vegetables'
-        elif any(word in food_name for word in ['beef', 'chicken', 'pork', 'fish', 'meat']):
-            return 'meats'
-        elif any(word in food_name for word in ['bread', 'rice', 'pasta', 'grain', 'cereal']):
-            return 'grains'
-        elif any(word in food_name for word in ['cookie', 'chip', 'cracker', 'snack', 'candy']):
-            return 'snacks'
-        else:
-            return 'default'
+        # Simple detection based on common keywords (see FOOD_KEYWORDS_PATH)
+        from app.services.food_classifier import classify
+        return classify(food_name)
 
     @staticmethod
     def get_serving_sizes(food_name):
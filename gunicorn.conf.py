@@ -0,0 +1,60 @@
+"""Gunicorn settings for production (gunicorn loads ./gunicorn.conf.py by default).
+
+    gunicorn wsgi:app
+
+Worker class and counts follow SERVER_MODE and the CPU count, and can be
+overridden with WEB_CONCURRENCY, GUNICORN_THREADS and friends. The app is
+preloaded in the master so workers share its memory copy-on-write.
+"""
+import multiprocessing
+import os
+
+server_mode = os.getenv('SERVER_MODE', 'sync')
+cpu_count = multiprocessing.cpu_count()
+
+if server_mode == 'async':
+    # Patch before the app is preloaded, so every module it imports sees the cooperative versions
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+if server_mode == 'async':
+    # One event loop per core; each holds up to worker_connections requests
+    worker_class = 'gevent'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count))
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+else:
+    # Threads so a slow model call or an SSE stream doesn't block a whole process
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+# Import the app once in the master; forked workers share its pages until they write to them
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Restart each worker after a while to bound slow memory growth, staggered so they don't restart together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Heartbeat files in memory rather than on a container's overlay filesystem
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+def post_fork(server, worker):
+    """Drop the database connections inherited from the master.
+
+    dispose(close=False) forgets the pooled connections without closing
+    them, so the master's sockets are left alone and the worker opens its own.
+    """
+    if not server.cfg.preload_app:
+        return
+    from app import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,41 @@
+import argparse
+import logging
+import sys
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Import a food log export (CSV, JSON Lines or a JSON array) for a user"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('path', help='file to import')
+    parser.add_argument('--user', required=True, help='username to import the entries for')
+    parser.add_argument('--format', choices=['csv', 'ndjson', 'json'], help='file format, by default taken from the extension')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.models.user import User
+    from app.services import food_import
+
+    app = create_app()
+    with app.app_context():
+        user = User.query.filter_by(username=args.user).first()
+        if user is None:
+            logger.error(f"No user named {args.user}")
+            return 1
+
+        def on_progress(stats):
+            logger.info(f"{stats.rows} rows read, {stats.imported} imported, {stats.skipped} skipped")
+
+        file_format = food_import.detect_format(args.path, args.format)
+        with open(args.path, 'rb') as f:
+            stats = food_import.import_food_log(f, file_format, user.id, on_progress)
+
+        for error in stats.errors:
+            logger.info(f"Skipped line {error['line']}: {error['error']}")
+        logger.info(f"Imported {stats.imported} of {stats.rows} rows for {args.user}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
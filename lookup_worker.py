@@ -0,0 +1,48 @@
+import logging
+import multiprocessing
+import time
+from config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def work(worker_number):
+    """Claim and run AI lookup jobs until stopped"""
+    # Create the app inside the child process so each worker gets its own DB connections
+    from app import create_app, db
+    from app.services import lookup_jobs
+    
+    app = create_app()
+    logger.info(f"Lookup worker {worker_number} started")
+    
+    with app.app_context():
+        while True:
+            try:
+                job = lookup_jobs.claim_next_job()
+                if job is None:
+                    time.sleep(Config.AI_JOB_POLL_INTERVAL)
+                    continue
+                
+                logger.info(f"Worker {worker_number} running {job.kind} job {job.id}")
+                lookup_jobs.run_job(job)
+            except Exception as e:
+                logger.error(f"Lookup worker {worker_number} error: {e}")
+                # A failed statement leaves the transaction unusable until it is rolled back
+                db.session.rollback()
+                time.sleep(Config.AI_JOB_POLL_INTERVAL)
+
+def main():
+    """Start the lookup worker pool"""
+    logger.info(f"Starting {Config.AI_JOB_WORKERS} lookup workers")
+    processes = [
+        multiprocessing.Process(target=work, args=(number,), name=f"lookup-worker-{number}")
+        for number in range(Config.AI_JOB_WORKERS)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Add lookup_job table for queued AI lookups
+
+Revision ID: 4f2a9c1d7e63
+Revises: 2d8641e327c2
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2a9c1d7e63'
+down_revision = '2d8641e327c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('lookup_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=10), server_default='queued', nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(length=500), nullable=True),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Partial index so claiming a job only looks at unfinished rows
+    op.create_index('ix_lookup_job_pending', 'lookup_job', ['id'], unique=False,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+
+
+def downgrade():
+    op.drop_index('ix_lookup_job_pending', table_name='lookup_job')
+    op.drop_table('lookup_job')
@@ -0,0 +1,26 @@
+"""Add preferred_model to user
+
+Revision ID: 8c3e5b2a1f90
+Revises: 4f2a9c1d7e63
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3e5b2a1f90'
+down_revision = '4f2a9c1d7e63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preferred_model', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('preferred_model')
@@ -0,0 +1,33 @@
+"""Add food_type_cache table for resolved food types and serving units
+
+Revision ID: a61d0f4b8e27
+Revises: 8c3e5b2a1f90
+Create Date: 2026-10-19 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a61d0f4b8e27'
+down_revision = '8c3e5b2a1f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('food_type_cache',
+        sa.Column('name', sa.String(length=500), nullable=False),
+        sa.Column('food_type', sa.String(length=50), nullable=False),
+        sa.Column('unit', sa.String(length=20), nullable=False),
+        sa.Column('weight_per_unit', sa.Float(), nullable=True),
+        sa.Column('suggested_quantity', sa.Integer(), nullable=True),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('food_type_cache')
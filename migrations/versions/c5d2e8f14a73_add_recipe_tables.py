@@ -0,0 +1,61 @@
+"""Add recipe and recipe_ingredient tables for recipes with precomputed nutrition
+
+Revision ID: c5d2e8f14a73
+Revises: a61d0f4b8e27
+Create Date: 2026-10-19 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2e8f14a73'
+down_revision = 'a61d0f4b8e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recipe',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('is_shared', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('total_weight', sa.Float(), nullable=False),
+        sa.Column('calories', sa.Float(), nullable=False),
+        sa.Column('energy_kj', sa.Float(), nullable=False),
+        sa.Column('protein', sa.Float(), nullable=False),
+        sa.Column('carbs', sa.Float(), nullable=False),
+        sa.Column('sugars', sa.Float(), nullable=False),
+        sa.Column('fat', sa.Float(), nullable=False),
+        sa.Column('saturated_fat', sa.Float(), nullable=False),
+        sa.Column('sodium', sa.Float(), nullable=False),
+        sa.Column('fiber', sa.Float(), nullable=False),
+        sa.Column('fruits_veg_nuts', sa.Float(), nullable=False),
+        sa.Column('nutri_score', sa.String(length=1), nullable=False),
+        sa.Column('numeric_score', sa.Integer(), nullable=False),
+        sa.Column('simple_score', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['creator_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('recipe_ingredient',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('reference_id', sa.Integer(), nullable=False),
+        sa.Column('grams', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipe.id'], ),
+        sa.ForeignKeyConstraint(['reference_id'], ['food_reference.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_recipe_ingredient_recipe_id', 'recipe_ingredient', ['recipe_id'], unique=False)
+    # Reverse dependency index: which recipes use a food reference
+    op.create_index('ix_recipe_ingredient_reference_id', 'recipe_ingredient', ['reference_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_recipe_ingredient_reference_id', table_name='recipe_ingredient')
+    op.drop_index('ix_recipe_ingredient_recipe_id', table_name='recipe_ingredient')
+    op.drop_table('recipe_ingredient')
+    op.drop_table('recipe')
@@ -0,0 +1,40 @@
+"""Add composite and partial indexes for the user/date and visibility queries
+
+Revision ID: d8a3f6c2b190
+Revises: c5d2e8f14a73
+Create Date: 2026-10-19 15:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a3f6c2b190'
+down_revision = 'c5d2e8f14a73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY can't run inside a transaction, and keeps the tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        # Every score endpoint filters entries by user and a date or date range
+        op.create_index('ix_food_entry_user_id_date', 'food_entry', ['user_id', 'date'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        # "is_shared OR creator_id = ?" is answered by OR-ing these two index scans
+        op.create_index('ix_food_reference_creator_id', 'food_reference', ['creator_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_food_reference_shared_name', 'food_reference', ['name'], unique=False,
+                        postgresql_where=sa.text('is_shared'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_food_reference_shared_name', table_name='food_reference',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_food_reference_creator_id', table_name='food_reference',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_food_entry_user_id_date', table_name='food_entry',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,77 @@
+"""Partition food_entry by month on date (PostgreSQL)
+
+Revision ID: e7f1a3b5c920
+Revises: d8a3f6c2b190
+Create Date: 2026-10-19 17:40:00.000000
+
+The existing table is renamed, a partitioned food_entry is created with a
+partition for every month that has entries and for the next few months plus
+a default partition, and the rows are copied across in this transaction.
+food_entry is locked while the rows are copied, so run it in a quiet period
+on large databases. On other databases food_entry stays a plain table.
+"""
+from datetime import date, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f1a3b5c920'
+down_revision = 'd8a3f6c2b190'
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of the current month; the app keeps adding them (app/services/partitions.py)
+MONTHS_AHEAD = 3
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _swap_tables(partitioned):
+    # Free the names of food_entry's constraints and index for the new table
+    op.execute("ALTER TABLE food_entry RENAME TO food_entry_old")
+    op.execute("ALTER TABLE food_entry_old RENAME CONSTRAINT food_entry_pkey TO food_entry_old_pkey")
+    op.execute("ALTER TABLE food_entry_old RENAME CONSTRAINT food_entry_user_id_fkey TO food_entry_old_user_id_fkey")
+    op.execute("ALTER INDEX IF EXISTS ix_food_entry_user_id_date RENAME TO ix_food_entry_old_user_id_date")
+
+    # LIKE keeps the column order, and the id default keeps using food_entry_id_seq
+    op.execute("CREATE TABLE food_entry (LIKE food_entry_old INCLUDING DEFAULTS)"
+               + (" PARTITION BY RANGE (date)" if partitioned else ""))
+    op.execute("ALTER SEQUENCE food_entry_id_seq OWNED BY food_entry.id")
+    # A partitioned table's primary key must include the partition key
+    op.execute(f"ALTER TABLE food_entry ADD CONSTRAINT food_entry_pkey PRIMARY KEY (id{', date' if partitioned else ''})")
+    op.execute('ALTER TABLE food_entry ADD CONSTRAINT food_entry_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user" (id)')
+    op.execute("CREATE INDEX ix_food_entry_user_id_date ON food_entry (user_id, date)")
+
+    if partitioned:
+        # A partition for every month with entries and the coming months, the default partition for the rest
+        months = set(op.get_bind().execute(sa.text(
+            "SELECT DISTINCT date_trunc('month', date)::date FROM food_entry_old"
+        )).scalars())
+        month = date.today().replace(day=1)
+        for _ in range(MONTHS_AHEAD + 1):
+            months.add(month)
+            month = _next_month(month)
+        for month in sorted(months):
+            op.execute(f"CREATE TABLE food_entry_y{month.year}m{month.month:02d} PARTITION OF food_entry "
+                       f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')")
+        op.execute("CREATE TABLE food_entry_default PARTITION OF food_entry DEFAULT")
+
+    op.execute("INSERT INTO food_entry SELECT * FROM food_entry_old")
+    op.execute("DROP TABLE food_entry_old")
+    op.execute("ANALYZE food_entry")
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _swap_tables(partitioned=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Dropping the old partitioned table drops its partitions, detached ones are left alone
+    _swap_tables(partitioned=False)
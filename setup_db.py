@@ -1,48 +1,94 @@
+"""One-shot database setup, run once per deploy before the web and worker processes start.
+
+An empty database gets the tables from the models and is stamped at the
+latest migration (the migrations start from an existing schema); a database
+already under migrations is upgraded. A database built without migrations
+(create_all, execute_sql.py) is stamped at the newest migration its schema
+already has, then upgraded. App processes never touch the schema.
+
+The food type cache is then seeded from food references it doesn't have yet.
+"""
 import logging
 import os
+import sys
 from app import create_app, db
-from flask_migrate import upgrade, Migrate
+from app.services import food_type_cache
+from flask_migrate import stamp, upgrade
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The tables the first migration takes as given
+BASE_REVISION = '7b9587795ba8'
+BASE_TABLES = {'user', 'food_entry', 'food_reference'}
+
+def unmigrated_revision():
+    """The newest migration already applied to a schema with no migration history, or None if it isn't one"""
+    inspector = db.inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    if not BASE_TABLES <= tables:
+        return None
+    columns = {table: {column['name'] for column in inspector.get_columns(table)} for table in BASE_TABLES}
+    indexes = {index['name'] for index in inspector.get_indexes('food_reference')}
+    # What each later migration leaves behind, oldest first
+    applied = [
+        ('bccef6a47300', 'brand' in columns['food_entry']),
+        ('ea3b94453a8b', 'meal_type' in columns['food_entry']),
+        ('1ecb5efd0441', 'last_used_quantity' in columns['food_reference']),
+        ('2d8641e327c2', 'weight_per_unit' in columns['food_reference']),
+        ('4f2a9c1d7e63', 'lookup_job' in tables),
+        ('8c3e5b2a1f90', 'preferred_model' in columns['user']),
+        ('a61d0f4b8e27', 'food_type_cache' in tables),
+        ('c5d2e8f14a73', 'recipe' in tables),
+        ('d8a3f6c2b190', 'ix_food_reference_creator_id' in indexes),
+        # Only partitions food_entry on PostgreSQL
+        ('e7f1a3b5c920', db.engine.dialect.name != 'postgresql' or 'food_entry_default' in tables)
+    ]
+    revision = BASE_REVISION
+    for later, present in applied:
+        if not present:
+            break
+        revision = later
+    return revision
+
 def setup_db():
-    """Set up the database with proper application context"""
-    try:
-        logger.info("Starting database setup process")
-        
-        # Get DATABASE_URL from environment
-        database_url = os.environ.get('DATABASE_URL')
-        if not database_url:
-            logger.warning("DATABASE_URL not found in environment")
-        else:
-            logger.info(f"Using database: {database_url.split('@')[1] if '@' in database_url else 'unknown'}")
-        
-        # Create app with explicit app context
-        app = create_app()
-        
-        # Ensure migrations are properly initialized
-        migrate = Migrate(app, db)
-        
-        with app.app_context():
+    """Create or upgrade the schema; returns False if the database needs manual attention"""
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        logger.warning("DATABASE_URL not found in environment")
+    else:
+        logger.info(f"Using database: {database_url.split('@')[1] if '@' in database_url else 'unknown'}")
+
+    app = create_app()
+    with app.app_context():
+        tables = set(db.inspect(db.engine).get_table_names())
+        if not tables - {'alembic_version'}:
+            logger.info("Empty database, creating tables")
+            db.create_all()
+            stamp()
+        elif 'alembic_version' in tables:
             logger.info("Running database migrations")
-            try:
-                upgrade()
-                logger.info("Migrations completed successfully")
-            except Exception as e:
-                logger.error(f"Migration error: {e}")
-                
-            logger.info("Creating any remaining tables")
-            try:
-                db.create_all()
-                logger.info("Database tables created successfully")
-            except Exception as e:
-                logger.error(f"Error creating tables: {e}")
-                
-    except Exception as e:
-        logger.error(f"Database setup failed: {e}")
-        raise
+            upgrade()
+        else:
+            revision = unmigrated_revision()
+            if revision is None:
+                logger.error("The database has tables but no migration history, and not the ones the first migration "
+                             "expects; run `flask db stamp <revision>` for the revision it matches, then run this again")
+                return False
+            logger.warning(f"The database has tables but no migration history; its schema matches {revision}, "
+                           "stamping it there before running migrations")
+            stamp(revision=revision)
+            upgrade()
+
+        # A cache that can't be seeded only means more model calls, so it doesn't fail the deploy
+        try:
+            food_type_cache.populate_from_references()
+        except Exception as e:
+            logger.error(f"Error seeding the food type cache: {str(e)}")
+            db.session.rollback()
+    logger.info("Database setup completed")
+    return True
 
 if __name__ == "__main__":
-    setup_db() 
\ No newline at end of file
+    sys.exit(0 if setup_db() else 1)
@@ -5,6 +5,34 @@ document.addEventListener('DOMContentLoaded', function() {
     foodEntryWorkflow.init();
 });
 
+// When the server queues an AI lookup it answers 202 with a job id instead of the result.
+// Poll the job until it finishes and hand back a response shaped like the direct one.
+async function waitForLookupJob(response, pollInterval = 500) {
+    if (response.status !== 202) {
+        return response;
+    }
+    
+    const job = await response.json();
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, pollInterval));
+        const statusResponse = await fetch(job.status_url);
+        const status = await statusResponse.json();
+        
+        if (status.status === 'done') {
+            return new Response(JSON.stringify(status.result), {
+                status: 200,
+                headers: { 'Content-Type': 'application/json' }
+            });
+        }
+        if (status.status === 'failed' || !statusResponse.ok) {
+            return new Response(JSON.stringify({ error: status.error || 'Lookup failed' }), {
+                status: 500,
+                headers: { 'Content-Type': 'application/json' }
+            });
+        }
+    }
+}
+
 class FoodEntryWorkflow {
     constructor() {
         // Step definitions
@@ -337,7 +365,7 @@ class FoodEntryWorkflow {
     async fetchServingSizeData(foodName, brand, description) {
         try {
             // Get recommended serving size from the API
-            const response = await fetch('/api/food-info/serving-size', {
+            const response = await waitForLookupJob(await fetch('/api/food-info/serving-size', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -347,7 +375,7 @@ class FoodEntryWorkflow {
                     brand: brand,
                     description: description
                 })
-            });
+            }));
             
             const data = await response.json();
             
@@ -488,7 +516,7 @@ class FoodEntryWorkflow {
     async fetchNutritionFromReference() {
         try {
             // Get nutrition information from the API
-            const response = await fetch('/api/food-info/nutrition', {
+            const response = await waitForLookupJob(await fetch('/api/food-info/nutrition', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -499,7 +527,7 @@ class FoodEntryWorkflow {
                     description: this.foodData.description,
                     quantity: this.foodData.quantity
                 })
-            });
+            }));
             
             const nutritionData = await response.json();
             
@@ -633,7 +661,7 @@ class FoodEntryWorkflow {
                 }
                 
                 // Calculate Nutri-Score from manually entered values
-                const response = await fetch('/api/food-info/nutrition', {
+                const response = await waitForLookupJob(await fetch('/api/food-info/nutrition', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json'
@@ -646,16 +674,19 @@ class FoodEntryWorkflow {
                         nutrition: manualNutrition,
                         is_manual: true  // Flag to indicate manual entry
                     })
-                });
+                }));
                 
                 nutritionData = await response.json();
                 
                 if (!response.ok) {
                     throw new Error(nutritionData.error || 'Failed to calculate nutrition score');
                 }
+            } else if (window.EventSource) {
+                // Stream progress so the user sees what's happening during an AI lookup
+                nutritionData = await this.streamNutrition();
             } else {
                 // Get nutrition information from the API
-                const response = await fetch('/api/food-info/nutrition', {
+                const response = await waitForLookupJob(await fetch('/api/food-info/nutrition', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json'
@@ -666,7 +697,7 @@ class FoodEntryWorkflow {
                         description: this.foodData.description,
                         quantity: this.foodData.quantity
                     })
-                });
+                }));
                 
                 nutritionData = await response.json();
                 
@@ -757,6 +788,65 @@ class FoodEntryWorkflow {
         }
     }
     
+    // Get nutrition information over server-sent events, showing each stage as it happens
+    streamNutrition() {
+        const params = new URLSearchParams({
+            name: this.foodData.name,
+            brand: this.foodData.brand || '',
+            description: this.foodData.description || '',
+            quantity: this.foodData.quantity
+        });
+        const progress = document.getElementById('nutrition-progress');
+        const showProgress = (text) => {
+            progress.textContent = text;
+            progress.classList.remove('hidden');
+        };
+        const stageMessages = {
+            db_hit: 'Found in the food database',
+            db_miss: 'Not in the food database, asking the AI model...',
+            cache_hit: 'Using nutrition values that were already looked up',
+            queued: 'Waiting for a free AI worker...'
+        };
+        
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`/api/food-info/nutrition/stream?${params}`);
+            const finish = () => {
+                source.close();
+                progress.classList.add('hidden');
+            };
+            
+            Object.entries(stageMessages).forEach(([stage, message]) => {
+                source.addEventListener(stage, () => showProgress(message));
+            });
+            source.addEventListener('model_call_started', (event) => {
+                const data = JSON.parse(event.data);
+                showProgress(data.role === 'hedge' ? `Still waiting, also asking ${data.provider}...` : `Asking ${data.provider}...`);
+            });
+            source.addEventListener('parsed', (event) => {
+                // Show the values as soon as they're parsed, the score follows shortly after
+                const data = JSON.parse(event.data);
+                showProgress(`About ${Math.round(data.adjusted_nutrition.calories)} kcal, calculating Nutri-Score...`);
+            });
+            source.addEventListener('score', (event) => {
+                const data = JSON.parse(event.data);
+                showProgress(`Nutri-Score ${data.nutri_score.grade}`);
+            });
+            source.addEventListener('done', (event) => {
+                finish();
+                resolve(JSON.parse(event.data));
+            });
+            source.addEventListener('failed', (event) => {
+                finish();
+                reject(new Error(JSON.parse(event.data).error || 'Failed to get nutrition information'));
+            });
+            // Connection-level errors (the server's own failures arrive as 'failed')
+            source.onerror = () => {
+                finish();
+                reject(new Error('Failed to get nutrition information'));
+            };
+        });
+    }
+    
     // Step 4: Confirmation and Save
     async handleConfirmationSubmit(event) {
         event.preventDefault();
@@ -789,13 +879,13 @@ class FoodEntryWorkflow {
         
         try {
             // Save food entry
-            const response = await fetch('/api/food', {
+            const response = await waitForLookupJob(await fetch('/api/food', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify(finalData)
-            });
+            }));
             
             if (response.ok) {
                 // Show success message
@@ -0,0 +1,665 @@
+// Function to get Nutri-Score style
+function getNutriScoreStyle(grade) {
+    const styles = {
+        'A': 'bg-[#038141]',  // Very Good (Dark Green)
+        'B': 'bg-[#85BB2F]',  // Good (Light Green)
+        'C': 'bg-[#FECB02]',  // Moderate (Yellow)
+        'D': 'bg-[#EE8100]',  // Poor (Orange)
+        'E': 'bg-[#E63E11]'   // Bad (Red)
+    };
+    return styles[grade] || 'bg-gray-500';
+}
+
+// Function to get Nutri-Score image URL
+function getNutriScoreImage(grade) {
+    return `/static/images/nutriscore-${grade.toLowerCase()}.png`;
+}
+
+// Function to update nutrition data
+async function updateNutritionData() {
+    try {
+        // Fetch all scores
+        const [dailyResponse, weeklyResponse, monthlyResponse] = await Promise.all([
+            fetch('/api/daily-score'),
+            fetch('/api/weekly-score'),
+            fetch('/api/monthly-score')
+        ]);
+
+        const [dailyData, weeklyData, monthlyData] = await Promise.all([
+            dailyResponse.json(),
+            weeklyResponse.json(),
+            monthlyResponse.json()
+        ]);
+
+        // Store the data globally
+        window.scoreData = {
+            daily: dailyData,
+            weekly: weeklyData,
+            monthly: monthlyData
+        };
+
+        // Show daily data by default
+        updateScoreDisplay('daily');
+
+        // Group entries by meal type
+        const entriesByMealType = {
+            breakfast: [],
+            lunch: [],
+            dinner: [],
+            snack: [],
+            tea: []
+        };
+
+        // Group the entries
+        dailyData.entries.forEach(entry => {
+            const mealType = entry.meal_type || 'snack';
+            if (entriesByMealType[mealType]) {
+                entriesByMealType[mealType].push(entry);
+            } else {
+                entriesByMealType.snack.push(entry);
+            }
+        });
+
+        // Update food entries display
+        const entriesContainer = document.getElementById('foodEntries');
+        entriesContainer.innerHTML = '';
+
+        // Display entries by meal type
+        const mealTypeOrder = ['breakfast', 'lunch', 'dinner', 'tea', 'snack'];
+        const mealTypeLabels = {
+            'breakfast': 'Breakfast',
+            'lunch': 'Lunch',
+            'dinner': 'Dinner',
+            'tea': 'Tea',
+            'snack': 'Snacks'
+        };
+
+        mealTypeOrder.forEach(mealType => {
+            const entries = entriesByMealType[mealType];
+
+            // Skip meal types with no entries
+            if (entries.length === 0) return;
+
+            // Create section for this meal type
+            const mealTypeSection = document.createElement('div');
+            mealTypeSection.className = 'mb-6';
+
+            // Calculate meal summary data
+            const mealSummary = calculateMealSummary(entries);
+
+            // Add meal type heading with summary stats
+            const heading = document.createElement('div');
+            heading.className = 'flex justify-between items-center mb-3 border-b pb-2';
+            heading.innerHTML = `
+                <h3 class="text-lg font-medium text-gray-700">${mealTypeLabels[mealType]}</h3>
+                <div class="flex items-center space-x-4">
+                    <div class="text-center">
+                        <div class="font-semibold">${mealSummary.calories}</div>
+                        <div class="text-xs text-gray-600">kcal</div>
+                    </div>
+                    <div class="text-center flex items-center space-x-1">
+                        <div class="font-semibold">${mealSummary.protein}g</div>
+                        <div class="text-xs text-gray-600">protein</div>
+                    </div>
+                    <div class="text-center flex items-center space-x-1">
+                        <div class="font-semibold">${mealSummary.carbs}g</div>
+                        <div class="text-xs text-gray-600">carbs</div>
+                    </div>
+                    <div class="text-center flex items-center space-x-1">
+                        <div class="font-semibold">${mealSummary.fat}g</div>
+                        <div class="text-xs text-gray-600">fat</div>
+                    </div>
+                    <div class="text-center">
+                        <div class="flex items-center justify-center ${getNutriScoreStyle(mealSummary.grade)} px-2 py-1 rounded-lg">
+                            <img src="${getNutriScoreImage(mealSummary.grade)}" 
+                                 alt="Nutri-Score ${mealSummary.grade}" 
+                                 class="h-6 w-auto">
+                        </div>
+                    </div>
+                </div>
+            `;
+            mealTypeSection.appendChild(heading);
+
+            // Add entries for this meal type
+            const entriesList = document.createElement('div');
+            entriesList.className = 'space-y-3 pl-3';
+
+            entries.forEach(entry => {
+                const entryElement = document.createElement('div');
+                entryElement.className = 'flex items-center justify-between p-3 bg-gray-50 rounded-lg';
+                entryElement.innerHTML = `
+                    <div>
+                        <div class="font-semibold">${entry.name}</div>
+                        ${entry.brand ? `<div class="text-xs text-gray-700">${entry.brand}</div>` : ''}
+                        ${entry.description ? `<div class="text-xs text-gray-600 italic">${entry.description}</div>` : ''}
+                        <div class="text-sm text-gray-600">${entry.quantity}g</div>
+                    </div>
+                    <div class="flex items-center space-x-4">
+                        <div class="text-center">
+                            <div class="font-semibold">${entry.nutrition.calories}</div>
+                            <div class="text-sm text-gray-600">kcal</div>
+                        </div>
+                        <div class="text-center">
+                            <div class="flex items-center justify-center ${getNutriScoreStyle(entry.nutrition.grade)} px-2 py-1 rounded-lg">
+                                <img src="${getNutriScoreImage(entry.nutrition.grade)}" 
+                                     alt="Nutri-Score ${entry.nutrition.grade}" 
+                                     class="h-8 w-auto">
+                            </div>
+                        </div>
+                        <button onclick="deleteEntry(${entry.id})" class="text-red-600 hover:text-red-800">
+                            <svg class="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M19 7l-.867 12.142A2 2 0 0116.138 21H7.862a2 2 0 01-1.995-1.858L5 7m5 4v6m4-6v6m1-10V4a1 1 0 00-1-1h-4a1 1 0 00-1 1v3M4 7h16" />
+                            </svg>
+                        </button>
+                    </div>
+                `;
+                entriesList.appendChild(entryElement);
+            });
+
+            mealTypeSection.appendChild(entriesList);
+            entriesContainer.appendChild(mealTypeSection);
+        });
+
+        // If no entries for today, show a message
+        if (dailyData.entries.length === 0) {
+            entriesContainer.innerHTML = `
+                <div class="text-center py-8 text-gray-500">
+                    <p>No food entries for today</p>
+                    <p class="text-sm mt-1">Add your first meal using the form above</p>
+                </div>
+            `;
+        }
+    } catch (error) {
+        console.error('Error:', error);
+    }
+}
+
+// Helper function to calculate meal summary
+function calculateMealSummary(entries) {
+    // Initialize summary data
+    const summary = {
+        calories: 0,
+        protein: 0,
+        carbs: 0,
+        fat: 0, 
+        saturated_fat: 0,
+        sugars: 0,
+        sodium: 0,
+        fiber: 0,
+        fruits_veg_nuts: 0
+    };
+
+    // Sum up nutrition values
+    entries.forEach(entry => {
+        summary.calories += entry.nutrition.calories;
+        summary.protein += entry.nutrition.protein;
+        summary.carbs += entry.nutrition.carbs;
+        summary.fat += entry.nutrition.fat;
+        summary.saturated_fat += entry.nutrition.saturated_fat || 0;
+        summary.sugars += entry.nutrition.sugars || 0;
+        summary.sodium += entry.nutrition.sodium || 0;
+        summary.fiber += entry.nutrition.fiber || 0;
+        summary.fruits_veg_nuts += (entry.nutrition.fruits_veg_nuts || 0) * (entry.nutrition.calories / summary.calories || 1);
+    });
+
+    // Round values
+    summary.calories = Math.round(summary.calories);
+    summary.protein = Math.round(summary.protein);
+    summary.carbs = Math.round(summary.carbs);
+    summary.fat = Math.round(summary.fat);
+
+    // Calculate Nutri-Score (simplified version)
+    // This is a simplified calculation - the real one would need more complex logic
+    let score = 0;
+
+    // Negative points (0-10 for each)
+    const energyPoints = Math.min(10, Math.max(0, Math.floor(summary.calories / 335)));
+    const sugarPoints = Math.min(10, Math.max(0, Math.floor(summary.sugars / 4.5)));
+    const satFatPoints = Math.min(10, Math.max(0, Math.floor(summary.saturated_fat / 1)));
+    const sodiumPoints = Math.min(10, Math.max(0, Math.floor(summary.sodium / 90)));
+
+    // Positive points (0-5 for each)
+    const fiberPoints = Math.min(5, Math.max(0, Math.floor(summary.fiber / 0.9)));
+    const proteinPoints = Math.min(5, Math.max(0, Math.floor(summary.protein / 1.6)));
+    const fruitsVegPoints = Math.min(5, Math.max(0, Math.floor(summary.fruits_veg_nuts / 20)));
+
+    // Calculate score
+    score = (energyPoints + sugarPoints + satFatPoints + sodiumPoints) - (fiberPoints + proteinPoints + fruitsVegPoints);
+
+    // Convert score to grade
+    let grade = 'C';
+    if (score <= 0) grade = 'A';
+    else if (score <= 2) grade = 'B';
+    else if (score <= 10) grade = 'C';
+    else if (score <= 18) grade = 'D';
+    else grade = 'E';
+
+    return {
+        ...summary,
+        grade
+    };
+}
+
+// Function to update the score display based on selected period
+function updateScoreDisplay(period) {
+    const data = window.scoreData[period];
+    if (!data) return;
+
+    // Update simple score
+    const simpleScoreText = document.getElementById('simpleScoreText');
+    simpleScoreText.textContent = data.simple_score;
+
+    // Update raw score
+    const rawScoreText = document.getElementById('rawScoreText');
+    rawScoreText.textContent = data.score;
+
+    // Update nutriscore
+    const nutriscoreElement = document.getElementById('nutriscoreDisplay');
+    nutriscoreElement.innerHTML = `
+        <img src="${getNutriScoreImage(data.grade)}" 
+             alt="Nutri-Score ${data.grade}" 
+             class="h-8 w-auto">
+    `;
+    nutriscoreElement.className = `flex items-center justify-center px-2 py-1 rounded-lg ${getNutriScoreStyle(data.grade)}`;
+
+    // Update nutrition info
+    const nutrition = data.daily_nutrition;
+    document.getElementById('caloriesDisplay').textContent = Math.round(nutrition.calories);
+    document.getElementById('proteinDisplay').textContent = `${Math.round(nutrition.protein)}g`;
+    document.getElementById('carbsDisplay').textContent = `${Math.round(nutrition.carbs)}g`;
+    document.getElementById('fatDisplay').textContent = `${Math.round(nutrition.fat)}g`;
+
+    // Update tab styles
+    ['daily', 'weekly', 'monthly'].forEach(tab => {
+        const button = document.getElementById(`${tab}Tab`);
+        if (tab === period) {
+            button.className = 'px-3 py-1 rounded-lg bg-blue-600 text-white';
+        } else {
+            button.className = 'px-3 py-1 rounded-lg bg-gray-200 text-gray-700';
+        }
+    });
+}
+
+// Function to delete a food entry
+async function deleteEntry(id) {
+    try {
+        const response = await fetch(`/api/food/${id}`, { method: 'DELETE' });
+        if (response.ok) {
+            await updateNutritionData();
+        } else {
+            alert('Failed to delete entry');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to delete entry');
+    }
+}
+
+// Function to populate model selection
+async function populateModelSelection() {
+    try {
+        const response = await fetch('/api/models');
+        const data = await response.json();
+
+        const select = document.getElementById('modelSelect');
+        select.innerHTML = '';
+
+        Object.entries(data.available_models).forEach(([value, name]) => {
+            const option = document.createElement('option');
+            option.value = value;
+            option.textContent = name;
+            option.selected = value === data.current_model;
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Error:', error);
+    }
+}
+
+// Function to delete a food reference
+async function deleteFoodReference(event, id) {
+    event.stopPropagation();  // Prevent click from bubbling to parent
+
+    if (!confirm('Are you sure you want to delete this food from the database?')) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/food-references/${id}`, { method: 'DELETE' });
+
+        if (response.ok) {
+            await updateFoodList(document.getElementById('foodSearch').value);
+        } else {
+            alert('Failed to delete food reference.');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('An error occurred while deleting the food reference.');
+    }
+}
+
+// Helper function to format serving units nicely
+function formatServingUnit(quantity, unit, weightPerUnit) {
+    if (!unit || unit === 'g' || unit === 'ml') {
+        return '';
+    }
+
+    const weight = parseFloat(weightPerUnit) || parseFloat(quantity);
+    if (!weight) return unit;
+
+    // Calculate how many units this represents
+    const pieces = Math.round((quantity / weight) * 10) / 10;
+    return `${pieces} ${unit}${pieces !== 1 ? 's' : ''}`;
+}
+
+// Function to update food reference list
+async function updateFoodList(search = '') {
+    try {
+        const response = await fetch(`/api/food-references?search=${encodeURIComponent(search)}`);
+        const foods = await response.json();
+
+        const foodList = document.getElementById('foodList');
+        foodList.innerHTML = '';
+
+        foods.forEach(food => {
+            // Calculate the per-serving values if we have last used quantity
+            let displayCalories = food.calories;
+            let displayProtein = food.protein;
+            let displayCarbs = food.carbs;
+            let displayFat = food.fat;
+
+            // For references that have last_used_quantity, scale the nutrition values
+            if (food.last_used_quantity) {
+                const factor = food.last_used_quantity / 100;
+                displayCalories = Math.round(food.calories * factor);
+                displayProtein = Math.round(food.protein * factor * 10) / 10;
+                displayCarbs = Math.round(food.carbs * factor * 10) / 10;
+                displayFat = Math.round(food.fat * factor * 10) / 10;
+            }
+
+            const foodElement = document.createElement('div');
+            foodElement.className = 'p-4 bg-gray-50 rounded-lg cursor-pointer hover:bg-gray-100';
+            foodElement.onclick = () => fillFoodForm(food);
+            foodElement.innerHTML = `
+                <div class="flex justify-between items-start">
+                    <div>
+                        <div class="font-semibold">${food.name}</div>
+                        <div class="text-sm text-gray-600">
+                            ${food.brand}
+                            ${food.is_shared ? `<span class="text-blue-600 ml-2">Shared by ${food.creator}</span>` : ''}
+                        </div>
+                    </div>
+                    <div class="flex items-center space-x-2">
+                        <div class="text-center">
+                            <div class="flex items-center justify-center ${getNutriScoreStyle(food.nutri_score)} px-2 py-1 rounded-lg">
+                                <img src="${getNutriScoreImage(food.nutri_score)}" 
+                                     alt="Nutri-Score ${food.nutri_score}" 
+                                     class="h-8 w-auto">
+                            </div>
+                        </div>
+                        <button onclick="deleteFoodReference(event, ${food.id})" 
+                                class="text-red-600 hover:text-red-800 p-2 rounded-full hover:bg-red-100 transition-colors duration-200">
+                            <svg xmlns="http://www.w3.org/2000/svg" class="h-5 w-5" viewBox="0 0 20 20" fill="currentColor">
+                                <path fill-rule="evenodd" d="M9 2a1 1 0 00-.894.553L7.382 4H4a1 1 0 000 2v10a2 2 0 002 2h8a2 2 0 002-2V6a1 1 0 100-2h-3.382l-.724-1.447A1 1 0 0011 2H9zM7 8a1 1 0 012 0v6a1 1 0 11-2 0V8zm5-1a1 1 0 00-1 1v6a1 1 0 102 0V8a1 1 0 00-1-1z" clip-rule="evenodd" />
+                            </svg>
+                        </button>
+                    </div>
+                </div>
+                <div class="mt-2 text-sm text-gray-600">
+                    <span>${displayCalories} kcal</span> |
+                    <span>${displayProtein}g protein</span> |
+                    <span>${displayCarbs}g carbs</span> |
+                    <span>${displayFat}g fat</span>
+                </div>
+                <div class="mt-1 text-xs text-gray-500">
+                    ${food.last_used_quantity ? 
+                      `<span>Values per ${food.last_used_quantity}g${food.last_used_unit ? ` (${formatServingUnit(food.last_used_quantity, food.last_used_unit, food.weight_per_unit)})` : ''}</span>` : 
+                      '<span>Values per 100g</span>'}
+                </div>
+            `;
+            foodList.appendChild(foodElement);
+        });
+    } catch (error) {
+        console.error('Error:', error);
+    }
+}
+
+// Function to fill the food form with selected food reference
+function fillFoodForm(food) {
+    document.getElementById('food-name').value = food.name;
+    document.getElementById('food-brand').value = food.brand || '';
+
+    // Store last used data for later steps
+    window.lastUsedMealType = food.last_used_meal_type || 'snack';
+    window.lastUsedQuantity = food.last_used_quantity || 100;
+
+    // When filling from the food database search, submit the form directly to start the workflow
+    // This simulates clicking the "Next" button after filling in the name
+    const foodInfoForm = document.getElementById('food-info-form');
+    if (foodInfoForm) {
+        foodInfoForm.dispatchEvent(new Event('submit'));
+    }
+}
+
+// Function to update serving sizes based on food name
+async function updateServingSizes(foodName) {
+    if (!foodName) {
+        return;
+    }
+
+    try {
+        const response = await waitForLookupJob(await fetch(`/api/food-type/${encodeURIComponent(foodName)}`));
+        const data = await response.json();
+
+        const servingSizeSelect = document.getElementById('serving-size-select');
+        const quantityInput = document.getElementById('quantity');
+        const quantityLabel = document.querySelector('label[for="quantity"]');
+
+        // Clear previous options
+        servingSizeSelect.innerHTML = '';
+
+        // Add serving size options
+        data.serving_sizes.sizes.forEach(size => {
+            const option = document.createElement('option');
+            option.value = size.value;
+            option.textContent = size.label;
+            servingSizeSelect.appendChild(option);
+        });
+
+        // Update quantity label with the appropriate unit
+        const displayUnit = data.display_unit;
+        quantityLabel.textContent = `Quantity (${displayUnit === 'ml' ? 'ml' : 'g'})`;
+
+        // Set default quantity
+        if (data.default_quantity) {
+            quantityInput.value = data.default_quantity;
+        }
+
+        // Store weight per unit for calculations
+        servingSizeSelect.dataset.weightPerUnit = data.weight_per_unit || '';
+        servingSizeSelect.dataset.unit = data.unit;
+        servingSizeSelect.dataset.displayUnit = data.display_unit;
+
+        // Update quantity input attributes based on unit
+        if (data.unit === 'ml') {
+            quantityInput.setAttribute('step', '10');
+            quantityInput.setAttribute('min', '10');
+        } else {
+            quantityInput.setAttribute('step', '1');
+            quantityInput.setAttribute('min', '1');
+        }
+
+        // Show food type indicator
+        const foodTypeIndicator = document.getElementById('foodTypeIndicator');
+        if (foodTypeIndicator) {
+            foodTypeIndicator.textContent = `Food Type: ${data.food_type}`;
+            foodTypeIndicator.style.display = 'block';
+        }
+
+    } catch (error) {
+        console.error('Error fetching serving sizes:', error);
+    }
+}
+
+// Function to handle serving size changes
+function handleServingSizeChange(event) {
+    const servingSizeSelect = event.target;
+    const selectedValue = servingSizeSelect.value;
+    const quantityInput = document.getElementById('quantity');
+    const weightPerUnit = parseFloat(servingSizeSelect.dataset.weightPerUnit);
+    const unit = servingSizeSelect.dataset.unit;
+    const displayUnit = servingSizeSelect.dataset.displayUnit;
+
+    if (selectedValue === 'custom') {
+        // For custom amount, enable the quantity input
+        quantityInput.removeAttribute('readonly');
+        quantityInput.focus();
+
+        // Update label to show the appropriate unit
+        const quantityLabel = document.querySelector('label[for="quantity"]');
+        if (unit === 'ml') {
+            quantityLabel.textContent = 'Quantity (ml)';
+        } else if (weightPerUnit) {
+            quantityLabel.textContent = `Quantity (${displayUnit}s)`;
+        } else {
+            quantityLabel.textContent = 'Quantity (g)';
+        }
+    } else {
+        // For preset amounts, set the quantity and make it readonly
+        const value = parseFloat(selectedValue);
+        quantityInput.value = value;
+        quantityInput.setAttribute('readonly', 'true');
+
+        // Update label to show equivalent weight if available
+        const quantityLabel = document.querySelector('label[for="quantity"]');
+        if (unit === 'ml') {
+            quantityLabel.textContent = 'Quantity (ml)';
+        } else if (weightPerUnit) {
+            const pieces = value / weightPerUnit;
+            const weightInGrams = value;
+            quantityLabel.textContent = `Quantity (${pieces} ${displayUnit}${pieces > 1 ? 's' : ''} = ${weightInGrams}g)`;
+        } else {
+            quantityLabel.textContent = 'Quantity (g)';
+        }
+    }
+}
+
+// Debounce function to limit API calls
+function debounce(func, wait) {
+    let timeout;
+    return function executedFunction(...args) {
+        const later = () => {
+            clearTimeout(timeout);
+            func(...args);
+        };
+        clearTimeout(timeout);
+        timeout = setTimeout(later, wait);
+    };
+}
+
+// Update serving sizes when food name changes (with debounce)
+const debouncedUpdateServingSizes = debounce((value) => {
+    if (value.length >= 2) {  // Only update if at least 2 characters
+        updateServingSizes(value);
+    } else {
+        // Clear food type indicator if input is too short
+        const foodTypeIndicator = document.getElementById('foodTypeIndicator');
+        foodTypeIndicator.style.display = 'none';
+    }
+}, 300);
+
+document.getElementById('food-name').addEventListener('input', (e) => {
+    debouncedUpdateServingSizes(e.target.value);
+});
+
+// Event Listeners
+document.addEventListener('DOMContentLoaded', () => {
+    // Initialize
+    updateNutritionData();
+    populateModelSelection();
+    updateFoodList();
+
+    // Set up food search
+    let searchTimeout;
+    document.getElementById('foodSearch').addEventListener('input', (e) => {
+        clearTimeout(searchTimeout);
+        searchTimeout = setTimeout(() => updateFoodList(e.target.value), 300);
+    });
+
+    // Handle model selection
+    document.getElementById('setModel').addEventListener('click', async () => {
+        const model = document.getElementById('modelSelect').value;
+        try {
+            const response = await fetch('/api/models', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ model })
+            });
+
+            if (!response.ok) {
+                const data = await response.json();
+                throw new Error(data.error || 'Failed to set model');
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            alert(error.message);
+        }
+    });
+
+    // Handle serving size selection
+    document.getElementById('serving-size-select').addEventListener('change', handleServingSizeChange);
+
+    // Handle form submission
+    document.getElementById('food-info-form').addEventListener('submit', async (e) => {
+        e.preventDefault();
+
+        const foodName = document.getElementById('food-name').value;
+        const brand = document.getElementById('food-brand').value || 'Generic';
+        const quantity = parseInt(document.getElementById('quantity').value);
+        const isShared = document.getElementById('share-food-checkbox').checked;
+
+        if (!quantity || isNaN(quantity)) {
+            alert('Please enter a valid quantity');
+            return;
+        }
+
+        let data = {
+            name: foodName,
+            brand: brand,
+            quantity: quantity,
+            is_shared: isShared
+        };
+
+        try {
+            const response = await waitForLookupJob(await fetch('/api/food', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify(data)
+            }));
+
+            if (response.ok) {
+                // Clear form
+                document.getElementById('food-info-form').reset();
+
+                // Update display
+                await updateNutritionData();
+                await updateFoodList();  // Refresh food list
+
+            } else {
+                alert('Failed to add food entry. Please try again.');
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            alert('An error occurred. Please try again.');
+        }
+    });
+
+    // Add tab click handlers
+    document.getElementById('dailyTab').addEventListener('click', () => updateScoreDisplay('daily'));
+    document.getElementById('weeklyTab').addEventListener('click', () => updateScoreDisplay('weekly'));
+    document.getElementById('monthlyTab').addEventListener('click', () => updateScoreDisplay('monthly'));
+});
@@ -1,31 +1,19 @@
-from app import create_app, db
+"""The application's single startup path, for gunicorn (wsgi:app) and the other entry points.
+
+Creating the app does no database work: the schema is managed by the
+one-shot `python setup_db.py` step, run once per deploy rather than by
+every process that starts.
+"""
+from app import create_app
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-try:
-    logger.info("Initializing application in wsgi.py")
-    
-    # For Gunicorn
-    application = create_app()
-    
-    # Initialize database within app context
-    with application.app_context():
-        try:
-            db.create_all()
-            logger.info("Database tables created successfully in wsgi.py")
-        except Exception as e:
-            logger.error(f"Error creating database tables in wsgi.py: {e}")
-    
-    # For compatibility 
-    app = application
-    
-    logger.info("Application initialized successfully in wsgi.py")
-except Exception as e:
-    logger.error(f"Error initializing application in wsgi.py: {e}")
-    raise
+logger.info("Initializing application in wsgi.py")
+application = create_app()
+
+# For compatibility
+app = application
 
 if __name__ == "__main__":
-    app.run() 
\ No newline at end of file
+    app.run()